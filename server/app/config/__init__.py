@@ -1,5 +1,5 @@
 """Configuration package for the application."""
 from .settings import settings
-from .database import engine, SessionLocal, Base, get_db
+from .database import engine, SessionLocal, Base, get_db, get_read_db
 
-__all__ = ["settings", "engine", "SessionLocal", "Base", "get_db"]
+__all__ = ["settings", "engine", "SessionLocal", "Base", "get_db", "get_read_db"]
@@ -0,0 +1,314 @@
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Hashable, Optional, Tuple
+
+from app.config.authentication import verify_token
+from app.config.metrics import ADMISSION_REJECTED
+from app.config.settings import settings
+
+API = "/api/v1"
+
+
+class AdaptiveLimit:
+    """Concurrency limit for one route class, adjusted AIMD-style (see
+    ``AdmissionController.record``).
+
+    Requests over the limit wait in a short queue served round-robin by key
+    (user), so one user's burst can't starve the others, and are rejected
+    once it's full or they've waited ``queue_seconds``. Only touched from
+    the event loop, so there's no lock.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_limit: int,
+        target_seconds: float,
+        priority: int = 0,
+        min_limit: int = 1,
+        backoff: float = settings.admission_backoff,
+        queue_seconds: float = settings.admission_queue_ms / 1000,
+        per_key: Optional[int] = None,
+    ):
+        self.name = name
+        self.max_limit = max(min_limit, max_limit)
+        self.min_limit = min_limit
+        self.target_seconds = target_seconds
+        self.priority = priority
+        self.backoff = backoff
+        self.queue_seconds = queue_seconds
+        self.per_key = per_key
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self._by_key: Dict[Hashable, int] = {}  # admitted or queued
+        self._waiters: "OrderedDict[Hashable, Deque[asyncio.Future]]" = OrderedDict()
+        self._queued = 0
+        self._last_decrease = 0.0
+        self._stats = {"admitted": 0, "overloaded": 0, "per_user": 0}
+
+    @property
+    def retry_after(self) -> int:
+        """Seconds a rejected client should wait: about one service time."""
+        return max(1, math.ceil(self.target_seconds))
+
+    async def acquire(self, key: Hashable = None) -> Optional[str]:
+        """Take a slot, waiting briefly if needed; the rejection reason
+        (``"per_user"`` or ``"overloaded"``) when there is none."""
+        if self.per_key and self._by_key.get(key, 0) >= self.per_key:
+            return self._reject("per_user")
+        if self.in_flight < int(self.limit) and not self._queued:
+            self._admit(key)
+            return None
+        if self._queued >= max(1, int(self.limit)):
+            return self._reject("overloaded")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, deque()).append(waiter)
+        self._queued += 1
+        self._by_key[key] = self._by_key.get(key, 0) + 1
+        try:
+            await asyncio.wait((waiter,), timeout=self.queue_seconds)
+        except asyncio.CancelledError:
+            # Client went away while queued; hand back a slot it was given
+            if waiter.done() and not waiter.cancelled():
+                self.release(key)
+            else:
+                self._unqueue(key, waiter)
+            raise
+        if waiter.done():
+            self._stats["admitted"] += 1
+            return None
+        self._unqueue(key, waiter)
+        return self._reject("overloaded")
+
+    def release(self, key: Hashable = None):
+        self.in_flight -= 1
+        self._forget(key)
+        self._wake()
+
+    def _admit(self, key: Hashable):
+        self.in_flight += 1
+        self._by_key[key] = self._by_key.get(key, 0) + 1
+        self._stats["admitted"] += 1
+
+    def _reject(self, reason: str) -> str:
+        self._stats[reason] += 1
+        ADMISSION_REJECTED.inc(self.name, reason)
+        return reason
+
+    def _forget(self, key: Hashable):
+        count = self._by_key.get(key, 0) - 1
+        if count > 0:
+            self._by_key[key] = count
+        else:
+            self._by_key.pop(key, None)
+
+    def _unqueue(self, key: Hashable, waiter: asyncio.Future):
+        queue = self._waiters.get(key)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            self._queued -= 1
+            if not queue:
+                del self._waiters[key]
+        waiter.cancel()
+        self._forget(key)
+
+    def _wake(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            key, queue = next(iter(self._waiters.items()))
+            waiter = queue.popleft()
+            self._queued -= 1
+            if queue:
+                self._waiters.move_to_end(key)  # next user's turn
+            else:
+                del self._waiters[key]
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    def increase(self):
+        # Grow only while the limit is what's holding requests back
+        if self.in_flight >= int(self.limit):
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def decrease(self, period: float) -> bool:
+        """Back off, at most once per ``period``, so one burst of slow
+        replies counts once; False when it already did."""
+        now = time.monotonic()
+        if now - self._last_decrease < period:
+            return False
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+        return True
+
+    @property
+    def can_shed(self) -> bool:
+        return self.in_flight > 0 and self.limit > self.min_limit
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": self._queued,
+        }
+
+
+class AdmissionController:
+    """Route classes, matched on method and path prefix, and their limits.
+
+    A request answered within its class's target grows that class's limit
+    by ``1 / limit`` (about one per limit's worth of requests). A slower
+    one, or a 5xx, means the process is overloaded, and the classes share
+    its CPU and threads. The busy class of lowest ``priority`` (the most
+    expensive work) backs off first, then the next one up if it already
+    did this period, and the slow class itself last, so chat turns and
+    password hashing are shed before cheap catalog reads.
+    """
+
+    def __init__(self):
+        self.limits: Dict[str, AdaptiveLimit] = {}
+        self.routes: Tuple[Tuple[str, str, str], ...] = ()
+
+    def add(self, limit: AdaptiveLimit, *routes: Tuple[str, str]):
+        self.limits[limit.name] = limit
+        self.routes += tuple((method, path, limit.name) for method, path in routes)
+
+    def classify(self, method: str, path: str) -> Optional[AdaptiveLimit]:
+        for route_method, prefix, name in self.routes:
+            if method == route_method and path.startswith(prefix):
+                return self.limits[name]
+        return None
+
+    def record(self, limit: AdaptiveLimit, latency: float, failed: bool = False):
+        if not failed and latency <= limit.target_seconds:
+            limit.increase()
+            return
+        lower = sorted(
+            (
+                other
+                for other in self.limits.values()
+                if other.priority < limit.priority and other.can_shed
+            ),
+            key=lambda other: other.priority,
+        )
+        for shed in (*lower, limit):
+            if shed.decrease(limit.target_seconds):
+                return
+
+    def stats(self) -> dict:
+        return {name: limit.stats() for name, limit in self.limits.items()}
+
+
+admission = AdmissionController()
+admission.add(
+    AdaptiveLimit(
+        "auth",
+        settings.admission_auth_limit,
+        settings.admission_auth_target_ms / 1000,
+        priority=1,
+    ),
+    ("POST", f"{API}/auth/login"),
+    ("POST", f"{API}/auth/register"),
+)
+admission.add(
+    AdaptiveLimit(
+        "chat",
+        settings.admission_chat_limit,
+        settings.admission_chat_target_ms / 1000,
+        per_key=settings.admission_chat_per_user,
+    ),
+    ("POST", f"{API}/chat"),
+)
+admission.add(
+    AdaptiveLimit(
+        "catalog",
+        settings.admission_catalog_limit,
+        settings.admission_catalog_target_ms / 1000,
+        priority=2,
+    ),
+    ("GET", f"{API}/products"),
+)
+
+
+def user_key(scope) -> Hashable:
+    """The bearer token's user id, else the client address."""
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            payload = verify_token(token) if scheme.lower() == "bearer" else None
+            subject = (payload or {}).get("sub")
+            if isinstance(subject, dict) and "user_id" in subject:
+                return subject["user_id"]
+            break
+    client = scope.get("client")
+    return client[0] if client else None
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware applying ``admission`` to the classified routes.
+
+    A request's latency sample is its time to the response start, so a
+    streamed chat reply is judged by how soon it starts while its slot is
+    held until it ends. Rejections are JSON 503 (or 429 per user) with
+    ``Retry-After``, sent without touching the app.
+    """
+
+    def __init__(self, app, controller: AdmissionController = admission):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        limit = self.controller.classify(scope["method"], scope["path"])
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        key = user_key(scope) if limit.per_key else None
+        rejected = await limit.acquire(key)
+        if rejected:
+            return await self._reject(send, limit, rejected)
+
+        started = time.perf_counter()
+        latency = None
+        status = 500
+
+        async def send_with_sample(message):
+            nonlocal latency, status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                latency = time.perf_counter() - started
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_sample)
+        finally:
+            if latency is None:
+                latency = time.perf_counter() - started
+            self.controller.record(limit, latency, failed=status >= 500)
+            limit.release(key)
+
+    async def _reject(self, send, limit: AdaptiveLimit, reason: str):
+        per_user = reason == "per_user"
+        if per_user:
+            detail = "Too many concurrent requests, retry shortly"
+        else:
+            detail = "Server busy, retry shortly"
+        body = json.dumps({"detail": detail}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429 if per_user else 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(limit.retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
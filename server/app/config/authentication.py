@@ -2,6 +2,8 @@ import os
 from datetime import datetime, timedelta, timezone
 
 from dotenv import load_dotenv
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import ExpiredSignatureError, JWTError, jwt
 from passlib.context import CryptContext
 
@@ -15,6 +17,8 @@ ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 15))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 7))
 
+bearer_scheme = HTTPBearer()
+
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -45,9 +49,26 @@ def create_refresh_token(data):
 
 def verify_token(token: str):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        # "sub" carries the {"sub": email, "user_id": id} dict, not a string
+        payload = jwt.decode(
+            token, SECRET_KEY, algorithms=[ALGORITHM], options={"verify_sub": False}
+        )
         return payload
     except ExpiredSignatureError:
         return None
     except JWTError:
         return None
+
+
+def get_current_user_id(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+) -> int:
+    payload = verify_token(credentials.credentials)
+    if not payload or payload.get("type") != "access":
+        raise HTTPException(status_code=401, detail="Invalid or expired access token")
+
+    subject = payload.get("sub")
+    user_id = subject.get("user_id") if isinstance(subject, dict) else None
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="Invalid or expired access token")
+    return user_id
@@ -0,0 +1,357 @@
+import json
+import logging
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.config.database import SessionLocal
+from app.config.settings import settings
+from app.models.base import (
+    ChangeOutbox,
+    Order,
+    Payment,
+    Product,
+    ProductCategory,
+    Shipment,
+)
+from sqlalchemy import event, func, insert, inspect
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+PrimaryKey = Any  # a scalar, or a tuple for composite keys
+Subscriber = Callable[["ChangeSet"], None]
+
+OUTBOX_BATCH = 1000
+
+
+class ChangeSet:
+    """Primary keys written by one or more committed transactions, by table.
+
+    ``updated`` maps each key to the names of the columns that changed.
+    Merging coalesces: each row is reported once, by its net change, so a
+    row inserted then updated is "inserted" and one inserted then deleted
+    disappears.
+    """
+
+    __slots__ = ("inserted", "updated", "deleted")
+
+    def __init__(self):
+        self.inserted: Dict[str, Set[PrimaryKey]] = {}
+        self.updated: Dict[str, Dict[PrimaryKey, Set[str]]] = {}
+        self.deleted: Dict[str, Set[PrimaryKey]] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.inserted or self.updated or self.deleted)
+
+    def __repr__(self) -> str:
+        return (
+            f"ChangeSet(inserted={self.inserted}, updated={self.updated}, "
+            f"deleted={self.deleted})"
+        )
+
+    @property
+    def tables(self) -> Set[str]:
+        return set(self.inserted) | set(self.updated) | set(self.deleted)
+
+    def changed(self, table: str) -> Set[PrimaryKey]:
+        """Keys inserted or updated in ``table``."""
+        return self.inserted.get(table, set()) | set(self.updated.get(table, ()))
+
+    def removed(self, table: str) -> Set[PrimaryKey]:
+        return set(self.deleted.get(table, ()))
+
+    def add_inserted(self, table: str, key: PrimaryKey):
+        _discard(self.deleted, table, key)
+        self.inserted.setdefault(table, set()).add(key)
+
+    def add_updated(self, table: str, key: PrimaryKey, columns: Iterable[str]):
+        if key in self.inserted.get(table, ()) or key in self.deleted.get(table, ()):
+            return
+        self.updated.setdefault(table, {}).setdefault(key, set()).update(columns)
+
+    def add_deleted(self, table: str, key: PrimaryKey):
+        _discard(self.updated, table, key)
+        if key in self.inserted.get(table, ()):
+            _discard(self.inserted, table, key)
+            return
+        self.deleted.setdefault(table, set()).add(key)
+
+    def merge(self, other: "ChangeSet") -> "ChangeSet":
+        for table, keys in other.inserted.items():
+            for key in keys:
+                self.add_inserted(table, key)
+        for table, rows in other.updated.items():
+            for key, columns in rows.items():
+                self.add_updated(table, key, columns)
+        for table, keys in other.deleted.items():
+            for key in keys:
+                self.add_deleted(table, key)
+        return self
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "inserted": {t: list(keys) for t, keys in self.inserted.items()},
+                "updated": {
+                    t: [[key, sorted(columns)] for key, columns in rows.items()]
+                    for t, rows in self.updated.items()
+                },
+                "deleted": {t: list(keys) for t, keys in self.deleted.items()},
+            },
+            default=str,
+        )
+
+    @classmethod
+    def from_json(cls, payload: str) -> "ChangeSet":
+        data = json.loads(payload)
+        changes = cls()
+        for table, keys in data.get("inserted", {}).items():
+            changes.inserted[table] = {_key(key) for key in keys}
+        for table, rows in data.get("updated", {}).items():
+            changes.updated[table] = {_key(key): set(cols) for key, cols in rows}
+        for table, keys in data.get("deleted", {}).items():
+            changes.deleted[table] = {_key(key) for key in keys}
+        return changes
+
+
+def _discard(by_table: dict, table: str, key: PrimaryKey):
+    keys = by_table.get(table)
+    if keys is None:
+        return
+    if isinstance(keys, dict):
+        keys.pop(key, None)
+    else:
+        keys.discard(key)
+    if not keys:
+        del by_table[table]
+
+
+def _key(value) -> PrimaryKey:
+    # JSON turns composite keys into lists
+    return tuple(value) if isinstance(value, list) else value
+
+
+def _primary_key(obj) -> PrimaryKey:
+    key = inspect(obj).mapper.primary_key_from_instance(obj)
+    return key[0] if len(key) == 1 else tuple(key)
+
+
+def _changed_columns(obj) -> Set[str]:
+    state = inspect(obj)
+    return {
+        attr.key
+        for attr in state.mapper.column_attrs
+        if state.attrs[attr.key].history.has_changes()
+    }
+
+
+def origin() -> str:
+    """This process, as recorded on its outbox rows (read after any fork)."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class ChangeBus:
+    """Change data capture for the watched models.
+
+    Inserts, updates and deletes are collected per transaction from the
+    session's flushes and published as one coalesced ``ChangeSet`` once the
+    transaction commits (nothing on rollback). Subscribers run on the
+    committing thread, so they should only record or invalidate and leave
+    real work to a background job. With ``change_outbox_enabled`` every
+    change set is also written to ``change_outbox`` in the same transaction,
+    and ``OutboxTailer`` replays other processes' rows into the local bus.
+    """
+
+    def __init__(self):
+        self._tables: Dict[type, str] = {}
+        self._subscribers: List[Tuple[Optional[frozenset], Subscriber]] = []
+        self._lock = threading.Lock()
+        self._stats = {"published": 0, "remote": 0, "subscriber_errors": 0}
+
+    def watch(self, *models: type):
+        for model in models:
+            self._tables[model] = model.__tablename__
+
+    def subscribe(
+        self, callback: Subscriber, tables: Optional[Iterable[str]] = None
+    ) -> Callable[[], None]:
+        """Call ``callback(changes)`` for change sets touching ``tables``
+        (any table when None); returns a function that unsubscribes."""
+        entry = (frozenset(tables) if tables else None, callback)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe():
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+
+        return unsubscribe
+
+    def publish(self, changes: ChangeSet, remote: bool = False):
+        if not changes:
+            return
+        tables = changes.tables
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self._stats["remote" if remote else "published"] += 1
+        for wanted, callback in subscribers:
+            if wanted is not None and not wanted & tables:
+                continue
+            try:
+                callback(changes)
+            except Exception:
+                with self._lock:
+                    self._stats["subscriber_errors"] += 1
+                logger.exception("Change subscriber %r failed", callback)
+
+    def collect(self, session: Session):
+        """Stage what the flush just wrote; ``after_flush``, so new rows
+        already have keys while the collections are still pre-flush."""
+        changes = ChangeSet()
+        for obj in session.new:
+            table = self._tables.get(type(obj))
+            if table:
+                changes.add_inserted(table, _primary_key(obj))
+        for obj in session.dirty:
+            table = self._tables.get(type(obj))
+            if table:
+                columns = _changed_columns(obj)
+                if columns:
+                    changes.add_updated(table, _primary_key(obj), columns)
+        for obj in session.deleted:
+            table = self._tables.get(type(obj))
+            if table:
+                changes.add_deleted(table, _primary_key(obj))
+        self.stage(session, changes)
+
+    def stage(self, session: Session, changes: ChangeSet):
+        if not changes:
+            return
+        session.info.setdefault("change_set", ChangeSet()).merge(changes)
+        if settings.change_outbox_enabled:
+            # Core insert on the flush's connection: same transaction, no
+            # recursive flush
+            session.connection().execute(
+                insert(ChangeOutbox),
+                {
+                    "origin": origin(),
+                    "changes": changes.to_json(),
+                    "created_at": datetime.utcnow(),
+                },
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["subscribers"] = len(self._subscribers)
+        return stats
+
+
+change_bus = ChangeBus()
+change_bus.watch(Product, ProductCategory, Order, Payment, Shipment)
+
+
+def record_changes(
+    session: Session,
+    model: type,
+    keys: Iterable[PrimaryKey],
+    columns: Iterable[str] = (),
+    deleted: bool = False,
+):
+    """Report rows written by bulk ``UPDATE``/``DELETE`` statements, which
+    bypass the flush; published when ``session`` commits."""
+    table = model.__tablename__
+    columns = set(columns)
+    changes = ChangeSet()
+    for key in keys:
+        if deleted:
+            changes.add_deleted(table, key)
+        else:
+            changes.add_updated(table, key, columns)
+    change_bus.stage(session, changes)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    change_bus.collect(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed_changes(session):
+    changes = session.info.pop("change_set", None)
+    if changes:
+        change_bus.publish(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_changes(session):
+    session.info.pop("change_set", None)
+
+
+class OutboxTailer:
+    """Replays other processes' outbox rows into this process's bus.
+
+    Starts at the newest row, so history isn't replayed. Ids are assigned
+    on insert, not commit: a transaction that commits after a later-started
+    one can land behind the cursor and be missed, so subscribers that must
+    not miss anything should also re-read on a slower schedule.
+    """
+
+    def __init__(self, batch: int = OUTBOX_BATCH):
+        self.batch = batch
+        self.cursor: Optional[int] = None
+
+    def poll(self) -> int:
+        db = SessionLocal()
+        try:
+            if self.cursor is None:
+                self.cursor = db.query(func.max(ChangeOutbox.id)).scalar() or 0
+                return 0
+            rows = (
+                db.query(ChangeOutbox)
+                .filter(ChangeOutbox.id > self.cursor)
+                .order_by(ChangeOutbox.id)
+                .limit(self.batch)
+                .all()
+            )
+        finally:
+            db.close()
+
+        me = origin()
+        changes = ChangeSet()
+        for row in rows:
+            self.cursor = row.id
+            if row.origin != me:
+                changes.merge(ChangeSet.from_json(row.changes))
+        change_bus.publish(changes, remote=True)
+        return len(rows)
+
+
+def purge_outbox(retention_seconds: float = settings.change_outbox_retention_seconds):
+    """Delete outbox rows older than the retention window, in batches."""
+    cutoff = datetime.utcnow() - timedelta(seconds=retention_seconds)
+    purged = 0
+    db = SessionLocal()
+    try:
+        while True:
+            ids = [
+                row_id
+                for (row_id,) in db.query(ChangeOutbox.id)
+                .filter(ChangeOutbox.created_at < cutoff)
+                .limit(OUTBOX_BATCH)
+            ]
+            if not ids:
+                break
+            db.query(ChangeOutbox).filter(ChangeOutbox.id.in_(ids)).delete(
+                synchronize_session=False
+            )
+            db.commit()
+            purged += len(ids)
+    finally:
+        db.close()
+    if purged:
+        logger.info("Purged %d change outbox rows", purged)
@@ -0,0 +1,319 @@
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from app.config.change_bus import ChangeSet, change_bus
+from app.config.settings import settings
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "image/svg+xml",
+    "text/",
+)
+# Bodies past this are passed through rather than buffered to compress
+MAX_BUFFERED_BYTES = 8 * 1024 * 1024
+# Bodies past this are compressed on the threadpool, off the event loop;
+# smaller ones compress faster than the hand-off to a thread takes
+THREADPOOL_MIN_BYTES = 64 * 1024
+
+
+def _gzip(body: bytes, level: int) -> bytes:
+    # mtime=0: the same body always compresses to the same bytes
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def _brotli(body: bytes, quality: int) -> bytes:
+    return brotli.compress(body, quality=quality)
+
+
+def _compress_timed(compress, body: bytes, level: int) -> Tuple[bytes, float]:
+    # thread_time: this thread's CPU only, whichever thread it runs on
+    started = time.thread_time()
+    compressed = compress(body, level)
+    return compressed, time.thread_time() - started
+
+
+# Encoding -> (compress(body, level), level on the fly, level when cached)
+ENCODERS: Dict[str, Tuple[Callable[[bytes, int], bytes], int, int]] = {
+    "gzip": (_gzip, settings.compression_gzip_level, 9)
+}
+if brotli is not None:
+    ENCODERS["br"] = (_brotli, settings.compression_brotli_quality, 11)
+
+
+def negotiate(accept_encoding: str, available: Iterable[str]) -> Optional[str]:
+    """The best of ``available`` the client accepts (brotli over gzip), or
+    None for identity."""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip()] = quality
+    best, best_quality = None, 0.0
+    for coding in ("br", "gzip"):
+        if coding not in available:
+            continue
+        quality = accepted.get(coding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def _header(scope, name: bytes) -> str:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return ""
+
+
+class CompressionStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {
+            "responses": 0,
+            "bytes_in": 0,
+            "bytes_out": 0,
+            "cpu_seconds": 0.0,
+        }
+
+    def add(self, bytes_in: int, bytes_out: int, cpu_seconds: float):
+        with self._lock:
+            self._values["responses"] += 1
+            self._values["bytes_in"] += bytes_in
+            self._values["bytes_out"] += bytes_out
+            self._values["cpu_seconds"] += cpu_seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._values)
+        stats["bytes_saved"] = stats["bytes_in"] - stats["bytes_out"]
+        return stats
+
+
+compression_stats = CompressionStats()
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing responses on the fly.
+
+    Applies to complete (``Content-Length``) responses of a compressible
+    type and at least ``minimum_size`` bytes, encoded as the client's
+    ``Accept-Encoding`` prefers; large bodies are compressed on the
+    threadpool so they don't stall the event loop. Responses that already
+    carry a ``Content-Encoding`` (the precompressed catalog) and streams,
+    such as chat's event stream, pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = settings.compression_min_bytes):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = negotiate(_header(scope, b"accept-encoding"), ENCODERS)
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+        parts = []
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                if self._should_compress(message):
+                    start = message  # held until the body is complete
+                    return
+                await send(message)
+            elif message["type"] == "http.response.body" and start is not None:
+                parts.append(message.get("body", b""))
+                if message.get("more_body", False):
+                    return
+                body = b"".join(parts)
+                await self._send_compressed(send, start, body, encoding)
+            else:
+                await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+    def _should_compress(self, start) -> bool:
+        headers = MutableHeaders(raw=start["headers"])
+        if "content-encoding" in headers:
+            return False
+        length = headers.get("content-length")
+        if length is None:
+            return False
+        if not self.minimum_size <= int(length) <= MAX_BUFFERED_BYTES:
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    async def _send_compressed(self, send, start, body: bytes, encoding: str):
+        compress, level, _ = ENCODERS[encoding]
+        if len(body) >= THREADPOOL_MIN_BYTES:
+            compressed, cpu_seconds = await run_in_threadpool(
+                _compress_timed, compress, body, level
+            )
+        else:
+            compressed, cpu_seconds = _compress_timed(compress, body, level)
+        compression_stats.add(len(body), len(compressed), cpu_seconds)
+        headers = MutableHeaders(raw=start["headers"])
+        headers["content-encoding"] = encoding
+        headers["content-length"] = str(len(compressed))
+        headers.add_vary_header("Accept-Encoding")
+        await send(start)
+        await send({"type": "http.response.body", "body": compressed})
+
+
+class CachedBody:
+    """One response body, in every encoding, compressed once at build time."""
+
+    __slots__ = ("encodings", "build_seconds", "etag", "created", "size")
+
+    def __init__(self, body: bytes):
+        self.encodings = {"identity": body}
+        started = time.process_time()
+        for encoding, (compress, _, level) in ENCODERS.items():
+            compressed = compress(body, level)
+            if len(compressed) < len(body):
+                self.encodings[encoding] = compressed
+        self.build_seconds = time.process_time() - started
+        self.etag = f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+        self.created = time.monotonic()
+        self.size = sum(len(value) for value in self.encodings.values())
+
+
+class PrecompressedCache:
+    """JSON responses cached with their gzip and brotli encodings.
+
+    Entries are keyed by the request's key and the cache's ``version``,
+    which a change-bus subscriber bumps on every committed write to the
+    watched tables, so a write retires every cached body at once and the
+    next request rebuilds it. Other processes' writes arrive only through
+    the change outbox, so entries also expire after ``ttl`` seconds.
+    Serving a hit is a lookup and a header parse: no serialization, no
+    compression, and ``If-None-Match`` answered with 304.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = settings.compression_cache_max_mb * 1024 * 1024,
+        ttl: float = settings.compression_cache_ttl_seconds,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.version = 0
+        self._entries: "OrderedDict[tuple, CachedBody]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "not_modified": 0,
+            "bytes_identity": 0,
+            "bytes_sent": 0,
+            "build_cpu_seconds": 0.0,
+        }
+
+    def invalidate(self, changes: Optional[ChangeSet] = None):
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def respond(
+        self,
+        request: Request,
+        key: Hashable,
+        build: Callable[[], BaseModel],
+    ) -> Response:
+        """The cached response for ``key``, built (and compressed) by
+        ``build`` on a miss, in the encoding the client prefers."""
+        entry = self._get(key)
+        if entry is None:
+            version = self.version
+            entry = CachedBody(build().model_dump_json().encode())
+            self._put((version, key), entry)
+
+        headers = {"ETag": entry.etag, "Vary": "Accept-Encoding"}
+        if request.headers.get("if-none-match") == entry.etag:
+            with self._lock:
+                self._stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+
+        encoding = negotiate(
+            request.headers.get("accept-encoding", ""), entry.encodings
+        )
+        body = entry.encodings[encoding or "identity"]
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        with self._lock:
+            self._stats["bytes_identity"] += len(entry.encodings["identity"])
+            self._stats["bytes_sent"] += len(body)
+        return Response(body, media_type="application/json", headers=headers)
+
+    def _get(self, key: Hashable) -> Optional[CachedBody]:
+        with self._lock:
+            cache_key = (self.version, key)
+            entry = self._entries.get(cache_key)
+            if entry is not None and time.monotonic() - entry.created > self.ttl:
+                self._bytes -= self._entries.pop(cache_key).size
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(cache_key)
+            self._stats["hits"] += 1
+            return entry
+
+    def _put(self, cache_key: tuple, entry: CachedBody):
+        with self._lock:
+            self._stats["build_cpu_seconds"] += entry.build_seconds
+            # Built against data a write has since replaced: serve, don't keep
+            if cache_key[0] != self.version or entry.size > self.max_bytes:
+                return
+            previous = self._entries.pop(cache_key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[cache_key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+            stats["version"] = self.version
+        stats["bytes_saved"] = stats["bytes_identity"] - stats["bytes_sent"]
+        return stats
+
+
+# Product listings: rebuilt after any catalog write
+catalog_responses = PrecompressedCache()
+change_bus.subscribe(
+    catalog_responses.invalidate, tables={"products", "product_categories"}
+)
@@ -1,9 +1,18 @@
 import os
+import random
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
 
+from app.config.authentication import get_current_user_id
+from app.config.metrics import POOL_WAIT_SECONDS, instrument_engine, register_collector
 from app.config.settings import settings
-from sqlalchemy import create_engine
+from fastapi import Depends
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import URL, Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
 
 # Database configuration
 DB_HOST = settings.db_host
@@ -12,29 +21,240 @@ DB_USER = settings.db_user
 DB_PASSWORD = settings.db_password
 DB_NAME = settings.db_name
 
-# Create database URL
-if DB_PASSWORD:
+# Create database URL: a full DATABASE_URL wins over the MySQL parts
+if settings.database_url:
+    DATABASE_URL = settings.database_url
+elif DB_PASSWORD:
     DATABASE_URL = (
         f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     )
 else:
     DATABASE_URL = f"mysql+pymysql://{DB_USER}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-# Create engine
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    echo=False,  # Set to True for SQL debugging
-)
+
+def _timed_pool(label: str):
+    """QueuePool that records how long each checkout waited for a slot."""
+
+    class TimedQueuePool(QueuePool):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                POOL_WAIT_SECONDS.observe(time.perf_counter() - started, label)
+
+    return TimedQueuePool
+
+
+def _ping_idle_connections(target: Engine, idle_seconds: float):
+    """Pre-ping only connections that sat idle for ``idle_seconds``; busy
+    connections skip the extra round-trip ``pool_pre_ping`` costs."""
+
+    @event.listens_for(target, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(target, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+        try:
+            cursor = dbapi_connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+        except Exception:
+            # The pool discards this connection and checks out another
+            raise exc.DisconnectionError()
+
+
+def sqlite_pragmas(foreign_keys: bool = True) -> List[str]:
+    """Per-connection SQLite tuning: WAL lets readers run alongside the one
+    writer, and synchronous=NORMAL is durable in WAL mode except for the
+    last commits before a power loss."""
+    return [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}",
+        f"PRAGMA cache_size=-{settings.sqlite_cache_size_kb}",
+        f"PRAGMA mmap_size={settings.sqlite_mmap_size_mb * 1024 * 1024}",
+        "PRAGMA temp_store=MEMORY",
+        f"PRAGMA foreign_keys={'ON' if foreign_keys else 'OFF'}",
+    ]
+
+
+def apply_sqlite_pragmas(target: Engine, foreign_keys: bool = True):
+    pragmas = sqlite_pragmas(foreign_keys)
+
+    @event.listens_for(target, "connect")
+    def _connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def create_sqlite_engine(url: URL, label: str) -> Engine:
+    # Sessions run on FastAPI's threadpool, hence check_same_thread
+    connect_args = {
+        "check_same_thread": False,
+        "timeout": settings.sqlite_busy_timeout_ms / 1000,
+    }
+    if url.database in (None, "", ":memory:"):
+        # One connection, so every session sees the same in-memory database
+        target = create_engine(url, poolclass=StaticPool, connect_args=connect_args)
+    else:
+        target = create_engine(
+            url,
+            poolclass=_timed_pool(label),
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            connect_args=connect_args,
+        )
+    apply_sqlite_pragmas(target)
+    instrument_engine(target)
+    return target
+
+
+def create_pooled_engine(url: str, label: str) -> Engine:
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        return create_sqlite_engine(url, label)
+
+    pre_ping = settings.db_pool_pre_ping
+    if pre_ping not in ("always", "idle", "never"):
+        raise ValueError(f"Unknown db_pool_pre_ping: {pre_ping}")
+
+    target = create_engine(
+        url,
+        poolclass=_timed_pool(label),
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=pre_ping == "always",
+        echo=False,  # Set to True for SQL debugging
+    )
+    if pre_ping == "idle":
+        _ping_idle_connections(target, settings.db_pool_ping_idle_seconds)
+    instrument_engine(target)
+    return target
+
+
+# Create engines: the primary takes every write, replicas serve reads
+engine = create_pooled_engine(DATABASE_URL, "primary")
+replica_engines: List[Engine] = [
+    create_pooled_engine(url, f"replica{i}")
+    for i, url in enumerate(
+        settings.db_replica_urls.split("|") if settings.db_replica_urls else []
+    )
+]
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Bound to a replica per session, see read_session()
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 # Base class for models
 Base = declarative_base()
 
 
+def pool_stats() -> Dict[str, dict]:
+    engines = {"primary": engine}
+    engines.update((f"replica{i}", r) for i, r in enumerate(replica_engines))
+    return {
+        label: {
+            "size": target.pool.size(),
+            "checked_out": target.pool.checkedout(),
+            "overflow": target.pool.overflow(),
+            "idle": target.pool.checkedin(),
+        }
+        for label, target in engines.items()
+        if isinstance(target.pool, QueuePool)  # not in-memory SQLite
+    }
+
+
+register_collector("db_pool", pool_stats)
+
+
+class ReadYourWrites:
+    """Users who just committed a write, read from the primary until their
+    window runs out so replica lag never hides their own changes.
+
+    Per process: with several workers, a user can still land on a worker
+    that didn't see the write, within the same window.
+    """
+
+    def __init__(self, window: float = settings.db_read_your_writes_seconds):
+        self.window = window
+        self._pinned: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def pin(self, user_ids: Iterable[int]):
+        deadline = time.monotonic() + self.window
+        with self._lock:
+            for user_id in user_ids:
+                self._pinned[user_id] = deadline
+
+    def is_pinned(self, user_id: int) -> bool:
+        with self._lock:
+            deadline = self._pinned.get(user_id)
+            if deadline is None:
+                return False
+            if deadline <= time.monotonic():
+                del self._pinned[user_id]
+                return False
+            return True
+
+
+read_your_writes = ReadYourWrites()
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_written_users(session, flush_context, instances):
+    if session.info.get("read_only"):
+        if session.new or session.dirty or session.deleted:
+            raise exc.InvalidRequestError("Read-only (replica) session can't write")
+        return
+    if not replica_engines or read_your_writes.window <= 0:
+        return
+
+    user_ids = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        user_id = getattr(obj, "user_id", None)
+        if user_id is None and getattr(obj, "__tablename__", None) == "users":
+            user_id = obj.id
+        if user_id is not None:
+            user_ids.add(user_id)
+    if user_ids:
+        session.info.setdefault("written_users", set()).update(user_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _pin_written_users(session):
+    user_ids = session.info.pop("written_users", None)
+    if user_ids:
+        read_your_writes.pin(user_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_written_users(session):
+    session.info.pop("written_users", None)
+
+
+def read_session(user_id: Optional[int] = None) -> Session:
+    """A session on a random replica, or on the primary when no replica is
+    configured or ``user_id`` wrote within the read-your-writes window."""
+    if not replica_engines or (
+        user_id is not None and read_your_writes.is_pinned(user_id)
+    ):
+        return SessionLocal()
+    db = ReadSessionLocal(bind=random.choice(replica_engines))
+    db.info["read_only"] = True
+    return db
+
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
@@ -42,3 +262,21 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Dependency for read-only routes that don't know the user (catalog)
+def get_read_db():
+    db = read_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# Dependency for a signed-in user's reads, honouring read-your-writes
+def get_user_read_db(user_id: int = Depends(get_current_user_id)):
+    db = read_session(user_id)
+    try:
+        yield db
+    finally:
+        db.close()
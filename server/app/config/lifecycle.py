@@ -0,0 +1,150 @@
+import logging
+import threading
+import time
+
+from app.config.database import SessionLocal, engine, replica_engines
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds before retrying failed warm-up steps, doubling up to the maximum
+WARMUP_RETRY_SECONDS = 2.0
+WARMUP_RETRY_MAX_SECONDS = 60.0
+
+
+class Readiness:
+    """What ``/ready`` reports: warm caches, and not draining for shutdown."""
+
+    def __init__(self):
+        self.warm = False
+        self.draining = False
+        self.reason = "warming up"
+        self._lock = threading.Lock()
+        self._drained = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self.warm and not self.draining
+
+    def mark_warm(self):
+        with self._lock:
+            self.warm = True
+            if not self.draining:
+                self.reason = "ready"
+
+    def mark_cold(self, reason: str):
+        with self._lock:
+            if not self.draining:
+                self.reason = reason
+
+    def begin_draining(self):
+        with self._lock:
+            self.draining = True
+            self.reason = "draining"
+        self._drained.set()
+
+    def wait_draining(self, timeout: float) -> bool:
+        """Sleep up to ``timeout``; True as soon as draining begins."""
+        return self._drained.wait(timeout)
+
+
+readiness = Readiness()
+
+
+def preload():
+    """Build the heavy, fork-safe state once in the master process so
+    prefork workers share it copy-on-write: the embedding model, the
+    intent centroids, the popularity and co-purchase arrays and, for the
+    in-memory vector store, the catalog index."""
+    from app.rag.embedder import embed_query, get_embeddings
+    from app.rag.intent_router import intent_router
+    from app.rag.retriever import get_product_retriever
+    from app.services.co_purchase import update_co_purchase
+    from app.services.popularity import refresh_popularity
+
+    started = time.perf_counter()
+    get_embeddings()
+    embed_query("warm up")
+    intent_router._load_centroids()
+    refresh_popularity()
+    update_co_purchase()
+    if settings.vector_store_type == "memory":
+        db = SessionLocal()
+        try:
+            get_product_retriever().ensure_indexed(db)
+        finally:
+            db.close()
+    # No pooled connection may be shared with the children
+    for target in (engine, *replica_engines):
+        target.dispose()
+    logger.info("Preloaded shared state in %.1f s", time.perf_counter() - started)
+
+
+def after_fork():
+    """Run first thing in a forked worker."""
+    # Connections inherited from the master belong to it; drop them
+    # without closing the master's sockets
+    for target in (engine, *replica_engines):
+        target.dispose(close=False)
+
+
+def _with_db(step):
+    def run():
+        db = SessionLocal()
+        try:
+            step(db)
+        finally:
+            db.close()
+
+    return run
+
+
+def _warm_up_steps():
+    from app.rag.embedder import embed_query
+    from app.rag.intent_router import intent_router
+    from app.rag.retriever import get_product_retriever
+    from app.services.co_purchase import co_purchase_index
+    from app.services.popularity import popularity_index
+
+    def index_products(db):
+        get_product_retriever().ensure_indexed(db)
+
+    def load_popularity(db):
+        if popularity_index.loaded_at is None:
+            popularity_index.load(db)
+
+    return {
+        "embedding": lambda: embed_query("warm up"),
+        "intent_router": intent_router._load_centroids,
+        "product_index": _with_db(index_products),
+        "popularity": _with_db(load_popularity),
+        # Catches up from where the master's build stopped
+        "co_purchase": _with_db(co_purchase_index.update),
+    }
+
+
+def warm_worker():
+    """Per-process warm-up: whatever ``preload`` didn't (or couldn't, like
+    a Chroma client's SQLite handle) build before the fork. Each step runs
+    on its own, so one failure doesn't skip the rest; failed steps are
+    retried with backoff, and the worker is marked ready only once every
+    step has succeeded (or gives up when it starts draining)."""
+    started = time.perf_counter()
+    pending = _warm_up_steps()
+    delay = WARMUP_RETRY_SECONDS
+    while True:
+        for name, step in list(pending.items()):
+            try:
+                step()
+            except Exception:
+                logger.exception("Warm-up step %s failed", name)
+            else:
+                del pending[name]
+        if not pending:
+            break
+        readiness.mark_cold(f"warming up (retrying {', '.join(pending)})")
+        if readiness.wait_draining(delay):
+            return
+        delay = min(delay * 2, WARMUP_RETRY_MAX_SECONDS)
+    readiness.mark_warm()
+    logger.info("Worker warm in %.1f s", time.perf_counter() - started)
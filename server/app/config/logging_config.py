@@ -0,0 +1,162 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+
+from app.config.settings import settings
+
+# Argument types that can't change between the log call and the background
+# write, so formatting them can be deferred safely
+_IMMUTABLE = (str, int, float, bool, type(None), bytes)
+
+# Attributes every LogRecord has; anything else came in through ``extra=``
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; ``extra=`` fields are kept as keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Hands records to the background listener without formatting them.
+
+    ``QueueHandler.prepare`` would render the message (and traceback) on
+    the calling thread; here that only happens when an argument is mutable
+    and could change before the listener gets to it.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if args and not (
+            isinstance(args, tuple) and all(isinstance(a, _IMMUTABLE) for a in args)
+        ):
+            record.msg, record.args = record.getMessage(), None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """Rate-limits repetitive records below ERROR.
+
+    Each (logger, message template) may log ``burst`` records per
+    ``window`` seconds; past that only every ``every``-th record gets
+    through, carrying a ``sampled_out`` count of the ones dropped. A
+    failed-login storm becomes a trickle of log lines instead of one per
+    request.
+    """
+
+    def __init__(
+        self,
+        burst: int = settings.log_sample_burst,
+        window: float = settings.log_sample_window,
+        every: int = settings.log_sample_every,
+    ):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.every = every
+        # key -> [window start, records in window, dropped since last pass]
+        self._seen: Dict[Tuple[str, str], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR or self.burst <= 0:
+            return True
+        key = (record.name, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            state = self._seen.get(key)
+            if state is None or now - state[0] >= self.window:
+                dropped = state[2] if state else 0
+                state = self._seen[key] = [now, 0, 0]
+                if len(self._seen) > 10_000:
+                    self._seen = {key: state}
+                if dropped:
+                    record.sampled_out = dropped
+            state[1] += 1
+            if state[1] <= self.burst:
+                return True
+            if (state[1] - self.burst) % self.every:
+                state[2] += 1
+                return False
+            record.sampled_out, state[2] = state[2], 0
+        return True
+
+
+_listener: Optional[QueueListener] = None
+_listener_args: Optional[tuple] = None
+
+
+def _start_listener():
+    global _listener
+    if _listener_args is not None and _listener is None:
+        _listener = QueueListener(*_listener_args, respect_handler_level=True)
+        _listener.start()
+
+
+def configure_logging():
+    """Route all logging through a queue to one background writer thread.
+
+    Request threads only enqueue records; formatting (JSON by default) and
+    the write to stderr happen on the listener thread. Safe to call more
+    than once, and across ``os.fork()``: the thread is stopped before a
+    fork and restarted on both sides.
+    """
+    global _listener_args
+    if _listener_args is not None:
+        return
+
+    output = logging.StreamHandler(sys.stderr)
+    if settings.log_format == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        )
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(records)
+    handler.addFilter(SamplingFilter())
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(settings.log_level.upper())
+
+    _listener_args = (records, output)
+    _start_listener()
+    atexit.register(stop_logging)
+    os.register_at_fork(
+        before=stop_logging,
+        after_in_parent=_start_listener,
+        after_in_child=_start_listener,
+    )
+
+
+def stop_logging():
+    """Flush whatever is still queued; called at shutdown and before forks."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
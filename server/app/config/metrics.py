@@ -0,0 +1,314 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.config.settings import settings
+from sqlalchemy import event
+
+# Seconds; tuned for API latencies from sub-millisecond cache hits up to
+# multi-second LLM turns
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+# Seconds; background jobs run from milliseconds to many minutes
+JOB_BUCKETS = (0.01, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """Minimal Prometheus metric: one lock, label values -> state."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = labels
+        self._values: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [
+            f"{self.name}{_labels(self.label_names, labels)} {value}"
+            for labels, value in values
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                state = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = [(k, (list(v[0]), v[1], v[2])) for k, v in self._values.items()]
+        lines = []
+        for labels, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                le = _labels(self.label_names, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _labels(self.label_names, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total}")
+            lines.append(
+                f"{self.name}_count{_labels(self.label_names, labels)} {count}"
+            )
+        return lines
+
+
+REGISTRY: List[Metric] = []
+# Callables returning ``{name: value}`` (or one level of nested dicts)
+# exported as gauges at scrape time: cache hit rates, coalescing counters...
+COLLECTORS: Dict[str, Callable[[], dict]] = {}
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route and status.",
+    ("method", "route", "status"),
+)
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency.", ("method", "route")
+)
+IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being served.")
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per HTTP request.",
+    ("route",),
+    buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent in SQL per HTTP request.", ("route",)
+)
+POOL_WAIT_SECONDS = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a pooled DB connection.",
+    ("pool",),
+)
+STAGE_SECONDS = Histogram(
+    "stage_duration_seconds",
+    "Time per pipeline stage (llm, retrieval, embedding, tool).",
+    ("stage",),
+)
+JOB_SECONDS = Histogram(
+    "job_duration_seconds", "Background job run time.", ("job",), buckets=JOB_BUCKETS
+)
+JOB_RUNS = Counter(
+    "job_runs_total",
+    "Background job runs by outcome (ok, failed, cancelled, skipped, "
+    "lease_held, dropped).",
+    ("job", "outcome"),
+)
+JOBS_RUNNING = Gauge("jobs_running", "Background jobs running now.", ("job",))
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total",
+    "Requests turned away by admission control (overloaded, per_user).",
+    ("route_class", "reason"),
+)
+
+
+def register_collector(prefix: str, collect: Callable[[], dict]):
+    COLLECTORS[prefix] = collect
+
+
+def _flatten(prefix: str, stats: dict):
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            yield from _flatten(f"{prefix}_{key}", value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield f"{prefix}_{key}", value
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.header())
+        lines.extend(metric.render())
+    for prefix, collect in COLLECTORS.items():
+        for name, value in _flatten(prefix, collect()):
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class RequestTimings:
+    """Everything one request spent its time on, for ``Server-Timing``.
+
+    Shared by reference with the threads a request hands work to, hence the
+    lock.
+    """
+
+    __slots__ = ("db_queries", "db_seconds", "stages", "_lock")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.stages: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def add_query(self, seconds: float):
+        with self._lock:
+            self.db_queries += 1
+            self.db_seconds += seconds
+
+    def add_stage(self, stage: str, seconds: float):
+        with self._lock:
+            totals = self.stages.setdefault(stage, [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+
+    def server_timing(self, total_seconds: float) -> str:
+        with self._lock:
+            entries = [f"total;dur={total_seconds * 1000:.1f}"]
+            if self.db_queries:
+                db_ms = self.db_seconds * 1000
+                entries.append(f'db;dur={db_ms:.1f};desc="{self.db_queries} queries"')
+            for stage, (count, seconds) in self.stages.items():
+                entries.append(f'{stage};dur={seconds * 1000:.1f};desc="{count} calls"')
+        return ", ".join(entries)
+
+
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "current_timings", default=None
+)
+
+
+@contextmanager
+def timed(stage: str):
+    """Time a pipeline stage into its histogram and the current request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage)
+        timings = current_timings.get()
+        if timings is not None:
+            timings.add_stage(stage, elapsed)
+
+
+def instrument_engine(target):
+    """Charge every SQL statement run on ``target`` to the current request."""
+
+    @event.listens_for(target, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, params, context, many):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(target, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, params, context, many):
+        started = conn.info["query_started"].pop()
+        timings = current_timings.get()
+        if timings is not None:
+            timings.add_query(time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (streaming-safe, no per-request task) recording
+    latency, in-flight requests and per-request SQL, and adding a
+    ``Server-Timing`` header to every response."""
+
+    def __init__(self, app, server_timing: bool = settings.server_timing_enabled):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        status = 500
+        IN_FLIGHT.inc()
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    header = timings.server_timing(time.perf_counter() - started)
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"server-timing", header.encode("latin-1")),
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            IN_FLIGHT.dec()
+            current_timings.reset(token)
+            elapsed = time.perf_counter() - started
+            # Route templates, not raw paths, keep label cardinality bounded
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            REQUESTS.inc(method, route, str(status))
+            REQUEST_SECONDS.observe(elapsed, method, route)
+            REQUEST_DB_QUERIES.observe(timings.db_queries, route)
+            REQUEST_DB_SECONDS.observe(timings.db_seconds, route)
@@ -0,0 +1,277 @@
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Set
+
+from app.config.database import SessionLocal
+from app.config.metrics import JOB_RUNS, JOB_SECONDS, JOBS_RUNNING
+from app.config.settings import settings
+from app.models.job_model import JobLease
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+
+def acquire_lease(name: str, owner: str, seconds: float) -> bool:
+    """Take or extend the ``job_leases`` row for ``name``; False while
+    another owner holds an unexpired lease. Hosts' clocks need only agree
+    to well within ``seconds``."""
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=seconds)
+    db = SessionLocal()
+    try:
+        taken = db.execute(
+            update(JobLease)
+            .where(
+                JobLease.name == name,
+                or_(JobLease.owner == owner, JobLease.expires_at <= now),
+            )
+            .values(owner=owner, expires_at=expires_at)
+        ).rowcount
+        if not taken:
+            if db.get(JobLease, name) is not None:
+                db.rollback()
+                return False
+            db.add(JobLease(name=name, owner=owner, expires_at=expires_at))
+        db.commit()
+        return True
+    except IntegrityError:
+        # Another process created the row first
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+
+def release_lease(name: str, owner: str):
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(JobLease)
+            .where(JobLease.name == name, JobLease.owner == owner)
+            .values(expires_at=datetime.utcnow())
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+class Job:
+    def __init__(
+        self,
+        name: str,
+        func: Callable,
+        every: Optional[float],
+        concurrency: int,
+        singleton: bool,
+        lease_seconds: Optional[float],
+        max_pending: int,
+    ):
+        self.name = name
+        self.func = func
+        self.every = every
+        self.singleton = singleton
+        # Outlives the interval, so the holder renews it on its next tick
+        # and others take over only once it stops doing so
+        self.lease_seconds = lease_seconds or (every * 1.5 if every else 60.0)
+        self.max_pending = max_pending
+        self.is_async = inspect.iscoroutinefunction(func)
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.pending: Set[tuple] = set()  # queued argument tuples
+
+
+class Scheduler:
+    """Background jobs for one process, run on its event loop.
+
+    Coroutine jobs run on the loop; plain functions (anything touching the
+    database or the LLM) on a small thread pool. A job runs every ``every``
+    seconds and/or on demand through ``submit``, at most ``concurrency``
+    runs at a time; a tick that finds the job still busy is skipped.
+    ``singleton`` jobs first take a lease in ``job_leases``, so one process
+    across all workers and hosts runs them.
+    """
+
+    def __init__(self, thread_workers: int = settings.job_thread_workers):
+        self.thread_workers = thread_workers
+        self.jobs: Dict[str, Job] = {}
+        self.owner: Optional[str] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._timers = []
+        self._tasks: Set[asyncio.Task] = set()
+        self._held: Set[str] = set()
+        self._stopping = False
+
+    def register(
+        self,
+        name: str,
+        func: Callable,
+        every: Optional[float] = None,
+        concurrency: int = 1,
+        singleton: bool = False,
+        lease_seconds: Optional[float] = None,
+        max_pending: int = 1000,
+    ):
+        if name in self.jobs:
+            raise ValueError(f"Job already registered: {name}")
+        self.jobs[name] = Job(
+            name, func, every, concurrency, singleton, lease_seconds, max_pending
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None and not self._stopping
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopping = False
+        # Per process, so set after any fork
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._executor = ThreadPoolExecutor(
+            self.thread_workers, thread_name_prefix="job"
+        )
+        for job in self.jobs.values():
+            if job.every:
+                self._timers.append(asyncio.create_task(self._every(job)))
+        logger.info("Scheduler started with %d jobs", len(self.jobs))
+
+    def submit(self, name: str, *args) -> bool:
+        """Queue one run of ``name`` with ``args`` (hashable); a run already
+        queued with the same args covers this one. Thread-safe. False when
+        the scheduler isn't running, so the caller can do the work itself."""
+        if not self.running:
+            return False
+        job = self.jobs[name]
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is self._loop:
+            self._enqueue(job, args)
+        else:
+            self._loop.call_soon_threadsafe(self._enqueue, job, args)
+        return True
+
+    def _enqueue(self, job: Job, args: tuple):
+        if args in job.pending:
+            return
+        if self._stopping or len(job.pending) >= job.max_pending:
+            JOB_RUNS.inc(job.name, "dropped")
+            return
+        job.pending.add(args)
+        self._spawn(self._run(job, args))
+
+    def _spawn(self, coro):
+        task = self._loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _every(self, job: Job):
+        # Spread the first runs of workers that started together
+        await asyncio.sleep(random.uniform(0, min(job.every, 10.0)))
+        while True:
+            if job.semaphore.locked():
+                JOB_RUNS.inc(job.name, "skipped")
+            else:
+                self._spawn(self._run(job, ()))
+            await asyncio.sleep(job.every)
+
+    async def _run(self, job: Job, args: tuple):
+        async with job.semaphore:
+            job.pending.discard(args)
+            if self._stopping:
+                JOB_RUNS.inc(job.name, "dropped")
+                return
+            if job.singleton and not await self._acquire(job):
+                JOB_RUNS.inc(job.name, "lease_held")
+                return
+
+            renew = self._loop.create_task(self._renew(job)) if job.singleton else None
+            JOBS_RUNNING.inc(job.name)
+            started = time.perf_counter()
+            outcome = "failed"
+            try:
+                if job.is_async:
+                    await job.func(*args)
+                else:
+                    await self._loop.run_in_executor(
+                        self._executor, functools.partial(job.func, *args)
+                    )
+                outcome = "ok"
+            except asyncio.CancelledError:
+                outcome = "cancelled"
+                raise
+            except Exception:
+                logger.exception("Job %s failed", job.name)
+            finally:
+                if renew is not None:
+                    renew.cancel()
+                JOBS_RUNNING.dec(job.name)
+                JOB_SECONDS.observe(time.perf_counter() - started, job.name)
+                JOB_RUNS.inc(job.name, outcome)
+
+    async def _acquire(self, job: Job) -> bool:
+        try:
+            acquired = await self._loop.run_in_executor(
+                self._executor, acquire_lease, job.name, self.owner, job.lease_seconds
+            )
+        except Exception:
+            logger.exception("Lease for job %s unavailable", job.name)
+            return False
+        if acquired:
+            self._held.add(job.name)
+        else:
+            self._held.discard(job.name)
+        return acquired
+
+    async def _renew(self, job: Job):
+        """Keep the lease while a run outlasts it."""
+        while True:
+            await asyncio.sleep(job.lease_seconds / 3)
+            if not await self._acquire(job):
+                logger.warning("Job %s lost its lease while running", job.name)
+                return
+
+    async def stop(self, timeout: float = settings.job_shutdown_seconds):
+        """Stop scheduling, give running jobs ``timeout`` seconds, cancel the
+        rest, and hand singleton leases back so another worker takes over."""
+        if self._loop is None:
+            return
+        self._stopping = True
+        for timer in self._timers:
+            timer.cancel()
+        self._timers = []
+
+        if self._tasks:
+            _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+            if pending:
+                # Thread jobs can't be interrupted; their threads are abandoned
+                logger.warning("Cancelling %d jobs still running", len(pending))
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        for name in list(self._held):
+            try:
+                await self._loop.run_in_executor(
+                    self._executor, release_lease, name, self.owner
+                )
+            except Exception:
+                logger.exception("Could not release lease for job %s", name)
+        self._held.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._loop = None
+        logger.info("Scheduler stopped")
+
+
+scheduler = Scheduler()
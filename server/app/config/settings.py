@@ -11,6 +11,28 @@ class Settings(BaseSettings):
     db_name: Optional[str] = None
     debug: bool = False
 
+    # Full SQLAlchemy URL, overriding the db_* parts (MySQL) above. SQLite
+    # (sqlite:///path.db, or sqlite:// in memory for tests) runs in WAL mode
+    # with these busy timeout, page cache and mmap sizes
+    database_url: Optional[str] = None
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kb: int = 65536
+    sqlite_mmap_size_mb: int = 256
+
+    # Connection pool; pre-ping: always, idle (after db_pool_ping_idle_seconds
+    # unused) or never
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0  # seconds to wait for a free connection
+    db_pool_recycle: int = 3600
+    db_pool_pre_ping: str = "idle"
+    db_pool_ping_idle_seconds: float = 30.0
+
+    # Read replicas ("|"-separated SQLAlchemy URLs); users who just wrote
+    # read from the primary for db_read_your_writes_seconds
+    db_replica_urls: Optional[str] = None
+    db_read_your_writes_seconds: float = 5.0
+
     # LLM Configuration
     llm_provider: str = "openrouter"  # Default provider
     openai_api_key: Optional[str] = None
@@ -37,6 +59,137 @@ class Settings(BaseSettings):
     chroma_db_path: Optional[str] = None
     chroma_collection_name: Optional[str] = None
 
+    # Agent tool execution
+    agent_max_steps: int = 4
+    agent_tool_timeout: float = 10.0  # seconds, per tool call
+    agent_tool_workers: int = 8  # threads for blocking (DB-bound) tools
+
+    # Intent router: skip the LLM for simple, confidently classified turns
+    intent_router_enabled: bool = True
+    intent_router_threshold: float = 0.8
+
+    # Prompt assembly: tiktoken encoding and per-section token budgets
+    prompt_tokenizer: str = "cl100k_base"
+    prompt_budget_system: int = 400
+    prompt_budget_memory: int = 1500
+    prompt_budget_products: int = 1200
+    prompt_budget_tools: int = 1500
+
+    # Semantic response cache
+    semantic_cache_enabled: bool = True
+    semantic_cache_threshold: float = 0.92
+    semantic_cache_ttl: float = 3600.0  # seconds
+    semantic_cache_max_entries: int = 5000
+
+    # Latest-order status cache: seconds an entry lives, bounding how stale
+    # a worker can be after another process's write it wasn't told about
+    order_status_cache_ttl: float = 30.0
+
+    # Conversation memory: turns kept verbatim, older ones are summarized
+    memory_window_turns: int = 6
+    memory_summary_max_chars: int = 2000
+
+    # Production server (serve.py): worker processes (0 = one per CPU),
+    # seconds /ready reports draining before a worker stops accepting, and
+    # seconds in-flight requests then get to finish
+    server_workers: int = 0
+    shutdown_drain_seconds: float = 5.0
+    shutdown_grace_seconds: float = 30.0
+
+    # Background jobs: threads for blocking jobs, seconds running jobs get
+    # at shutdown, schedules in seconds (0 = off) and how many conversation
+    # summaries are rolled up at once
+    jobs_enabled: bool = True
+    job_thread_workers: int = 4
+    job_shutdown_seconds: float = 20.0
+    job_token_cleanup_seconds: float = 3600.0
+    job_product_reindex_seconds: float = 30.0
+    job_cache_refresh_seconds: float = 300.0
+    job_summary_concurrency: int = 2
+
+    # Change events: also write committed change sets to change_outbox,
+    # tailed by every process (seconds between polls) and kept for
+    # change_outbox_retention_seconds
+    change_outbox_enabled: bool = False
+    change_outbox_poll_seconds: float = 2.0
+    change_outbox_retention_seconds: float = 86400.0
+
+    # Popularity ranking: units sold decay with a half-life in days; search
+    # over-fetches candidates_factor x k results and blends similarity with
+    # popularity by weight; sold-out products' scores are multiplied by
+    # sold_out_factor. Seconds between folding in new order items (one
+    # process) and between reloads of each process's in-memory arrays
+    popularity_weight: float = 0.3
+    popularity_half_life_days: float = 14.0
+    popularity_sold_out_factor: float = 0.5
+    popularity_candidates_factor: int = 3
+    popularity_update_seconds: float = 300.0
+    popularity_refresh_seconds: float = 60.0
+
+    # Frequently bought together: neighbours kept per product, orders with
+    # more distinct products than max_basket skipped, seconds between
+    # catching up with new order items (each process keeps its own index)
+    # and between full recounts, which pick up items committed out of id
+    # order
+    co_purchase_top_k: int = 20
+    co_purchase_max_basket: int = 50
+    co_purchase_update_seconds: float = 60.0
+    co_purchase_recount_seconds: float = 3600.0
+
+    # Admission control per route class (auth = password hashing, chat =
+    # LLM turns, catalog = product reads): a concurrency limit, up to the
+    # class maximum, that grows while requests answer within the target and
+    # is multiplied by admission_backoff when any class misses its target
+    # (chat first, then auth, catalog last). Requests over it wait at most
+    # admission_queue_ms, then get 503; a user past admission_chat_per_user
+    # concurrent chat turns gets 429
+    admission_enabled: bool = True
+    admission_auth_limit: int = 8
+    admission_auth_target_ms: float = 1000.0
+    admission_chat_limit: int = 32
+    admission_chat_target_ms: float = 10000.0
+    admission_catalog_limit: int = 64
+    admission_catalog_target_ms: float = 250.0
+    admission_backoff: float = 0.75
+    admission_queue_ms: float = 1000.0
+    admission_chat_per_user: int = 2
+
+    # Response compression: responses of at least compression_min_bytes are
+    # gzip/brotli-compressed on the fly at these levels; product listings
+    # are cached already compressed (at the maximum levels) up to
+    # compression_cache_max_mb, until a catalog write or the TTL
+    compression_enabled: bool = True
+    compression_min_bytes: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    compression_cache_max_mb: float = 64.0
+    compression_cache_ttl_seconds: float = 300.0
+
+    # Logging: json or text, written by a background thread; repetitive
+    # records past the burst are sampled 1-in-every
+    log_level: str = "INFO"
+    log_format: str = "json"
+    log_sample_burst: int = 20
+    log_sample_window: float = 10.0  # seconds
+    log_sample_every: int = 100
+    log_body_max_bytes: int = 2048
+
+    # Observability: /metrics endpoint and Server-Timing response header
+    metrics_enabled: bool = True
+    server_timing_enabled: bool = True
+
+    # SQL profiling (opt-in): slow-query log and per-request N+1 detection
+    sql_profiling_enabled: bool = False
+    sql_slow_query_ms: float = 100.0
+    sql_n_plus_one_threshold: int = 5  # same statement shape per request
+
+    # Payment gateway / courier callbacks: ones whose payment or shipment
+    # row doesn't exist yet (or whose flush failed) are retried every
+    # retry_seconds and dropped after unmatched_ttl_seconds
+    status_webhook_secret: Optional[str] = None
+    status_event_retry_seconds: float = 30.0
+    status_event_unmatched_ttl_seconds: float = 3600.0
+
     def embadding_model(self):
         return self.huggingface_embedding_model
 
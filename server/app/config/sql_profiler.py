@@ -0,0 +1,191 @@
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.config.database import Base, engine, replica_engines
+from app.config.settings import settings
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+_THIS_FILE = str(Path(__file__).resolve())
+APP_ROOT = str(Path(_THIS_FILE).parent.parent)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDERS = re.compile(r"%\([^)]*\)s|%s|:\w+|\?")
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+# How the ORM's lazy loaders filter: "WHERE ? = orders.user_id" (one-to-many)
+# or "WHERE users.id = ?" (many-to-one)
+_LAZY_FILTER = re.compile(r"WHERE \? = (\w+)\.(\w+)|WHERE (\w+)\.(\w+) = \?")
+
+
+def statement_shape(statement: str) -> str:
+    """The statement with literals, placeholders and IN-lists collapsed, so
+    the same query run with different values groups together."""
+    shape = _PLACEHOLDERS.sub("?", statement)
+    shape = _LITERALS.sub("?", shape)
+    shape = _IN_LISTS.sub("(?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+def param_types(params, many: bool = False) -> str:
+    """Bound parameters as their types only: values can be password hashes
+    or tokens, which must not reach the logs."""
+    if many:
+        rows = list(params or ())
+        first = param_types(rows[0]) if rows else "()"
+        return f"{first} x {len(rows)}"
+    if isinstance(params, dict):
+        return "{%s}" % ", ".join(
+            f"{key}: {type(value).__name__}" for key, value in params.items()
+        )
+    return "(%s)" % ", ".join(type(value).__name__ for value in params or ())
+
+
+def call_site() -> str:
+    """Innermost application frame outside this module: the line that
+    issued (or lazily triggered) the query."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(APP_ROOT) and filename != _THIS_FILE:
+            path = filename[len(APP_ROOT) - len("app") :]
+            return f"{path}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "<outside app>"
+
+
+def relationship_hint(shape: str) -> Optional[str]:
+    """The ``Model.relationship`` (or candidates) whose lazy loader issues a
+    statement of this shape, e.g. ``User.orders`` for
+    ``... WHERE ? = orders.user_id``."""
+    match = _LAZY_FILTER.search(shape)
+    if match is None:
+        return None
+    table, column = [group for group in match.groups() if group]
+    candidates = [
+        f"{mapper.class_.__name__}.{prop.key}"
+        for mapper in Base.registry.mappers
+        for prop in mapper.relationships
+        if any(
+            getattr(c, "table", None) is not None
+            and c.table.name == table
+            and c.name == column
+            for c in prop.remote_side
+        )
+    ]
+    return " or ".join(sorted(candidates)) or None
+
+
+class QueryProfile:
+    """Statement shapes seen during one request (or one ``profile()`` block)."""
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+        self.sites: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def add(self, shape: str, threshold: int):
+        with self._lock:
+            self.counts[shape] += 1
+            repeated = self.counts[shape] == threshold
+        if repeated:
+            # Captured on the repeat, so it points into the loop
+            self.sites[shape] = call_site()
+
+    def repeated(self, threshold: int) -> List[dict]:
+        with self._lock:
+            counts = list(self.counts.items())
+        return [
+            {
+                "count": count,
+                "statement": shape,
+                "site": self.sites.get(shape, "?"),
+                "relationship": relationship_hint(shape),
+            }
+            for shape, count in sorted(counts, key=lambda item: -item[1])
+            if count >= threshold
+        ]
+
+    def report(self, label: str, threshold: int = settings.sql_n_plus_one_threshold):
+        for suspect in self.repeated(threshold):
+            logger.warning(
+                "Possible N+1 in %s: %d x %s at %s%s",
+                label,
+                suspect["count"],
+                suspect["statement"][:300],
+                suspect["site"],
+                f" (lazy load of {suspect['relationship']})"
+                if suspect["relationship"]
+                else "",
+            )
+
+
+current_profile: ContextVar[Optional[QueryProfile]] = ContextVar(
+    "current_profile", default=None
+)
+
+
+def profile_engine(target, slow_ms: float = settings.sql_slow_query_ms):
+    """Log statements slower than ``slow_ms`` with parameter types and call site,
+    and feed statement shapes to the current ``QueryProfile``."""
+
+    @event.listens_for(target, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, params, context, many):
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+    @event.listens_for(target, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, params, context, many):
+        started = conn.info["profile_started"].pop()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        query_profile = current_profile.get()
+        if query_profile is not None:
+            shape = statement_shape(statement)
+            query_profile.add(shape, settings.sql_n_plus_one_threshold)
+        if elapsed_ms >= slow_ms:
+            logger.warning(
+                "Slow query (%.1f ms) at %s: %s | params=%.500s",
+                elapsed_ms,
+                call_site(),
+                _WHITESPACE.sub(" ", statement),
+                param_types(params, many),
+            )
+
+
+@contextmanager
+def profile(label: str):
+    """Group the queries run inside the block and report repeated shapes."""
+    query_profile = QueryProfile()
+    token = current_profile.set(query_profile)
+    try:
+        yield query_profile
+    finally:
+        current_profile.reset(token)
+        query_profile.report(label)
+
+
+class SQLProfilerMiddleware:
+    """One ``QueryProfile`` per HTTP request; suspected N+1 patterns are
+    logged when the request finishes."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        with profile(f"{scope['method']} {scope['path']}"):
+            await self.app(scope, receive, send)
+
+
+if settings.sql_profiling_enabled:
+    for target in (engine, *replica_engines):
+        profile_engine(target)
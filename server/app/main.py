@@ -1,24 +1,63 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 
+from app.config.admission import AdmissionMiddleware, admission
+from app.config.change_bus import change_bus
+from app.config.compression import (
+    CompressionMiddleware,
+    catalog_responses,
+    compression_stats,
+)
+from app.config.lifecycle import readiness, warm_worker
+from app.config.logging_config import configure_logging
+from app.config.metrics import MetricsMiddleware, register_collector, render_metrics
+from app.config.scheduler import scheduler
+from app.config.settings import settings
+from app.config.sql_profiler import SQLProfilerMiddleware
+from app.rag.intent_router import intent_router
+from app.rag.semantic_cache import semantic_cache
+from app.rag.single_flight import single_flight_stats
 from app.routers.routes import api_router
+from app.services.co_purchase import co_purchase_index
+from app.services.maintenance_jobs import register_maintenance_jobs
+from app.services.popularity import popularity_index
 from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # from .routes import auth, products, orders, chat, cart
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm caches in the background: /health answers at once, /ready only
+    # once this is done
+    app.state.warmup = asyncio.create_task(run_in_threadpool(warm_worker))
+    if settings.jobs_enabled:
+        await scheduler.start()
+    yield
+    readiness.begin_draining()
+    await scheduler.stop()
+
+
 def create_app() -> FastAPI:
     app = FastAPI(
         title="API Testing Tool",
         description="-",
         version="0.2.0",
+        lifespan=lifespan,
     )
 
+    # Inside CORS, so browsers can read the 503/429 rejections
+    if settings.admission_enabled:
+        app.add_middleware(AdmissionMiddleware)
+
     # ✅ CORS properly configure
     allowed_origins = ["*"]
 
@@ -31,18 +70,39 @@ def create_app() -> FastAPI:
         max_age=600,
     )
 
+    # Outside CORS, so its headers are set before the body is compressed
+    if settings.compression_enabled:
+        app.add_middleware(CompressionMiddleware)
+
+    if settings.sql_profiling_enabled:
+        app.add_middleware(SQLProfilerMiddleware)
+
+    # Outermost, so latency includes CORS and error handling
+    if settings.metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
+
     # Custom exception handler for validation errors
     @app.exception_handler(RequestValidationError)
     async def validation_exception_handler(
         request: Request, exc: RequestValidationError
     ):
-        logger.error(f"❌ Validation Error: {exc.errors()}")
-        logger.error(f"   Request body: {await request.body()}")
+        # Read once; only a capped prefix goes to the log
+        body = await request.body()
+        logger.error(
+            "Validation error on %s %s: %s | body=%r",
+            request.method,
+            request.url.path,
+            exc.errors(),
+            body[: settings.log_body_max_bytes],
+        )
         return JSONResponse(
             status_code=422,
-            content={"detail": exc.errors(), "body": str(await request.body())},
+            content={"detail": exc.errors(), "body": str(body)},
         )
 
+    if settings.jobs_enabled:
+        register_maintenance_jobs()
+
     # Include routers
     app.include_router(api_router)
 
@@ -51,6 +111,33 @@ def create_app() -> FastAPI:
     def health_check():
         return {"status": "✅ Server is running"}
 
+    # Readiness probe: 503 while warming up or draining for shutdown
+    @app.get("/ready")
+    def ready_check():
+        if not readiness.ready:
+            return JSONResponse(status_code=503, content={"status": readiness.reason})
+        return {"status": "ready"}
+
+    if settings.metrics_enabled:
+        register_collector("semantic_cache", semantic_cache.stats)
+        register_collector("intent_router", intent_router.stats)
+        register_collector("single_flight", single_flight_stats)
+        register_collector("change_bus", change_bus.stats)
+        register_collector("popularity", popularity_index.stats)
+        register_collector("co_purchase", co_purchase_index.stats)
+        if settings.admission_enabled:
+            register_collector("admission", admission.stats)
+        register_collector("catalog_responses", catalog_responses.stats)
+        if settings.compression_enabled:
+            register_collector("compression", compression_stats.stats)
+
+        # Prometheus text exposition format
+        @app.get("/metrics", include_in_schema=False)
+        def metrics():
+            return PlainTextResponse(
+                render_metrics(), media_type="text/plain; version=0.0.4"
+            )
+
     return app
 
 
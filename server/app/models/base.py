@@ -1,4 +1,7 @@
 from app.config.database import Base
+from app.models.conversation_model import *
+from app.models.job_model import *
+from app.models.outbox_model import *
 from app.models.payment_model import *
 from app.models.product_model import *
 
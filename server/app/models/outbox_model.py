@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from app.config.database import Base
+from sqlalchemy import DateTime, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class ChangeOutbox(Base):
+    """Committed change sets, written in the same transaction, for other
+    processes and nodes to tail."""
+
+    __tablename__ = "change_outbox"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    origin: Mapped[str] = mapped_column(String(255), nullable=False)
+    changes: Mapped[str] = mapped_column(Text, nullable=False)  # ChangeSet JSON
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False, index=True
+    )
@@ -2,7 +2,15 @@ from datetime import datetime
 
 from app.config.database import Base
 from app.models.product_model import Order
-from sqlalchemy import DECIMAL, TIMESTAMP, Column, ForeignKey, Integer, String
+from sqlalchemy import (
+    DECIMAL,
+    TIMESTAMP,
+    Column,
+    ForeignKey,
+    Integer,
+    String,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import relationship
 
 
@@ -10,13 +18,13 @@ class Payment(Base):
     __tablename__ = "payments"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
 
     amount = Column(DECIMAL(10, 2))
     payment_method = Column(String(50))  # card, upi, netbanking
     status = Column(String(50))  # pending, success, failed
 
-    transaction_id = Column(String(255))  # from Razorpay/Stripe
+    transaction_id = Column(String(255), index=True)  # from Razorpay/Stripe
     created_at = Column(TIMESTAMP, default=datetime.utcnow)
 
     order = relationship("Order", back_populates="payments")
@@ -26,7 +34,7 @@ class Shipment(Base):
     __tablename__ = "shipments"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
 
     address = Column(String(255))
     city = Column(String(100))
@@ -35,9 +43,24 @@ class Shipment(Base):
     country = Column(String(100))
 
     status = Column(String(50))  # pending, shipped, delivered
-    tracking_number = Column(String(255))
+    tracking_number = Column(String(255), index=True)
 
     shipped_at = Column(TIMESTAMP, nullable=True)
     delivered_at = Column(TIMESTAMP, nullable=True)
 
     order = relationship("Order", back_populates="shipments")
+
+
+class StatusEvent(Base):
+    """Gateway/courier callbacks already applied, so retries are no-ops."""
+
+    __tablename__ = "status_events"
+    __table_args__ = (
+        UniqueConstraint("kind", "reference", "status", name="uq_status_events_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(20), nullable=False)  # payment, shipment
+    reference = Column(String(255), nullable=False)  # transaction_id / tracking_number
+    status = Column(String(50), nullable=False)
+    created_at = Column(TIMESTAMP, default=datetime.utcnow)
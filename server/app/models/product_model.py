@@ -1,7 +1,18 @@
 from datetime import datetime
 
 from app.config.database import Base
-from sqlalchemy import DECIMAL, TIMESTAMP, Column, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    DECIMAL,
+    TIMESTAMP,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
 from sqlalchemy.orm import declarative_base, relationship
 
 
@@ -19,14 +30,29 @@ class Product(Base):
     cart_items = relationship("Cart", back_populates="product")
 
 
+class ProductPopularity(Base):
+    """Units sold per product, decayed to ``updated_at``; maintained by the
+    popularity job from order items past ``last_order_item_id``."""
+
+    __tablename__ = "product_popularity"
+
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    score = Column(Float, nullable=False, default=0.0)
+    last_order_item_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False)
+
+
 class Order(Base):
     __tablename__ = "orders"
+    # Covers "latest orders for a user" lookups and keyset pagination
+    __table_args__ = (Index("ix_orders_user_id_created_at", "user_id", "created_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     total_amount = Column(DECIMAL(10, 2))
     status = Column(String(50))
-    created_at = Column(TIMESTAMP, default=datetime.utcnow)
+    # Not null: it keys the history's keyset pagination (and its cursor)
+    created_at = Column(TIMESTAMP, default=datetime.utcnow, nullable=False)
 
     user = relationship("User", back_populates="orders")
     items = relationship("OrderItem", back_populates="order")
@@ -38,7 +64,7 @@ class OrderItem(Base):
     __tablename__ = "order_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
     product_id = Column(Integer, ForeignKey("products.id"))
     quantity = Column(Integer)
     price = Column(DECIMAL(10, 2))
@@ -22,6 +22,7 @@ class User(Base):
     refresh_tokens = relationship("RefreshToken", back_populates="user")
     orders = relationship("Order", back_populates="user")
     cart_items = relationship("Cart", back_populates="user")
+    conversations = relationship("Conversation", back_populates="user")
 
 
 class Address(Base):
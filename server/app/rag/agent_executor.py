@@ -0,0 +1,191 @@
+import asyncio
+import contextvars
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, List, Tuple
+
+from app.config.metrics import timed
+from app.config.settings import settings
+from app.rag.agent_tools import PERSONAL_TOOLS, PRODUCT_TOOLS
+from langchain_core.messages import BaseMessage, ToolMessage
+from langchain_core.tools import BaseTool
+
+logger = logging.getLogger(__name__)
+
+# Blocking (DB-bound) tools run here so a burst of tool calls can't exhaust
+# the event loop's default executor
+TOOL_POOL = ThreadPoolExecutor(
+    max_workers=settings.agent_tool_workers, thread_name_prefix="agent-tool"
+)
+
+
+class AgentExecutor:
+    """Tool-calling loop over the chat model from ``LLMConfig.invoke()``.
+
+    All tool calls the model emits in one step are independent of each other
+    (it has not seen any of their results yet), so they run concurrently
+    with ``asyncio.gather``. Each call gets its own timeout; a call that
+    overruns is cancelled and reported back to the model as an error.
+
+    When the run is shared through a single-flight ``flight``, calling a
+    personal tool marks the flight private so waiting callers compute
+    their own answer. Once ``stream`` has released the flight to them,
+    personal tools are refused instead.
+    """
+
+    def __init__(
+        self,
+        llm,
+        tools: List[BaseTool],
+        max_steps: int = settings.agent_max_steps,
+        tool_timeout: float = settings.agent_tool_timeout,
+        pool: ThreadPoolExecutor = TOOL_POOL,
+        prompt_builder=None,
+        flight=None,
+    ):
+        self.llm = llm
+        self.llm_with_tools = llm.bind_tools(tools) if tools else llm
+        self.tools = {t.name: t for t in tools}
+        self.max_steps = max_steps
+        self.tool_timeout = tool_timeout
+        self.pool = pool
+        # Optional PromptBuilder that budgets tool results going back in
+        self.prompt_builder = prompt_builder
+        self.flight = flight
+        # Every tool the model asked for, whether or not it returned
+        self.called_tools = set()
+        self.failed_tools = set()
+        self.cited_product_ids = set()
+        self.trace: List[dict] = []
+
+    async def run(self, messages: List[BaseMessage]) -> Tuple[str, List[dict]]:
+        """Return the final reply and a per-step trace of tool timings."""
+        for step in range(self.max_steps):
+            with timed("llm"):
+                response = await self.llm_with_tools.ainvoke(messages)
+            messages.append(response)
+            if not response.tool_calls:
+                return response.content, self.trace
+            messages.extend(await self._run_step(step, response.tool_calls))
+
+        # Out of steps: ask for an answer from what the tools returned so far
+        with timed("llm"):
+            response = await self.llm.ainvoke(messages)
+        return response.content, self.trace
+
+    async def stream(self, messages: List[BaseMessage]) -> AsyncIterator[str]:
+        """Like ``run`` but yields the reply's text as the model produces it.
+
+        Chunks of a step are merged to recover its tool calls; text is only
+        forwarded while the step hasn't started calling tools. The first
+        such text releases the flight, so callers sharing it follow along.
+        """
+        for step in range(self.max_steps):
+            response = None
+            with timed("llm"):
+                async for chunk in self.llm_with_tools.astream(messages):
+                    response = chunk if response is None else response + chunk
+                    if chunk.content and not response.tool_call_chunks:
+                        await self._release()
+                        yield chunk.content
+            if response is None:
+                return
+            messages.append(response)
+            if not response.tool_calls:
+                return
+            messages.extend(await self._run_step(step, response.tool_calls))
+
+        # No tools bound from here on, so the run can't turn private
+        await self._release()
+        with timed("llm"):
+            async for chunk in self.llm.astream(messages):
+                if chunk.content:
+                    yield chunk.content
+
+    async def _release(self):
+        if self.flight is not None and not self.flight.released:
+            await self.flight.release()
+
+    async def _run_step(self, step: int, tool_calls: List[dict]) -> List[ToolMessage]:
+        started = time.perf_counter()
+        share = len(tool_calls)
+        results = await asyncio.gather(
+            *(self._run_tool(call, share) for call in tool_calls)
+        )
+        wall_ms = (time.perf_counter() - started) * 1000
+
+        calls = [call_trace for _, call_trace in results]
+        sequential_ms = sum(call["duration_ms"] for call in calls)
+        self.trace.append(
+            {
+                "step": step,
+                "tools": calls,
+                "wall_ms": round(wall_ms, 1),
+                "sequential_ms": round(sequential_ms, 1),
+                "saved_ms": round(max(0.0, sequential_ms - wall_ms), 1),
+            }
+        )
+        logger.info(
+            "Agent step %d ran %d tools in %.1f ms (%.1f ms sequentially)",
+            step,
+            len(calls),
+            wall_ms,
+            sequential_ms,
+        )
+        return [message for message, _ in results]
+
+    async def _run_tool(self, call: dict, share: int) -> Tuple[ToolMessage, dict]:
+        name = call["name"]
+        tool = self.tools.get(name)
+        self.called_tools.add(name)
+        shared = self.flight is not None and self.flight.released
+        if self.flight is not None and name in PERSONAL_TOOLS and not shared:
+            await self.flight.mark_private()
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            if tool is None:
+                raise LookupError(f"Unknown tool: {name}")
+            if shared and name in PERSONAL_TOOLS:
+                # Other callers already have this run's text
+                raise PermissionError(f"{name} can't be used in a shared reply")
+            if getattr(tool, "coroutine", None) is not None:
+                pending = tool.ainvoke(call["args"])
+            else:
+                # Carry the request context over so the tool's SQL is
+                # charged to this request's timings
+                context = contextvars.copy_context()
+                pending = asyncio.get_running_loop().run_in_executor(
+                    self.pool, partial(context.run, tool.invoke, call["args"])
+                )
+            with timed("tool"):
+                result = await asyncio.wait_for(pending, timeout=self.tool_timeout)
+        except asyncio.TimeoutError:
+            # A thread-pool call can't be interrupted; its result is dropped
+            status = "timeout"
+            result = {"error": f"{name} timed out"}
+        except Exception:
+            logger.exception("Agent tool %s failed", name)
+            status = "error"
+            result = {"error": f"{name} failed"}
+
+        duration_ms = (time.perf_counter() - started) * 1000
+        if status != "ok":
+            self.failed_tools.add(name)
+        elif name in PRODUCT_TOOLS:
+            self.cited_product_ids.update(product["id"] for product in result)
+        if self.prompt_builder is not None:
+            content = self.prompt_builder.tool_content(
+                name, call["args"], result, share
+            )
+        else:
+            content = json.dumps(result, default=str)
+        message = ToolMessage(content=content, tool_call_id=call["id"], name=name)
+        return message, {
+            "name": name,
+            "status": status,
+            "duration_ms": round(duration_ms, 1),
+        }
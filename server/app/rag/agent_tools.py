@@ -0,0 +1,85 @@
+from typing import List, Optional
+
+from app.config.database import SessionLocal
+from app.services.order_service import OrderService
+from app.services.product_service import CartService, ProductService
+from fastapi import HTTPException
+from langchain_core.tools import BaseTool, tool
+
+# Tools whose results belong to the signed-in user: replies built from them
+# must never be cached for or shared with anyone else
+PERSONAL_TOOLS = {"order_history", "order_status", "cart_lookup"}
+
+# Tools that return a list of products
+PRODUCT_TOOLS = {"product_search", "product_search_many", "bought_together"}
+
+
+def build_agent_tools(user_id: int, session_factory=SessionLocal) -> List[BaseTool]:
+    """Tools bound to the signed-in user for one chat turn.
+
+    Each call opens its own session: the agent executor runs tool calls
+    concurrently on a thread pool and a ``Session`` is not thread-safe.
+    """
+
+    @tool
+    def order_history(limit: int = 5, cursor: Optional[str] = None) -> dict:
+        """Show the user's orders, newest first, with items, payments and
+        shipments. Pass `next_cursor` from a previous result to page back."""
+        with session_factory() as db:
+            history = OrderService(db).get_order_history(
+                user_id, limit=limit, cursor=cursor
+            )
+        return history.model_dump(mode="json")
+
+    @tool
+    def order_status() -> dict:
+        """Show the status, payment and shipment of the user's latest order."""
+        with session_factory() as db:
+            status = OrderService(db).get_latest_order_status(user_id)
+        if not status:
+            return {"message": "You have not placed any orders yet."}
+        return status.model_dump(mode="json")
+
+    @tool
+    def product_search(query: str, k: int = 5) -> list:
+        """Find products in the catalog matching a description, e.g.
+        "red t-shirts under 500" or "laptops with 16GB RAM"."""
+        with session_factory() as db:
+            products = ProductService(db).search(query, k=min(k, 20))
+        return [product.model_dump(mode="json") for product in products]
+
+    @tool
+    def product_search_many(queries: List[str], k: int = 5) -> list:
+        """Search several phrasings or aspects of one request at once, e.g.
+        ["wireless earbuds", "earbuds under 2000", "noise cancelling
+        earbuds"]; results are merged, best matches across all first."""
+        with session_factory() as db:
+            products = ProductService(db).search_many(queries[:8], k=min(k, 20))
+        return [product.model_dump(mode="json") for product in products]
+
+    @tool
+    def bought_together(product_id: int, k: int = 5) -> list:
+        """Products customers most often buy together with a product (its
+        `id` from product_search), for "goes well with" suggestions."""
+        with session_factory() as db:
+            try:
+                products = ProductService(db).bought_together(product_id, k=min(k, 10))
+            except HTTPException:
+                return []
+        return [product.model_dump(mode="json") for product in products]
+
+    @tool
+    def cart_lookup() -> dict:
+        """Show the items currently in the user's cart and the cart total."""
+        with session_factory() as db:
+            cart = CartService(db).get_cart(user_id)
+        return cart.model_dump(mode="json")
+
+    return [
+        order_history,
+        order_status,
+        product_search,
+        product_search_many,
+        bought_together,
+        cart_lookup,
+    ]
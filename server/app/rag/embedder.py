@@ -0,0 +1,47 @@
+from functools import lru_cache
+from typing import Sequence
+
+import numpy as np
+from app.config.metrics import timed
+from app.config.settings import settings
+from app.rag.single_flight import ThreadSingleFlight
+from langchain_core.embeddings import Embeddings
+from langchain_huggingface import HuggingFaceEmbeddings
+
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+_embedding_flight = ThreadSingleFlight("embedding")
+
+
+@lru_cache(maxsize=1)
+def get_embeddings() -> Embeddings:
+    """Local sentence-transformers model, loaded once per process."""
+    return HuggingFaceEmbeddings(
+        model_name=settings.embadding_model() or DEFAULT_EMBEDDING_MODEL,
+        encode_kwargs={"normalize_embeddings": True},
+    )
+
+
+@lru_cache(maxsize=4096)
+def embed_query(text: str) -> np.ndarray:
+    """Unit-length query vector, memoized so the intent router and the
+    semantic cache embed a chat message only once; concurrent misses for
+    the same text share one model call. Read-only."""
+    with timed("embedding"):
+        vector = _embedding_flight.do(text, lambda: get_embeddings().embed_query(text))
+    vector = np.asarray(vector, dtype=np.float32)
+    vector /= np.linalg.norm(vector) or 1.0
+    vector.setflags(write=False)
+    return vector
+
+
+def embed_queries(texts: Sequence[str]) -> np.ndarray:
+    """Unit-length vectors for several queries, one row each, from one
+    batched model call (one forward pass for the lot)."""
+    with timed("embedding"):
+        vectors = get_embeddings().embed_documents(list(texts))
+    matrix = np.asarray(vectors, dtype=np.float32).reshape(len(texts), -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
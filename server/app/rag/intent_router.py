@@ -0,0 +1,163 @@
+import logging
+import re
+import threading
+from typing import Dict, NamedTuple, Optional
+
+import numpy as np
+from app.config.settings import settings
+from app.rag.embedder import embed_query, get_embeddings
+
+logger = logging.getLogger(__name__)
+
+# Simple intents that map onto one argument-free tool call
+INTENT_TOOLS = {
+    "cart": "cart_lookup",
+    "order_status": "order_status",
+    "order_history": "order_history",
+}
+
+# Whole-message patterns only, so "add this to my cart" never matches "cart"
+INTENT_PATTERNS = {
+    "cart": re.compile(
+        r"(?:(?:show|view|open|check|see|display)(?: me)? |what(?:'s| is) in )?"
+        r"my (?:shopping )?(?:cart|basket)"
+    ),
+    "order_status": re.compile(
+        r"(?:track|check|where(?:'s| is)|status of)(?: my)?"
+        r"(?: (?:latest|last|recent|current))? order(?: status)?"
+        r"|(?:my )?(?:latest |last )?order status"
+    ),
+    "order_history": re.compile(
+        r"(?:show|list|view|see|display)(?: me)?(?: all)? my"
+        r"(?: (?:past|previous|old|recent))? orders"
+        r"|(?:show )?(?:my )?order history"
+    ),
+}
+
+# Seed utterances for the embedding classifier; "other" soaks up everything
+# that needs retrieval or the full agent
+INTENT_EXAMPLES = {
+    "cart": [
+        "what do I have in my cart",
+        "show the items in my basket",
+        "cart contents please",
+        "how much is my cart total",
+    ],
+    "order_status": [
+        "where is my package",
+        "has my order shipped yet",
+        "when will my order arrive",
+        "what is the delivery status of my last purchase",
+    ],
+    "order_history": [
+        "what have I bought before",
+        "list everything I ordered",
+        "my previous purchases",
+        "show all orders I placed",
+    ],
+    "other": [
+        "show me red t-shirts under 500",
+        "find laptops with 16GB RAM",
+        "add this to my cart",
+        "what is your return policy",
+        "cancel my order",
+        "hello",
+    ],
+}
+
+_NORMALIZE = re.compile(r"[^a-z0-9' ]+")
+_PLEASE = re.compile(r"\bplease\b")
+
+
+def normalize(message: str) -> str:
+    text = _NORMALIZE.sub(" ", _PLEASE.sub("", message.lower()))
+    return " ".join(text.split())
+
+
+class IntentDecision(NamedTuple):
+    intent: str
+    confidence: float
+    source: str  # pattern, embedding
+
+    @property
+    def tool(self) -> Optional[str]:
+        return INTENT_TOOLS.get(self.intent)
+
+
+class IntentRouter:
+    """Cheap intent classification in front of the LLM agent.
+
+    Tries the compiled patterns first (microseconds), then a nearest-centroid
+    classifier over query embeddings. Only decisions at or above
+    ``threshold`` are routed straight to a tool.
+    """
+
+    def __init__(self, threshold: float = settings.intent_router_threshold):
+        self.threshold = threshold
+        self._centroids: Optional[Dict[str, np.ndarray]] = None
+        self._lock = threading.Lock()
+        self._stats = {"routed": 0, "fallback": 0, "routed_ms": 0.0, "llm_ms": 0.0}
+
+    def _load_centroids(self) -> Dict[str, np.ndarray]:
+        if self._centroids is None:
+            with self._lock:
+                if self._centroids is None:
+                    embeddings = get_embeddings()
+                    centroids = {}
+                    for intent, examples in INTENT_EXAMPLES.items():
+                        vectors = np.array(embeddings.embed_documents(examples))
+                        centroid = vectors.mean(axis=0)
+                        centroids[intent] = centroid / np.linalg.norm(centroid)
+                    self._centroids = centroids
+        return self._centroids
+
+    def classify(self, message: str) -> IntentDecision:
+        text = normalize(message)
+        for intent, pattern in INTENT_PATTERNS.items():
+            if pattern.fullmatch(text):
+                return IntentDecision(intent, 1.0, "pattern")
+
+        centroids = self._load_centroids()
+        query = embed_query(text)
+        scores = {intent: float(query @ c) for intent, c in centroids.items()}
+        intent = max(scores, key=scores.get)
+        return IntentDecision(intent, scores[intent], "embedding")
+
+    def should_route(self, decision: IntentDecision) -> bool:
+        return decision.tool is not None and decision.confidence >= self.threshold
+
+    def record(self, decision: IntentDecision, routed: bool, elapsed_ms: float):
+        with self._lock:
+            if routed:
+                self._stats["routed"] += 1
+                self._stats["routed_ms"] += elapsed_ms
+            else:
+                self._stats["fallback"] += 1
+                self._stats["llm_ms"] += elapsed_ms
+        logger.info(
+            "Intent %s (%s, confidence %.2f) %s in %.1f ms",
+            decision.intent,
+            decision.source,
+            decision.confidence,
+            "routed to tool" if routed else "sent to LLM",
+            elapsed_ms,
+        )
+
+    def stats(self) -> dict:
+        """Share of turns that skipped the LLM and the latency that saved."""
+        with self._lock:
+            stats = dict(self._stats)
+        total = stats["routed"] + stats["fallback"]
+        avg_routed = stats["routed_ms"] / stats["routed"] if stats["routed"] else 0.0
+        avg_llm = stats["llm_ms"] / stats["fallback"] if stats["fallback"] else 0.0
+        return {
+            "turns": total,
+            "llm_calls_avoided": stats["routed"],
+            "llm_calls_avoided_ratio": stats["routed"] / total if total else 0.0,
+            "avg_routed_ms": avg_routed,
+            "avg_llm_ms": avg_llm,
+            "estimated_ms_saved": stats["routed"] * max(0.0, avg_llm - avg_routed),
+        }
+
+
+intent_router = IntentRouter()
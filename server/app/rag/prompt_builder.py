@@ -0,0 +1,198 @@
+import json
+import logging
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import tiktoken
+from app.config.settings import settings
+from app.rag.agent_tools import PRODUCT_TOOLS
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+logger = logging.getLogger(__name__)
+
+_WORDS = re.compile(r"\w+|[^\w\s]")
+_SENTENCES = re.compile(r"(?<=[.!?])\s+")
+
+
+class _ApproximateEncoding:
+    """Word/punctuation split, used when the BPE file can't be loaded."""
+
+    def encode(self, text: str) -> List[str]:
+        return _WORDS.findall(text)
+
+    def decode(self, tokens: List[str]) -> str:
+        return " ".join(tokens)
+
+
+@lru_cache(maxsize=1)
+def get_encoding():
+    try:
+        return tiktoken.get_encoding(settings.prompt_tokenizer)
+    except Exception:
+        logger.warning(
+            "Tokenizer %s unavailable, approximating token counts",
+            settings.prompt_tokenizer,
+        )
+        return _ApproximateEncoding()
+
+
+def count_tokens(text: str) -> int:
+    return len(get_encoding().encode(text)) if text else 0
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    if not text or max_tokens <= 0:
+        return ""
+    encoding = get_encoding()
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens]) + "…"
+
+
+def _terms(text: str) -> set:
+    return {word for word in _WORDS.findall((text or "").lower()) if word.isalnum()}
+
+
+def _jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def _trim_json(result, max_tokens: int) -> str:
+    """Still valid JSON: as many leading items of a list result as fit,
+    else just a note of what was left out."""
+    if isinstance(result, list):
+        low, high = 0, len(result) - 1
+        while low < high:  # most items that fit
+            middle = (low + high + 1) // 2
+            if count_tokens(_trimmed(result, middle)) <= max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        if low:
+            return _trimmed(result, low)
+    items = len(result) if isinstance(result, list) else 1
+    return json.dumps({"truncated": True, "items": items})
+
+
+def _trimmed(items: list, keep: int) -> str:
+    return json.dumps(
+        {"items": items[:keep], "truncated": True, "total": len(items)},
+        default=str,
+    )
+
+
+class PromptBuilder:
+    """Assembles one chat turn's prompt within per-section token budgets.
+
+    Sections are the system prompt, conversation memory (summary plus recent
+    turns), retrieved products and other tool results. Token use per
+    section is tallied so ``report()`` can be logged for every request.
+    """
+
+    DUPLICATE_THRESHOLD = 0.85
+
+    def __init__(self, budgets: Optional[Dict[str, int]] = None):
+        self.budgets = budgets or {
+            "system": settings.prompt_budget_system,
+            "memory": settings.prompt_budget_memory,
+            "products": settings.prompt_budget_products,
+            "tools": settings.prompt_budget_tools,
+        }
+        self.usage = {section: 0 for section in (*self.budgets, "user")}
+
+    def _remaining(self, section: str) -> int:
+        return max(0, self.budgets[section] - self.usage[section])
+
+    def _spend(self, section: str, text: str) -> str:
+        self.usage[section] += count_tokens(text)
+        return text
+
+    def build(self, system_prompt: str, context, message: str):
+        """``context`` is a ``ConversationContext`` (summary + recent turns)."""
+        system = self._spend(
+            "system", truncate_tokens(system_prompt, self.budgets["system"])
+        )
+
+        # Recent turns take priority over the summary, newest first
+        history = []
+        for past in reversed(context.messages):
+            cost = count_tokens(past.content)
+            if cost > self._remaining("memory"):
+                break
+            self.usage["memory"] += cost
+            cls = HumanMessage if past.role == "user" else AIMessage
+            history.append(cls(content=past.content))
+        history.reverse()
+
+        if context.summary and self._remaining("memory"):
+            summary = truncate_tokens(context.summary, self._remaining("memory"))
+            system += "\n\nSummary of the earlier conversation:\n" + self._spend(
+                "memory", summary
+            )
+
+        return [
+            SystemMessage(content=system),
+            *history,
+            HumanMessage(content=self._spend("user", message)),
+        ]
+
+    def compress_products(self, products: List[dict], query: str) -> List[dict]:
+        """Drop near-duplicates and cut each product down to the fields and
+        description sentences the query needs, within the products budget.
+        Products whose base fields no longer fit are left out."""
+        unique, seen = [], []
+        for product in products:
+            terms = _terms(f"{product.get('name')} {product.get('description')}")
+            if any(
+                _jaccard(terms, other) >= self.DUPLICATE_THRESHOLD for other in seen
+            ):
+                continue
+            seen.append(terms)
+            unique.append(product)
+        if not unique:
+            return []
+
+        query_terms = _terms(query)
+        # Brackets of the list, then a separator per entry
+        remaining = self._remaining("products") - 2
+        per_product = remaining // len(unique)
+        compressed = []
+        for product in unique:
+            entry = {
+                "id": product["id"],
+                "name": product.get("name"),
+                "price": product.get("price"),
+                "in_stock": (product.get("stock") or 0) > 0,
+            }
+            base = count_tokens(json.dumps(entry, default=str)) + 1
+            if base > remaining:
+                break
+            room = min(per_product, remaining) - base
+            sentences = list(
+                dict.fromkeys(_SENTENCES.split(product.get("description") or ""))
+            )
+            relevant = [s for s in sentences if _terms(s) & query_terms]
+            relevant = relevant or sentences[:1]
+            description = truncate_tokens(" ".join(relevant), room)
+            if description:
+                entry["description"] = description
+            compressed.append(entry)
+            remaining -= count_tokens(json.dumps(entry, default=str)) + 1
+        return compressed
+
+    def tool_content(self, name: str, args: dict, result, share: int = 1) -> str:
+        """Serialize a tool result for the model, charged to its section."""
+        if name in PRODUCT_TOOLS and isinstance(result, list):
+            products = self.compress_products(result, args.get("query", ""))
+            return self._spend("products", json.dumps(products, default=str))
+
+        content = json.dumps(result, default=str)
+        limit = self._remaining("tools") // max(1, share)
+        if count_tokens(content) > limit:
+            content = _trim_json(result, limit)
+        return self._spend("tools", content)
+
+    def report(self) -> dict:
+        return {**self.usage, "total": sum(self.usage.values())}
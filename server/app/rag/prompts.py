@@ -0,0 +1,14 @@
+SYSTEM_PROMPT = (
+    "You are the shopping assistant of an online store. Help the user find "
+    "products, track their orders and check out. Answer briefly and only "
+    "with facts from the conversation or from tool results."
+)
+
+SUMMARY_PROMPT = (
+    "Update the running summary of a shopping conversation with the new "
+    "messages below. Keep products, prices, order numbers and user "
+    "preferences; drop small talk. Reply with the summary only, in at most "
+    "{max_chars} characters.\n\n"
+    "Current summary:\n{summary}\n\n"
+    "New messages:\n{messages}"
+)
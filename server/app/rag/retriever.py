@@ -0,0 +1,232 @@
+import logging
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from app.config.metrics import timed
+from app.config.settings import settings
+from app.models.base import Product
+from app.rag.embedder import embed_queries, get_embeddings
+from app.rag.single_flight import ThreadSingleFlight
+from langchain_chroma import Chroma
+from langchain_core.vectorstores import InMemoryVectorStore, VectorStore
+
+logger = logging.getLogger(__name__)
+
+_search_flight = ThreadSingleFlight("vector_search")
+
+# Reciprocal rank fusion constant: damps the weight of the very top ranks
+RRF_K = 60
+
+
+def product_document(product: Product) -> str:
+    return f"{product.name}\n{product.description or ''}".strip()
+
+
+class ProductRetriever:
+    """Semantic product search over the store picked by ``vector_store_type``."""
+
+    def __init__(self, vector_store: VectorStore, distance_scores: bool = False):
+        self.vector_store = vector_store
+        # Chroma reports cosine distance, the in-memory store cosine similarity
+        self.distance_scores = distance_scores
+        self._indexed = False
+        self._lock = threading.Lock()
+        # In-memory store only: (product ids, unit vectors), rebuilt after
+        # the catalog index changes
+        self._matrix: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._matrix_lock = threading.Lock()
+
+    def index_products(self, products: List[Product]):
+        if not products:
+            return
+        self.vector_store.add_texts(
+            [product_document(product) for product in products],
+            metadatas=[{"product_id": product.id} for product in products],
+            ids=[str(product.id) for product in products],
+        )
+        self._invalidate_matrix()
+
+    def remove_products(self, product_ids: List[int]):
+        if product_ids:
+            self.vector_store.delete(ids=[str(pid) for pid in product_ids])
+            self._invalidate_matrix()
+
+    def ensure_indexed(self, db):
+        """Index the whole catalog once per process (ids make it an upsert)."""
+        if self._indexed:
+            return
+        with self._lock:
+            if not self._indexed:
+                products = db.query(Product).all()
+                self.index_products(products)
+                self._indexed = True
+                logger.info("Indexed %d products", len(products))
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[int, float]]:
+        """``(product_id, cosine similarity)`` pairs, best first. Identical
+        concurrent searches share one vector store query."""
+        return _search_flight.do((query, k), lambda: self._search(query, k))
+
+    def _search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        with timed("retrieval"):
+            results = self.vector_store.similarity_search_with_score(query, k=k)
+        return [
+            (doc.metadata["product_id"], 1.0 - score if self.distance_scores else score)
+            for doc, score in results
+        ]
+
+    def search_many(
+        self, queries: Sequence[str], k: int = 5
+    ) -> List[Tuple[int, float]]:
+        """Several phrasings of one request searched as a batch and fused
+        with ``reciprocal_rank_fusion``: ``(product_id, fused score)``
+        pairs, each product once, best first."""
+        queries = list(dict.fromkeys(queries))  # a repeat would count twice
+        return reciprocal_rank_fusion(self.search_batch(queries, k))
+
+    def search_batch(
+        self, queries: Sequence[str], k: int = 5
+    ) -> List[List[Tuple[int, float]]]:
+        """Each query's ``(product_id, cosine similarity)`` pairs, best
+        first. The queries are embedded in one model call and scored in
+        one go (a single matrix product over the in-memory store, one
+        batched query to Chroma), so k queries cost about what one does."""
+        if not queries:
+            return []
+        vectors = embed_queries(queries)
+        with timed("retrieval"):
+            if isinstance(self.vector_store, InMemoryVectorStore):
+                return self._search_matrix(vectors, k)
+            return self._search_collection(vectors, k)
+
+    def _search_matrix(
+        self, vectors: np.ndarray, k: int
+    ) -> List[List[Tuple[int, float]]]:
+        product_ids, matrix = self._product_matrix()
+        if not len(product_ids):
+            return [[] for _ in vectors]
+        scores = vectors @ matrix.T  # (queries, products) cosine similarities
+        k = min(k, len(product_ids))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        return [
+            list(zip(product_ids[row].tolist(), row_scores.tolist()))
+            for row, row_scores in zip(top, top_scores)
+        ]
+
+    def _search_collection(
+        self, vectors: np.ndarray, k: int
+    ) -> List[List[Tuple[int, float]]]:
+        collection = _chroma_collection(self.vector_store)
+        if collection is None:
+            return [self._search_vector(vector, k) for vector in vectors]
+        # Chroma rejects (or warns on) asking for more than it holds
+        k = min(k, collection.count())
+        if k == 0:
+            return [[] for _ in vectors]
+        results = collection.query(
+            query_embeddings=vectors.tolist(),
+            n_results=k,
+            include=["metadatas", "distances"],
+        )
+        return [
+            [
+                (
+                    metadata["product_id"],
+                    1.0 - score if self.distance_scores else score,
+                )
+                for metadata, score in zip(metadatas, scores)
+            ]
+            for metadatas, scores in zip(results["metadatas"], results["distances"])
+        ]
+
+    def _search_vector(self, vector: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        results = self.vector_store.similarity_search_by_vector_with_relevance_scores(
+            vector.tolist(), k=k
+        )
+        return [
+            (doc.metadata["product_id"], 1.0 - score if self.distance_scores else score)
+            for doc, score in results
+        ]
+
+    def _product_matrix(self) -> Tuple[np.ndarray, np.ndarray]:
+        matrix = self._matrix
+        if matrix is not None:
+            return matrix
+        with self._matrix_lock:
+            if self._matrix is None:
+                docs = list(self.vector_store.store.values())
+                product_ids = np.fromiter(
+                    (doc["metadata"]["product_id"] for doc in docs), np.int64, len(docs)
+                )
+                vectors = np.asarray(
+                    [doc["vector"] for doc in docs], dtype=np.float32
+                ).reshape(len(docs), -1 if docs else 0)
+                norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+                norms[norms == 0] = 1.0
+                self._matrix = (product_ids, vectors / norms)
+            return self._matrix
+
+    def _invalidate_matrix(self):
+        with self._matrix_lock:
+            self._matrix = None
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Tuple[int, float]]], k: int = RRF_K
+) -> List[Tuple[int, float]]:
+    """Fuse ranked ``(product_id, score)`` lists: each product scores
+    ``sum(1 / (k + rank))`` over the lists it appears in, so products
+    several sub-queries agree on rise, and no one query's similarity scale
+    dominates. ``(product_id, fused score)`` pairs, best first."""
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, (product_id, _) in enumerate(ranking, start=1):
+            fused[product_id] = fused.get(product_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+def _chroma_collection(store: VectorStore):
+    """The chromadb collection behind a langchain ``Chroma`` store.
+
+    langchain_chroma only queries one vector at a time, while the collection
+    takes a whole batch; it exposes no public accessor, so this is the one
+    place that reads the private ``_collection``. None when that's missing
+    (another store, or a release that renamed it): callers then fall back
+    to one public ``similarity_search_by_vector_with_relevance_scores`` call
+    per vector.
+    """
+    collection = getattr(store, "_collection", None)
+    if collection is None or not callable(getattr(collection, "query", None)):
+        return None
+    return collection
+
+
+def _chroma_retriever() -> ProductRetriever:
+    store = Chroma(
+        collection_name=settings.chroma_collection_name or "products",
+        embedding_function=get_embeddings(),
+        persist_directory=settings.chroma_db_path,
+        collection_metadata={"hnsw:space": "cosine"},
+    )
+    return ProductRetriever(store, distance_scores=True)
+
+
+def _memory_retriever() -> ProductRetriever:
+    return ProductRetriever(InMemoryVectorStore(get_embeddings()))
+
+
+@lru_cache(maxsize=1)
+def get_product_retriever() -> ProductRetriever:
+    switcher = {
+        "chroma": _chroma_retriever,
+        "memory": _memory_retriever,
+    }
+    if settings.vector_store_type not in switcher:
+        raise ValueError(f"Unknown vector_store_type: {settings.vector_store_type}")
+    return switcher[settings.vector_store_type]()
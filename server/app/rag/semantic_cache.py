@@ -0,0 +1,225 @@
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+from app.config.change_bus import ChangeSet, change_bus
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+Scope = Tuple[str, Optional[int]]  # (intent, user_id or None when shared)
+
+
+class CacheEntry(NamedTuple):
+    scope: Scope
+    vector: np.ndarray
+    reply: str
+    product_ids: frozenset
+    expires_at: float
+
+
+class ScopeMatrix:
+    """One scope's entry vectors as rows of a preallocated matrix, so a
+    lookup is a single matrix-vector product with nothing copied. Freed
+    rows are reused; the matrix doubles when full. Free and expired rows
+    are masked out of every search."""
+
+    def __init__(self, dim: int, capacity: int = 64):
+        self.matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self.ids = np.full(capacity, -1, dtype=np.int64)  # -1: free row
+        self.expires = np.full(capacity, -np.inf)  # free rows never match
+        self.rows: Dict[int, int] = {}  # entry id -> row
+        self._free = list(range(capacity - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def add(self, entry_id: int, vector: np.ndarray, expires_at: float):
+        if not self._free:
+            self._grow()
+        row = self._free.pop()
+        self.matrix[row] = vector
+        self.ids[row] = entry_id
+        self.expires[row] = expires_at
+        self.rows[entry_id] = row
+
+    def remove(self, entry_id: int):
+        row = self.rows.pop(entry_id, None)
+        if row is not None:
+            self.ids[row] = -1
+            self.expires[row] = -np.inf
+            self._free.append(row)
+
+    def best(self, vector: np.ndarray, now: float) -> Tuple[int, float]:
+        """``(entry id, cosine similarity)`` of the closest entry still
+        live at ``now``; the similarity is -inf when there's none."""
+        scores = self.matrix @ vector
+        scores[self.expires <= now] = -np.inf
+        row = int(np.argmax(scores))
+        return int(self.ids[row]), float(scores[row])
+
+    def _grow(self):
+        capacity = len(self.ids)
+        self.matrix = np.concatenate((self.matrix, np.zeros_like(self.matrix)))
+        self.ids = np.concatenate((self.ids, np.full(capacity, -1, dtype=np.int64)))
+        self.expires = np.concatenate((self.expires, np.full(capacity, -np.inf)))
+        self._free = list(range(2 * capacity - 1, capacity - 1, -1))
+
+
+class SemanticCache:
+    """Chat replies keyed by query embedding, looked up by cosine similarity.
+
+    Entries are partitioned by scope: shared catalog/FAQ answers live under
+    ``(intent, None)``, anything built from personal tools under
+    ``(intent, user_id)``, so one user's orders or cart are never served to
+    another. Entries expire after ``ttl`` seconds, the least recently used
+    are evicted past ``max_entries``, and an entry is dropped as soon as a
+    product it cited changes (committed here, or by another process when
+    the change outbox is on). Lookups skip expired entries, which
+    ``purge_expired`` then drops.
+    """
+
+    def __init__(
+        self,
+        threshold: float = settings.semantic_cache_threshold,
+        ttl: float = settings.semantic_cache_ttl,
+        max_entries: int = settings.semantic_cache_max_entries,
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, CacheEntry]" = OrderedDict()
+        self._by_scope: Dict[Scope, ScopeMatrix] = {}
+        self._by_product: Dict[int, Set[int]] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "hit_ms": 0.0, "miss_ms": 0.0}
+
+    def lookup(
+        self, vector: np.ndarray, intent: str, user_id: int
+    ) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            best_id, best_score = None, self.threshold
+            for scope in ((intent, None), (intent, user_id)):
+                vectors = self._by_scope.get(scope)
+                if not vectors:
+                    continue
+                entry_id, score = vectors.best(vector, now)
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is None:
+                return None
+            self._entries.move_to_end(best_id)
+            return self._entries[best_id].reply
+
+    def store(
+        self,
+        vector: np.ndarray,
+        intent: str,
+        user_id: Optional[int],
+        reply: str,
+        product_ids: Iterable[int] = (),
+    ):
+        """``user_id`` is None for replies that are safe to share."""
+        entry = CacheEntry(
+            scope=(intent, user_id),
+            vector=vector,
+            reply=reply,
+            product_ids=frozenset(product_ids),
+            expires_at=time.monotonic() + self.ttl,
+        )
+        with self._lock:
+            entry_id = next(self._ids)
+            self._entries[entry_id] = entry
+            vectors = self._by_scope.get(entry.scope)
+            if vectors is None:
+                vectors = self._by_scope[entry.scope] = ScopeMatrix(len(vector))
+            vectors.add(entry_id, vector, entry.expires_at)
+            for product_id in entry.product_ids:
+                self._by_product.setdefault(product_id, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        self._by_scope[entry.scope].remove(entry_id)
+        if not self._by_scope[entry.scope]:
+            del self._by_scope[entry.scope]
+        for product_id in entry.product_ids:
+            self._by_product[product_id].discard(entry_id)
+            if not self._by_product[product_id]:
+                del self._by_product[product_id]
+
+    def invalidate_products(self, product_ids: Iterable[int]):
+        with self._lock:
+            stale = set()
+            for product_id in product_ids:
+                stale |= self._by_product.get(product_id, set())
+            for entry_id in stale:
+                self._remove(entry_id)
+        if stale:
+            logger.info("Semantic cache dropped %d entries", len(stale))
+
+    def purge_expired(self) -> int:
+        """Drop expired entries (lookups only skip them)."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [i for i, e in self._entries.items() if e.expires_at <= now]
+            for entry_id in expired:
+                self._remove(entry_id)
+        return len(expired)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_scope.clear()
+            self._by_product.clear()
+
+    def record(self, hit: bool, elapsed_ms: float):
+        with self._lock:
+            if hit:
+                self._stats["hits"] += 1
+                self._stats["hit_ms"] += elapsed_ms
+            else:
+                self._stats["misses"] += 1
+                self._stats["miss_ms"] += elapsed_ms
+
+    def stats(self) -> dict:
+        """Hit rate and the latency hits saved against an average miss."""
+        with self._lock:
+            stats = dict(self._stats)
+            size = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        avg_hit = stats["hit_ms"] / stats["hits"] if stats["hits"] else 0.0
+        avg_miss = stats["miss_ms"] / stats["misses"] if stats["misses"] else 0.0
+        return {
+            "entries": size,
+            "lookups": lookups,
+            "hits": stats["hits"],
+            "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+            "avg_hit_ms": avg_hit,
+            "avg_miss_ms": avg_miss,
+            "estimated_ms_saved": stats["hits"] * max(0.0, avg_miss - avg_hit),
+        }
+
+
+semantic_cache = SemanticCache()
+
+
+def _invalidate_changed_products(changes: ChangeSet):
+    # Inserts can't have been cited yet
+    updated = changes.updated.get("products", {})
+    product_ids = set(updated) | changes.removed("products")
+    if product_ids:
+        semantic_cache.invalidate_products(product_ids)
+
+
+change_bus.subscribe(_invalidate_changed_products, tables={"products"})
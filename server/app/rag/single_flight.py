@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    TypeVar,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Every coalescing layer by name, for reporting
+FLIGHTS: Dict[str, "SingleFlight"] = {}
+
+
+def single_flight_stats() -> Dict[str, dict]:
+    return {name: dict(flight.counters) for name, flight in FLIGHTS.items()}
+
+
+class NotShareable(Exception):
+    """The leader's computation touched personal data; compute your own."""
+
+
+class Flight:
+    """One in-flight computation and everything it has produced so far.
+
+    Stream chunks are buffered so every subscriber gets its own complete
+    replay, however late it joined. The leader calls ``mark_private()`` as
+    soon as the work touches per-user data; subscribers then get
+    ``NotShareable``. A model can stream text before deciding to call a
+    tool, so subscribers other than the owner see no chunk until the work
+    can no longer turn private: it finished, or the leader called
+    ``release()``. A subscriber that falls back has forwarded nothing.
+    """
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.result = None
+        self.error = None
+        self.done = False
+        self.shareable = True
+        self.released = False
+        self._changed = asyncio.Condition()
+
+    async def _notify(self):
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def publish(self, chunk: str):
+        self.chunks.append(chunk)
+        await self._notify()
+
+    async def mark_private(self):
+        self.shareable = False
+        await self._notify()
+
+    async def release(self):
+        """The rest of the work can't touch per-user data: let subscribers
+        follow the chunks as they come."""
+        self.released = True
+        await self._notify()
+
+    async def finish(self, result=None, error=None):
+        self.result, self.error, self.done = result, error, True
+        await self._notify()
+
+    async def subscribe(self, owner: bool = False) -> AsyncIterator[str]:
+        """Replay and follow the chunks; ``owner`` ignores ``shareable``."""
+        position = 0
+
+        def visible() -> int:
+            if owner or self.released or self.done:
+                return len(self.chunks)
+            return 0
+
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(
+                    lambda: self.done
+                    or position < visible()
+                    or not (owner or self.shareable)
+                )
+            if not (owner or self.shareable):
+                raise NotShareable()
+            while position < visible():
+                yield self.chunks[position]
+                position += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+
+    async def wait(self):
+        async for _ in self.subscribe():
+            pass
+        return self.result
+
+
+class SingleFlight:
+    """Coalesces concurrent identical async calls into one computation.
+
+    Keys must only contain non-personal inputs (normalized query, intent);
+    a leader whose work turns personal marks its flight private and the
+    waiting callers fall back to computing their own result.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[Hashable, Flight] = {}
+        self.counters = {"leaders": 0, "coalesced": 0, "fallbacks": 0}
+        FLIGHTS[name] = self
+
+    async def do(self, key: Hashable, fn: Callable[[Flight], Awaitable[T]]) -> T:
+        """``fn(flight)`` runs once per key at a time; its return value is
+        shared with every caller that arrived while it was running."""
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.counters["coalesced"] += 1
+            try:
+                return await flight.wait()
+            except NotShareable:
+                self.counters["fallbacks"] += 1
+                return await fn(Flight())
+
+        flight = self._flights[key] = Flight()
+        self.counters["leaders"] += 1
+        try:
+            result = await fn(flight)
+        except asyncio.CancelledError:
+            # The leader's client went away: let the others compute their own
+            await flight.mark_private()
+            raise
+        except Exception as error:
+            await flight.finish(error=error)
+            raise
+        finally:
+            self._flights.pop(key, None)
+        await flight.finish(result=result)
+        return result
+
+    async def stream(
+        self, key: Hashable, producer: Callable[[Flight], AsyncIterator[str]]
+    ) -> AsyncIterator[str]:
+        """Like ``do`` for token streams: one producer per key, and each
+        subscriber iterates its own fan-out of the buffered chunks."""
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.counters["coalesced"] += 1
+            try:
+                async for chunk in flight.subscribe():
+                    yield chunk
+                return
+            except NotShareable:
+                # Chunks are held back until the work can't turn private,
+                # so nothing was forwarded yet; start over
+                self.counters["fallbacks"] += 1
+                async for chunk in producer(Flight()):
+                    yield chunk
+                return
+
+        flight = self._flights[key] = Flight()
+        self.counters["leaders"] += 1
+        # Run the producer as its own task so a subscriber disconnecting,
+        # the leader included, doesn't cut the stream off for the others
+        task = asyncio.create_task(self._produce(key, flight, producer))
+        async for chunk in flight.subscribe(owner=True):
+            yield chunk
+        await task
+
+    async def _produce(self, key, flight: Flight, producer):
+        try:
+            async for chunk in producer(flight):
+                await flight.publish(chunk)
+        except asyncio.CancelledError as error:
+            # Subscribers would wait forever on an unfinished flight; those
+            # that have seen nothing yet compute their own result instead
+            if not flight.released:
+                await flight.mark_private()
+            await flight.finish(error=error)
+            raise
+        except Exception as error:
+            logger.exception("Single-flight %s producer failed", self.name)
+            await flight.finish(error=error)
+        else:
+            await flight.finish()
+        finally:
+            self._flights.pop(key, None)
+
+
+class ThreadSingleFlight:
+    """Blocking counterpart of ``SingleFlight`` for code run on thread pools
+    (embedding, vector search): duplicate concurrent calls wait on the
+    first caller's future instead of repeating the work."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.counters = {"leaders": 0, "coalesced": 0}
+        FLIGHTS[name] = self
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            future = self._flights.get(key)
+            leader = future is None
+            if leader:
+                future = self._flights[key] = Future()
+                self.counters["leaders"] += 1
+            else:
+                self.counters["coalesced"] += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
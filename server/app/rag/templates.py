@@ -0,0 +1,61 @@
+def _money(value) -> str:
+    return f"₹{value}" if value is not None else "-"
+
+
+def render_order_status(result: dict) -> str:
+    if "order_id" not in result:
+        return result.get("message", "You have not placed any orders yet.")
+
+    reply = f"Your latest order #{result['order_id']} is {result['status'] or 'placed'}."
+    if result.get("payment_status"):
+        reply += f" Payment: {result['payment_status']}."
+    if result.get("shipment_status"):
+        reply += f" Shipment: {result['shipment_status']}"
+        if result.get("tracking_number"):
+            reply += f" (tracking number {result['tracking_number']})"
+        reply += "."
+    return reply
+
+
+def render_order_history(result: dict) -> str:
+    orders = result.get("orders", [])
+    if not orders:
+        return "You have not placed any orders yet."
+
+    lines = ["Here are your recent orders:"]
+    for order in orders:
+        items = ", ".join(
+            f"{item['quantity']} x {(item.get('product') or {}).get('name', 'item')}"
+            for item in order["items"]
+        )
+        lines.append(
+            f"- #{order['id']} ({order['status'] or 'placed'}, "
+            f"{_money(order['total_amount'])}): {items or 'no items'}"
+        )
+    return "\n".join(lines)
+
+
+def render_cart(result: dict) -> str:
+    items = result.get("items", [])
+    if not items:
+        return "Your cart is empty."
+
+    lines = ["Your cart:"]
+    for item in items:
+        product = item["product"]
+        lines.append(
+            f"- {item['quantity']} x {product['name']} ({_money(product['price'])})"
+        )
+    lines.append(f"Total: {_money(result['total_amount'])}")
+    return "\n".join(lines)
+
+
+TEMPLATES = {
+    "cart": render_cart,
+    "order_status": render_order_status,
+    "order_history": render_order_history,
+}
+
+
+def render_tool_reply(intent: str, result: dict) -> str:
+    return TEMPLATES[intent](result)
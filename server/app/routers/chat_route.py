@@ -0,0 +1,61 @@
+import json
+
+from app.config.authentication import get_current_user_id
+from app.config.database import get_db
+from app.config.scheduler import scheduler
+from app.schema.chat_schema import ChatRequest, ChatResponse
+from app.services.chat_service import ChatService
+from app.services.conversation_service import roll_up_conversation_summary
+from fastapi import APIRouter, BackgroundTasks, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+route = APIRouter(prefix="/chat", tags=["Chat"])
+
+
+def get_chat_service(db: Session = Depends(get_db)):
+    return ChatService(db)
+
+
+@route.post("", response_model=ChatResponse)
+async def chat(
+    request: ChatRequest,
+    background_tasks: BackgroundTasks,
+    user_id: int = Depends(get_current_user_id),
+    service: ChatService = Depends(get_chat_service),
+):
+    result = await service.chat(user_id, request.message, request.conversation_id)
+    conversation_id = result["conversation_id"]
+    if not scheduler.submit("conversation_summary", conversation_id):
+        background_tasks.add_task(roll_up_conversation_summary, conversation_id)
+    return result
+
+
+@route.post("/stream")
+async def chat_stream(
+    request: ChatRequest,
+    user_id: int = Depends(get_current_user_id),
+    service: ChatService = Depends(get_chat_service),
+):
+    """Server-sent events: one ``data:`` event per chunk of the reply, then
+    ``[DONE]``. The conversation id is in the ``X-Conversation-Id`` header."""
+    conversation_id, chunks = await service.stream_chat(
+        user_id, request.message, request.conversation_id
+    )
+
+    async def events():
+        async for chunk in chunks:
+            yield f"data: {json.dumps({'content': chunk})}\n\n"
+        yield "data: [DONE]\n\n"
+        # The turn is persisted once the reply is complete
+        scheduler.submit("conversation_summary", conversation_id)
+
+    background_tasks = BackgroundTasks()
+    if not scheduler.running:
+        background_tasks.add_task(roll_up_conversation_summary, conversation_id)
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"X-Conversation-Id": str(conversation_id)},
+        background=background_tasks,
+    )
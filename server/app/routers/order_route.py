@@ -0,0 +1,44 @@
+from typing import Optional
+
+from app.config.authentication import get_current_user_id
+from app.config.database import get_db, get_user_read_db
+from app.schema.order_schema import (
+    LatestOrderStatusResponse,
+    OrderHistoryResponse,
+)
+from app.services.order_service import MAX_HISTORY_PAGE_SIZE, OrderService
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+route = APIRouter(prefix="/orders", tags=["Orders"])
+
+
+def get_order_service(db: Session = Depends(get_db)):
+    return OrderService(db)
+
+
+# History can lag a replica; the latest-status cache is only ever filled
+# from the primary, since it's invalidated by primary commits
+def get_order_read_service(db: Session = Depends(get_user_read_db)):
+    return OrderService(db)
+
+
+@route.get("/history", response_model=OrderHistoryResponse)
+def order_history(
+    limit: int = Query(20, ge=1, le=MAX_HISTORY_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    user_id: int = Depends(get_current_user_id),
+    service: OrderService = Depends(get_order_read_service),
+):
+    return service.get_order_history(user_id, limit=limit, cursor=cursor)
+
+
+@route.get("/latest", response_model=LatestOrderStatusResponse)
+def latest_order_status(
+    user_id: int = Depends(get_current_user_id),
+    service: OrderService = Depends(get_order_service),
+):
+    status = service.get_latest_order_status(user_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="No orders found")
+    return status
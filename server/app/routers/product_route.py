@@ -0,0 +1,62 @@
+from typing import List, Optional
+
+from app.config.compression import catalog_responses
+from app.config.database import get_db, get_read_db
+from app.config.settings import settings
+from app.schema.product_schema import ProductListResponse, ProductResponse
+from app.services.popularity import popularity_index
+from app.services.product_service import MAX_PRODUCT_PAGE_SIZE, ProductService
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.orm import Session
+
+route = APIRouter(prefix="/products", tags=["Products"])
+
+
+def get_product_service(db: Session = Depends(get_read_db)):
+    return ProductService(db)
+
+
+# Cached catalog pages outlive replica lag: a write invalidates them on
+# commit, so the rebuild must read from the primary. Only misses query it.
+def get_catalog_service(db: Session = Depends(get_db)):
+    return ProductService(db)
+
+
+@route.get("", response_model=ProductListResponse)
+def list_products(
+    request: Request,
+    limit: int = Query(20, ge=1, le=MAX_PRODUCT_PAGE_SIZE),
+    cursor: Optional[int] = None,
+    sort: str = Query("id", pattern="^(id|popular)$"),
+    service: ProductService = Depends(get_catalog_service),
+):
+    # Served precompressed; the popular order changes with its own reloads
+    ranking = popularity_index.version if sort == "popular" else None
+    return catalog_responses.respond(
+        request,
+        ("products", limit, cursor, sort, ranking),
+        lambda: service.list_products(limit=limit, cursor=cursor, sort=sort),
+    )
+
+
+@route.get("/search", response_model=List[ProductResponse])
+def search_products(
+    q: str = Query(min_length=1, max_length=200),
+    k: int = Query(5, ge=1, le=50),
+    service: ProductService = Depends(get_product_service),
+):
+    return service.search(q, k=k)
+
+
+@route.get("/{product_id}/bought-together", response_model=List[ProductResponse])
+def bought_together(
+    product_id: int,
+    k: int = Query(5, ge=1, le=settings.co_purchase_top_k),
+    service: ProductService = Depends(get_product_service),
+):
+    return service.bought_together(product_id, k=k)
+
+
+@route.get("/{product_id}", response_model=ProductResponse)
+def get_product(product_id: int, service: ProductService = Depends(get_product_service)):
+    return service.get_product(product_id)
@@ -1,6 +1,16 @@
-from app.routers import auth_route
+from app.routers import (
+    auth_route,
+    chat_route,
+    order_route,
+    product_route,
+    status_event_route,
+)
 from fastapi import APIRouter
 
 api_router = APIRouter(prefix="/api/v1")
 
 api_router.include_router(auth_route.route)
+api_router.include_router(chat_route.route)
+api_router.include_router(order_route.route)
+api_router.include_router(product_route.route)
+api_router.include_router(status_event_route.route)
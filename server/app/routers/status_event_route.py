@@ -0,0 +1,40 @@
+import hmac
+from typing import Optional
+
+from app.config.settings import settings
+from app.schema.status_event_schema import (
+    StatusEventBatchRequest,
+    StatusEventBatchResponse,
+)
+from app.services.status_ingestion_service import status_update_queue
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException
+
+route = APIRouter(prefix="/status-events", tags=["Status Events"])
+
+
+def verify_webhook_secret(x_webhook_secret: Optional[str] = Header(None)):
+    if settings.status_webhook_secret and not hmac.compare_digest(
+        x_webhook_secret or "", settings.status_webhook_secret
+    ):
+        raise HTTPException(status_code=401, detail="Invalid webhook secret")
+
+
+@route.post(
+    "",
+    status_code=202,
+    response_model=StatusEventBatchResponse,
+    dependencies=[Depends(verify_webhook_secret)],
+)
+def ingest_status_events(
+    request: StatusEventBatchRequest, background_tasks: BackgroundTasks
+):
+    accepted, duplicates = status_update_queue.enqueue(
+        (event.kind, event.reference, event.status) for event in request.events
+    )
+    # Bursts of requests share a flush: whichever runs first drains them all
+    background_tasks.add_task(status_update_queue.flush)
+    return {
+        "accepted": accepted,
+        "duplicates": duplicates,
+        "pending": len(status_update_queue),
+    }
@@ -0,0 +1,77 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class OrderProductResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: Optional[str]
+    price: Optional[Decimal]
+
+
+class OrderItemResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    product_id: Optional[int]
+    quantity: Optional[int]
+    price: Optional[Decimal]
+    product: Optional[OrderProductResponse]
+
+
+class PaymentResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    amount: Optional[Decimal]
+    payment_method: Optional[str]
+    status: Optional[str]
+    transaction_id: Optional[str]
+    created_at: Optional[datetime]
+
+
+class ShipmentResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    city: Optional[str]
+    state: Optional[str]
+    country: Optional[str]
+    status: Optional[str]
+    tracking_number: Optional[str]
+    shipped_at: Optional[datetime]
+    delivered_at: Optional[datetime]
+
+
+class OrderResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    total_amount: Optional[Decimal]
+    status: Optional[str]
+    created_at: Optional[datetime]
+    items: List[OrderItemResponse] = []
+    payments: List[PaymentResponse] = []
+    shipments: List[ShipmentResponse] = []
+
+
+class OrderHistoryResponse(BaseModel):
+    orders: List[OrderResponse]
+    next_cursor: Optional[str]
+
+
+class LatestOrderStatusResponse(BaseModel):
+    order_id: int
+    status: Optional[str]
+    total_amount: Optional[Decimal]
+    created_at: Optional[datetime]
+    payment_status: Optional[str]
+    payment_method: Optional[str]
+    shipment_status: Optional[str]
+    tracking_number: Optional[str]
+    shipped_at: Optional[datetime]
+    delivered_at: Optional[datetime]
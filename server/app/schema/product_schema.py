@@ -0,0 +1,34 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class ProductResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: Optional[str]
+    description: Optional[str]
+    price: Optional[Decimal]
+    stock: Optional[int]
+    created_at: Optional[datetime]
+
+
+class ProductListResponse(BaseModel):
+    products: List[ProductResponse]
+    next_cursor: Optional[int]
+
+
+class CartItemResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    quantity: Optional[int]
+    product: ProductResponse
+
+
+class CartResponse(BaseModel):
+    items: List[CartItemResponse]
+    total_amount: Decimal
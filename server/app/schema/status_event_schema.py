@@ -0,0 +1,19 @@
+from typing import List, Literal
+
+from pydantic import BaseModel, Field
+
+
+class StatusEventRequest(BaseModel):
+    kind: Literal["payment", "shipment"]
+    reference: str = Field(min_length=1, max_length=255)  # transaction_id / tracking_number
+    status: str = Field(min_length=1, max_length=50)
+
+
+class StatusEventBatchRequest(BaseModel):
+    events: List[StatusEventRequest] = Field(min_length=1, max_length=10_000)
+
+
+class StatusEventBatchResponse(BaseModel):
+    accepted: int
+    duplicates: int
+    pending: int
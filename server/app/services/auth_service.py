@@ -40,7 +40,7 @@ class AuthService:
             self.db.add(refresh_token_obj)
             self.db.commit()
         except Exception as e:
-            logger.error(f"Failed to store refresh token: {str(e)}")
+            logger.error("Failed to store refresh token: %s", e)
             self.db.rollback()
 
         return {
@@ -72,11 +72,11 @@ class AuthService:
 
         except IntegrityError:
             self.db.rollback()
-            logger.warning(f"Email already registered: {email}")
+            logger.warning("Email already registered: %s", email)
             raise HTTPException(status_code=400, detail="Email already registered")
         except Exception as e:
             self.db.rollback()
-            logger.error(f"User creation failed: {str(e)}")
+            logger.error("User creation failed: %s", e)
             raise HTTPException(status_code=500, detail="User creation failed")
 
         return self.user_with_token(new_user)
@@ -86,7 +86,7 @@ class AuthService:
 
         # Always run verification to avoid timing attacks
         if not user or not verify_password(password, user.hashed_password):
-            logger.warning(f"Failed login attempt for email: {email}")
+            logger.warning("Failed login attempt for email: %s", email)
             raise HTTPException(
                 status_code=400, detail="Email or Password are incorrect"
             )
@@ -107,11 +107,11 @@ class AuthService:
 
             token_obj.is_revoked = True
             self.db.commit()
-            logger.info(f"Token revoked for user_id: {token_obj.user_id}")
+            logger.info("Token revoked for user_id: %s", token_obj.user_id)
             return {"message": "Logged out successfully"}
         except Exception as e:
             self.db.rollback()
-            logger.error(f"Logout failed: {str(e)}")
+            logger.error("Logout failed: %s", e)
             raise HTTPException(status_code=500, detail="Logout failed")
 
     def refresh_access_token(self, refresh_token: str):
@@ -144,6 +144,6 @@ class AuthService:
             data={"sub": user.email, "user_id": user.id}
         )
 
-        logger.info(f"Access token refreshed for user_id: {user.id}")
+        logger.info("Access token refreshed for user_id: %s", user.id)
 
         return {"access_token": new_access_token, "token_type": "bearer"}
@@ -0,0 +1,201 @@
+import logging
+import time
+from typing import AsyncIterator, Optional, Tuple
+
+from app.config.llms import LLM
+from app.config.settings import settings
+from app.rag.agent_executor import AgentExecutor
+from app.rag.agent_tools import PERSONAL_TOOLS, build_agent_tools
+from app.rag.embedder import embed_query
+from app.rag.intent_router import INTENT_TOOLS, intent_router, normalize
+from app.rag.prompt_builder import PromptBuilder
+from app.rag.prompts import SYSTEM_PROMPT
+from app.rag.semantic_cache import semantic_cache
+from app.rag.single_flight import SingleFlight
+from app.rag.templates import render_tool_reply
+from app.services.conversation_service import ConversationService
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+# Identical first-turn questions arriving together share one agent run.
+# Keys hold only the intent and the normalized message; a run that calls a
+# personal tool marks itself private and the waiting callers run their own.
+chat_flight = SingleFlight("chat")
+chat_stream_flight = SingleFlight("chat_stream")
+
+# Questions about the user's own orders or cart: never shared, whichever
+# tools the agent ended up calling (or not)
+PERSONAL_INTENTS = {
+    intent for intent, tool in INTENT_TOOLS.items() if tool in PERSONAL_TOOLS
+}
+
+
+class ChatService:
+    def __init__(self, db):
+        self.db = db
+        self.conversations = ConversationService(db)
+
+    async def _prepare(self, user_id: int, message: str, conversation_id):
+        context = await run_in_threadpool(
+            self.conversations.load_context, user_id, conversation_id
+        )
+        tools = build_agent_tools(user_id)
+        decision = None
+        if settings.intent_router_enabled:
+            decision = await run_in_threadpool(intent_router.classify, message)
+        return context, tools, decision
+
+    async def _routed_reply(self, tools, decision) -> Optional[str]:
+        if decision is None or not intent_router.should_route(decision):
+            return None
+        tool = next(t for t in tools if t.name == decision.tool)
+        result = await run_in_threadpool(tool.invoke, {})
+        return render_tool_reply(decision.intent, result)
+
+    async def _cached_reply(self, user_id, context, message, intent):
+        """Return ``(vector, reply)``; ``reply`` is None on a miss."""
+        # Only first turns are stored (see _finish_agent): a follow-up
+        # ("the blue one?") must not match someone's self-contained question
+        if not settings.semantic_cache_enabled or context.messages:
+            return None, None
+        started = time.perf_counter()
+        vector = await run_in_threadpool(embed_query, normalize(message))
+        reply = semantic_cache.lookup(vector, intent, user_id)
+        if reply is not None:
+            semantic_cache.record(True, (time.perf_counter() - started) * 1000)
+        return vector, reply
+
+    def _new_agent(self, tools, flight=None) -> Tuple[AgentExecutor, PromptBuilder]:
+        # System + summary + recent turns + new message, each within its
+        # token budget, so prompt size stays bounded however long the
+        # conversation runs
+        prompt = PromptBuilder()
+        agent = AgentExecutor(
+            LLM.invoke(), tools, prompt_builder=prompt, flight=flight
+        )
+        return agent, prompt
+
+    def _finish_agent(self, agent, prompt, user_id, context, intent, vector, reply):
+        logger.info("Prompt tokens per section: %s", prompt.report())
+        if agent.trace:
+            logger.info(
+                "Chat turn tools saved %.1f ms over sequential execution: %s",
+                sum(step["saved_ms"] for step in agent.trace),
+                agent.trace,
+            )
+        # Follow-up turns can lean on earlier context ("the blue one?"),
+        # so only self-contained first turns are stored; and no reply built
+        # around a failed tool call ("your order lookup failed")
+        if vector is not None and not context.messages and not agent.failed_tools:
+            personal = (
+                intent in PERSONAL_INTENTS or bool(agent.called_tools & PERSONAL_TOOLS)
+            )
+            semantic_cache.store(
+                vector,
+                intent,
+                user_id if personal else None,
+                reply,
+                agent.cited_product_ids,
+            )
+
+    async def chat(
+        self, user_id: int, message: str, conversation_id: Optional[int] = None
+    ):
+        started = time.perf_counter()
+        context, tools, decision = await self._prepare(
+            user_id, message, conversation_id
+        )
+        reply = await self._routed_reply(tools, decision)
+        routed = reply is not None
+        if not routed:
+            reply = await self._agent_reply(user_id, context, message, tools, decision)
+
+        if decision is not None:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            intent_router.record(decision, routed, elapsed_ms)
+
+        await run_in_threadpool(
+            self.conversations.append_turn, context.conversation, message, reply
+        )
+        return {"conversation_id": context.conversation.id, "reply": reply}
+
+    async def _agent_reply(self, user_id, context, message, tools, decision):
+        started = time.perf_counter()
+        intent = decision.intent if decision else "chat"
+        vector, reply = await self._cached_reply(user_id, context, message, intent)
+        if reply is not None:
+            return reply
+
+        async def run_agent(flight=None):
+            agent, prompt = self._new_agent(tools, flight)
+            messages = prompt.build(SYSTEM_PROMPT, context, message)
+            reply, _ = await agent.run(messages)
+            self._finish_agent(agent, prompt, user_id, context, intent, vector, reply)
+            return reply
+
+        if context.messages or intent in PERSONAL_INTENTS:
+            reply = await run_agent()
+        else:
+            reply = await chat_flight.do((intent, normalize(message)), run_agent)
+
+        if vector is not None:
+            semantic_cache.record(False, (time.perf_counter() - started) * 1000)
+        return reply
+
+    async def stream_chat(
+        self, user_id: int, message: str, conversation_id: Optional[int] = None
+    ) -> Tuple[int, AsyncIterator[str]]:
+        """Like ``chat`` but returns the conversation id and an iterator
+        over the reply's text; the turn is saved once the reply is done."""
+        context, tools, decision = await self._prepare(
+            user_id, message, conversation_id
+        )
+        return context.conversation.id, self._stream_reply(
+            user_id, context, message, tools, decision
+        )
+
+    async def _stream_reply(self, user_id, context, message, tools, decision):
+        started = time.perf_counter()
+        intent = decision.intent if decision else "chat"
+        reply = await self._routed_reply(tools, decision)
+        routed = reply is not None
+        if not routed:
+            vector, reply = await self._cached_reply(
+                user_id, context, message, intent
+            )
+
+        if reply is not None:
+            yield reply
+        else:
+
+            async def produce(flight=None):
+                agent, prompt = self._new_agent(tools, flight)
+                messages = prompt.build(SYSTEM_PROMPT, context, message)
+                chunks = []
+                async for chunk in agent.stream(messages):
+                    chunks.append(chunk)
+                    yield chunk
+                self._finish_agent(
+                    agent, prompt, user_id, context, intent, vector, "".join(chunks)
+                )
+
+            if context.messages or intent in PERSONAL_INTENTS:
+                stream = produce()
+            else:
+                key = (intent, normalize(message))
+                stream = chat_stream_flight.stream(key, produce)
+            chunks = []
+            async for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+            reply = "".join(chunks)
+            if vector is not None:
+                semantic_cache.record(False, (time.perf_counter() - started) * 1000)
+
+        if decision is not None:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            intent_router.record(decision, routed, elapsed_ms)
+        await run_in_threadpool(
+            self.conversations.append_turn, context.conversation, message, reply
+        )
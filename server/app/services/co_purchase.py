@@ -0,0 +1,239 @@
+"""Frequently bought together: co-purchase counts from order history.
+
+Two products co-occur once per order containing both. Counts live in
+memory as one sorted array of ``row << 32 | column`` keys with a parallel
+array of counts, and each product's top ``co_purchase_top_k`` neighbours
+are precomputed into CSR arrays (``indptr``, ``neighbours``, ``counts``),
+so a lookup is a slice: O(k), no query. The index is built from
+``order_items`` once per process and then kept current from the order
+items added since, on a schedule and whenever an order is committed; an
+update re-ranks only the products it touched. Items are read by id, and an
+id can commit after a higher one was read, so a periodic full recount picks
+up what the updates skipped.
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from typing import List, Tuple
+
+import numpy as np
+from app.config.change_bus import ChangeSet, change_bus
+from app.config.database import SessionLocal
+from app.config.scheduler import scheduler
+from app.config.settings import settings
+from app.models.base import OrderItem
+
+logger = logging.getLogger(__name__)
+
+ORDER_ITEM_BATCH = 2000
+
+
+class CoPurchaseIndex:
+    def __init__(
+        self,
+        top_k: int = settings.co_purchase_top_k,
+        max_basket: int = settings.co_purchase_max_basket,
+    ):
+        self.top_k = top_k
+        # Bigger (bulk) orders pair everything with everything and say
+        # little about what goes together; they're left out
+        self.max_basket = max_basket
+        self.last_order_item_id = 0
+        self.loaded = False
+        self._keys = np.zeros(0, dtype=np.int64)
+        self._counts = np.zeros(0, dtype=np.int64)
+        # (indptr, neighbours, counts), swapped in whole
+        self._top = (
+            np.zeros(1, dtype=np.int64),
+            np.zeros(0, dtype=np.int64),
+            np.zeros(0, dtype=np.int64),
+        )
+        self._lock = threading.Lock()
+
+    def neighbours(self, product_id: int, k: int = 5) -> List[Tuple[int, int]]:
+        """``(product_id, orders together)`` pairs, most frequent first."""
+        indptr, neighbours, counts = self._top
+        if product_id < 0 or product_id + 1 >= len(indptr):
+            return []
+        start = indptr[product_id]
+        end = min(indptr[product_id + 1], start + k)
+        return list(zip(neighbours[start:end].tolist(), counts[start:end].tolist()))
+
+    def update(self, db) -> int:
+        """Count the order items added since the last update; returns how
+        many were read. A new item pairs with the rest of its order,
+        including items counted by earlier updates."""
+        read = 0
+        rows, columns = [], []
+        with self._lock:
+            # Advanced only once the batch's pairs are merged, so a failed
+            # update is retried whole
+            mark = self.last_order_item_id
+            while True:
+                items = (
+                    db.query(OrderItem.id, OrderItem.order_id, OrderItem.product_id)
+                    .filter(OrderItem.id > mark)
+                    .order_by(OrderItem.id)
+                    .limit(ORDER_ITEM_BATCH)
+                    .all()
+                )
+                if not items:
+                    break
+                new = defaultdict(set)
+                for _, order_id, product_id in items:
+                    if order_id is not None and product_id is not None:
+                        new[order_id].add(product_id)
+                counted = defaultdict(set)
+                if new:
+                    for order_id, product_id in db.query(
+                        OrderItem.order_id, OrderItem.product_id
+                    ).filter(
+                        OrderItem.order_id.in_(new),
+                        OrderItem.id <= mark,
+                    ):
+                        counted[order_id].add(product_id)
+                self._pairs(new, counted, rows, columns)
+                mark = items[-1][0]
+                read += len(items)
+                if len(items) < ORDER_ITEM_BATCH:
+                    break
+            if rows:
+                touched = self._merge(rows, columns)
+                if self.loaded:
+                    self._top = self._update_top(touched)
+            if not self.loaded:
+                self._top = self._build_top()
+            self.last_order_item_id = mark
+            self.loaded = True
+        return read
+
+    def _pairs(self, new: dict, counted: dict, rows: list, columns: list):
+        for order_id, products in new.items():
+            before = counted.get(order_id, set())
+            added = products - before
+            if not added or len(before) + len(added) > self.max_basket:
+                continue
+            for product_id in added:
+                for other in added:
+                    if other != product_id:
+                        rows.append(product_id)
+                        columns.append(other)
+                for other in before:
+                    rows += (product_id, other)
+                    columns += (other, product_id)
+
+    def _merge(self, rows: list, columns: list) -> np.ndarray:
+        """Add a batch of pairs; returns the products (rows) it touched.
+
+        Only the batch is sorted: keys already present are counted in
+        place and new ones inserted at their sorted position.
+        """
+        keys, added = np.unique(
+            np.asarray(rows, dtype=np.int64) << 32
+            | np.asarray(columns, dtype=np.int64),
+            return_counts=True,
+        )
+        at = np.searchsorted(self._keys, keys)
+        found = at < len(self._keys)
+        found[found] = self._keys[at[found]] == keys[found]
+        self._counts[at[found]] += added[found]
+        new = ~found
+        self._keys = np.insert(self._keys, at[new], keys[new])
+        self._counts = np.insert(self._counts, at[new], added[new])
+        return np.unique(keys >> 32)
+
+    def _build_top(self):
+        return self._csr(*self._top_of(self._keys, self._counts))
+
+    def _update_top(self, touched: np.ndarray):
+        """``_top`` with only the ``touched`` products re-ranked."""
+        indptr, neighbours, counts = self._top
+        old_rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        keep = ~np.isin(old_rows, touched)
+        # Each touched product's pairs are one run of the sorted keys
+        starts = np.searchsorted(self._keys, touched << 32)
+        lengths = np.searchsorted(self._keys, (touched + 1) << 32) - starts
+        picked = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        picked += np.arange(len(picked))
+        rows, top_columns, top_counts = self._top_of(
+            self._keys[picked], self._counts[picked]
+        )
+        kept_rows = old_rows[keep]
+        at = np.searchsorted(kept_rows, rows)
+        return self._csr(
+            np.insert(kept_rows, at, rows),
+            np.insert(neighbours[keep], at, top_columns),
+            np.insert(counts[keep], at, top_counts),
+        )
+
+    def _top_of(self, keys: np.ndarray, counts: np.ndarray):
+        """Each product's ``top_k`` (rows, columns, counts), by product."""
+        rows = keys >> 32
+        columns = keys & 0xFFFFFFFF
+        # By product, then count descending, then neighbour id
+        order = np.lexsort((columns, -counts, rows))
+        rows, columns, counts = rows[order], columns[order], counts[order]
+        rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+        keep = rank < self.top_k
+        return rows[keep], columns[keep], counts[keep]
+
+    @staticmethod
+    def _csr(rows: np.ndarray, columns: np.ndarray, counts: np.ndarray):
+        size = int(rows[-1]) + 1 if len(rows) else 0
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=size), out=indptr[1:])
+        return indptr, columns, counts
+
+    def recount(self, db) -> int:
+        """Rebuild from all of ``order_items`` and swap the result in;
+        returns how many items were read."""
+        fresh = CoPurchaseIndex(self.top_k, self.max_basket)
+        read = fresh.update(db)
+        with self._lock:
+            # Updates resume from the fresh index's mark, so items read by
+            # this one since are counted again, once
+            self._keys, self._counts = fresh._keys, fresh._counts
+            self._top = fresh._top
+            self.last_order_item_id = fresh.last_order_item_id
+            self.loaded = True
+        return read
+
+    def stats(self) -> dict:
+        indptr, neighbours, _ = self._top
+        return {
+            "pairs": len(self._keys),
+            "products": int(np.count_nonzero(np.diff(indptr))),
+            "neighbours": len(neighbours),
+            "last_order_item_id": self.last_order_item_id,
+        }
+
+
+co_purchase_index = CoPurchaseIndex()
+
+
+def update_co_purchase():
+    db = SessionLocal()
+    try:
+        read = co_purchase_index.update(db)
+    finally:
+        db.close()
+    if read:
+        logger.info("Co-purchase index read %d order items", read)
+
+
+def recount_co_purchase():
+    db = SessionLocal()
+    try:
+        read = co_purchase_index.recount(db)
+    finally:
+        db.close()
+    logger.info("Co-purchase index recounted %d order items", read)
+
+
+def _queue_update(changes: ChangeSet):
+    if changes.inserted.get("orders") and scheduler.running:
+        scheduler.submit("co_purchase_update")
+
+
+change_bus.subscribe(_queue_update, tables={"orders"})
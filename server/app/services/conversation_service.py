@@ -0,0 +1,131 @@
+import logging
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+
+from app.config.database import SessionLocal
+from app.config.llms import LLM
+from app.config.settings import settings
+from app.models.base import Conversation, ConversationMessage
+from app.rag.prompts import SUMMARY_PROMPT
+from fastapi import HTTPException
+from sqlalchemy import and_, update
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationContext(NamedTuple):
+    conversation: Conversation
+    summary: Optional[str]
+    messages: List[ConversationMessage]  # oldest first
+
+
+def window_size() -> int:
+    """Messages kept verbatim: one user and one assistant message per turn."""
+    return settings.memory_window_turns * 2
+
+
+class ConversationService:
+    def __init__(self, db):
+        self.db = db
+
+    def load_context(
+        self, user_id: int, conversation_id: Optional[int]
+    ) -> ConversationContext:
+        if conversation_id is None:
+            conversation = Conversation(user_id=user_id, summarized_upto_id=0)
+            self.db.add(conversation)
+            self.db.commit()
+            return ConversationContext(conversation, None, [])
+
+        # One query over ix_conversation_messages_conversation_id_id: the
+        # conversation row plus the newest unsummarized messages
+        rows = (
+            self.db.query(Conversation, ConversationMessage)
+            .outerjoin(
+                ConversationMessage,
+                and_(
+                    ConversationMessage.conversation_id == Conversation.id,
+                    ConversationMessage.id > Conversation.summarized_upto_id,
+                ),
+            )
+            .filter(Conversation.id == conversation_id, Conversation.user_id == user_id)
+            .order_by(ConversationMessage.id.desc())
+            .limit(window_size())
+            .all()
+        )
+        if not rows:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+
+        conversation = rows[0][0]
+        messages = [message for _, message in reversed(rows) if message is not None]
+        return ConversationContext(conversation, conversation.summary, messages)
+
+    def append_turn(self, conversation: Conversation, message: str, reply: str):
+        self.db.add_all(
+            [
+                ConversationMessage(
+                    conversation_id=conversation.id, role="user", content=message
+                ),
+                ConversationMessage(
+                    conversation_id=conversation.id, role="assistant", content=reply
+                ),
+            ]
+        )
+        conversation.updated_at = datetime.utcnow()
+        self.db.commit()
+
+    def roll_up_summary(self, conversation_id: int):
+        """Fold messages that fell out of the window into the summary."""
+        conversation = self.db.get(Conversation, conversation_id)
+        if not conversation:
+            return
+
+        pending = (
+            self.db.query(ConversationMessage)
+            .filter(
+                ConversationMessage.conversation_id == conversation_id,
+                ConversationMessage.id > conversation.summarized_upto_id,
+            )
+            .order_by(ConversationMessage.id)
+            .all()
+        )
+        overflow = pending[: max(0, len(pending) - window_size())]
+        if not overflow:
+            return
+
+        prompt = SUMMARY_PROMPT.format(
+            max_chars=settings.memory_summary_max_chars,
+            summary=conversation.summary or "(none)",
+            messages="\n".join(f"{m.role}: {m.content}" for m in overflow),
+        )
+        summary = LLM.invoke().invoke(prompt).content
+        summary = summary[: settings.memory_summary_max_chars]
+
+        # Guarded on the old watermark so concurrent roll-ups can't regress it
+        result = self.db.execute(
+            update(Conversation)
+            .where(
+                Conversation.id == conversation_id,
+                Conversation.summarized_upto_id == conversation.summarized_upto_id,
+            )
+            .values(summary=summary, summarized_upto_id=overflow[-1].id)
+        )
+        self.db.commit()
+        if result.rowcount:
+            logger.info(
+                "Summarized %d messages of conversation %d",
+                len(overflow),
+                conversation_id,
+            )
+
+
+def roll_up_conversation_summary(conversation_id: int):
+    """Background-task entry point; runs after the chat response is sent."""
+    db = SessionLocal()
+    try:
+        ConversationService(db).roll_up_summary(conversation_id)
+    except Exception:
+        db.rollback()
+        logger.exception("Summary roll-up failed for conversation %d", conversation_id)
+    finally:
+        db.close()
@@ -0,0 +1,213 @@
+"""Maintenance work kept off the request path; see ``app.config.scheduler``."""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Set, Tuple
+
+from app.config.authentication import REFRESH_TOKEN_EXPIRE_DAYS
+from app.config.change_bus import ChangeSet, OutboxTailer, change_bus, purge_outbox
+from app.config.database import SessionLocal
+from app.config.scheduler import scheduler
+from app.config.settings import settings
+from app.models.base import Product, RefreshToken
+from app.rag.retriever import get_product_retriever
+from app.rag.semantic_cache import semantic_cache
+from app.services.co_purchase import recount_co_purchase, update_co_purchase
+from app.services.conversation_service import ConversationService
+from app.services.popularity import (
+    popularity_index,
+    refresh_popularity,
+    update_popularity,
+)
+from app.services.status_ingestion_service import status_update_queue
+from sqlalchemy import or_
+
+logger = logging.getLogger(__name__)
+
+TOKEN_DELETE_BATCH = 1000
+OUTBOX_CLEANUP_SECONDS = 3600.0
+
+
+def purge_refresh_tokens():
+    """Delete revoked and expired refresh tokens, in short batches so the
+    table isn't locked for long."""
+    cutoff = datetime.utcnow() - timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    purged = 0
+    db = SessionLocal()
+    try:
+        while True:
+            ids = [
+                token_id
+                for (token_id,) in db.query(RefreshToken.id)
+                .filter(
+                    or_(
+                        RefreshToken.is_revoked.is_(True),
+                        RefreshToken.created_at < cutoff,
+                    )
+                )
+                .limit(TOKEN_DELETE_BATCH)
+            ]
+            if not ids:
+                break
+            db.query(RefreshToken).filter(RefreshToken.id.in_(ids)).delete(
+                synchronize_session=False
+            )
+            db.commit()
+            purged += len(ids)
+    finally:
+        db.close()
+    if purged:
+        logger.info("Purged %d refresh tokens", purged)
+
+
+class ProductChanges:
+    """Product ids changed since the last re-index."""
+
+    def __init__(self):
+        self._changed: Set[int] = set()
+        self._deleted: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def add(self, changed: Set[int], deleted: Set[int]):
+        with self._lock:
+            self._changed |= changed
+            self._changed -= deleted
+            self._deleted |= deleted
+
+    def drain(self) -> Tuple[Set[int], Set[int]]:
+        with self._lock:
+            changed, self._changed = self._changed, set()
+            deleted, self._deleted = self._deleted, set()
+        return changed, deleted
+
+
+product_changes = ProductChanges()
+
+
+EMBEDDED_COLUMNS = {"name", "description"}
+
+
+def _queue_product_changes(changes: ChangeSet):
+    if not scheduler.running:
+        return
+    updated = changes.updated.get("products", {})
+    changed = changes.inserted.get("products", set()) | {
+        product_id
+        for product_id, columns in updated.items()
+        if columns & EMBEDDED_COLUMNS
+    }
+    product_changes.add(changed, changes.removed("products"))
+
+
+change_bus.subscribe(_queue_product_changes, tables={"products"})
+
+
+def reindex_changed_products():
+    """Re-embed created or renamed products and drop deleted ones from the
+    vector store. Changes committed by other processes arrive through the
+    change outbox when it is on; without it, Chroma (persisted on disk)
+    still serves every worker on the host, the in-memory store only this
+    one. With the outbox and Chroma every worker sees every change, so the
+    job is a singleton and one of them re-embeds into the shared store.
+    """
+    changed, deleted = product_changes.drain()
+    if not changed and not deleted:
+        return
+    try:
+        retriever = get_product_retriever()
+        retriever.remove_products(sorted(deleted))
+        if changed:
+            db = SessionLocal()
+            try:
+                products = db.query(Product).filter(Product.id.in_(changed)).all()
+            finally:
+                db.close()
+            retriever.index_products(products)
+    except Exception:
+        # Retry with the next run
+        product_changes.add(changed, deleted)
+        raise
+    logger.info("Re-indexed %d products, removed %d", len(changed), len(deleted))
+
+
+def summarize_conversation(conversation_id: int):
+    db = SessionLocal()
+    try:
+        ConversationService(db).roll_up_summary(conversation_id)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def refresh_caches():
+    purged = semantic_cache.purge_expired()
+    if purged:
+        logger.info("Semantic cache purged %d expired entries", purged)
+
+
+def register_maintenance_jobs():
+    if "token_cleanup" in scheduler.jobs:
+        return  # create_app() already ran in this process
+    scheduler.register(
+        "token_cleanup",
+        purge_refresh_tokens,
+        every=settings.job_token_cleanup_seconds,
+        singleton=True,
+    )
+    scheduler.register(
+        "product_reindex",
+        reindex_changed_products,
+        every=settings.job_product_reindex_seconds,
+        singleton=settings.change_outbox_enabled
+        and settings.vector_store_type != "memory",
+    )
+    scheduler.register(
+        "conversation_summary",
+        summarize_conversation,
+        concurrency=settings.job_summary_concurrency,
+    )
+    scheduler.register(
+        "cache_refresh", refresh_caches, every=settings.job_cache_refresh_seconds
+    )
+    scheduler.register(
+        "popularity_update",
+        update_popularity,
+        every=settings.popularity_update_seconds,
+        singleton=True,
+    )
+    scheduler.register(
+        "popularity_refresh",
+        refresh_popularity,
+        every=settings.popularity_refresh_seconds,
+    )
+    scheduler.register("popularity_stock", popularity_index.apply_stock_changes)
+    scheduler.register(
+        "co_purchase_update",
+        update_co_purchase,
+        every=settings.co_purchase_update_seconds,
+    )
+    scheduler.register(
+        "co_purchase_recount",
+        recount_co_purchase,
+        every=settings.co_purchase_recount_seconds,
+    )
+    scheduler.register(
+        "status_event_retry",
+        status_update_queue.retry,
+        every=settings.status_event_retry_seconds,
+    )
+    if settings.change_outbox_enabled:
+        scheduler.register(
+            "change_outbox_tail",
+            OutboxTailer().poll,
+            every=settings.change_outbox_poll_seconds,
+        )
+        scheduler.register(
+            "change_outbox_cleanup",
+            purge_outbox,
+            every=OUTBOX_CLEANUP_SECONDS,
+            singleton=True,
+        )
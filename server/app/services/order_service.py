@@ -0,0 +1,124 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import Optional, Tuple
+
+from app.models.base import Order, OrderItem
+from app.schema.order_schema import (
+    LatestOrderStatusResponse,
+    OrderHistoryResponse,
+    OrderResponse,
+)
+from app.services.order_status_cache import latest_order_cache
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import selectinload
+
+MAX_HISTORY_PAGE_SIZE = 100
+
+
+def encode_cursor(order: Order) -> str:
+    raw = f"{order.created_at.isoformat()}|{order.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, order_id = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        )
+        return datetime.fromisoformat(created_at), int(order_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+class OrderService:
+    def __init__(self, db):
+        self.db = db
+
+    def history_query(self, user_id: int):
+        """Orders for a user with the full item/payment/shipment graph.
+
+        Every relationship is loaded with ``selectinload`` so a page costs a
+        fixed number of queries (orders, items, products, payments,
+        shipments) regardless of how many orders it contains.
+        """
+        return (
+            self.db.query(Order)
+            .filter(Order.user_id == user_id)
+            .options(
+                selectinload(Order.items).selectinload(OrderItem.product),
+                selectinload(Order.payments),
+                selectinload(Order.shipments),
+            )
+            .order_by(Order.created_at.desc(), Order.id.desc())
+        )
+
+    def get_order_history(
+        self, user_id: int, limit: int = 20, cursor: Optional[str] = None
+    ) -> OrderHistoryResponse:
+        limit = max(1, min(limit, MAX_HISTORY_PAGE_SIZE))
+        query = self.history_query(user_id)
+
+        # Keyset pagination on (created_at, id), served by
+        # ix_orders_user_id_created_at instead of an OFFSET scan
+        if cursor:
+            created_at, order_id = decode_cursor(cursor)
+            query = query.filter(
+                or_(
+                    Order.created_at < created_at,
+                    and_(Order.created_at == created_at, Order.id < order_id),
+                )
+            )
+
+        orders = query.limit(limit + 1).all()
+        next_cursor = encode_cursor(orders[limit - 1]) if len(orders) > limit else None
+
+        return OrderHistoryResponse(
+            orders=[OrderResponse.model_validate(order) for order in orders[:limit]],
+            next_cursor=next_cursor,
+        )
+
+    def load_latest_order_status(
+        self, user_id: int
+    ) -> Optional[LatestOrderStatusResponse]:
+        return self._load_latest_order_status(user_id)[0]
+
+    def _load_latest_order_status(self, user_id: int):
+        """The summary and the ``(table, id)`` rows it was built from."""
+        order = (
+            self.db.query(Order)
+            .filter(Order.user_id == user_id)
+            .options(selectinload(Order.payments), selectinload(Order.shipments))
+            .order_by(Order.created_at.desc(), Order.id.desc())
+            .first()
+        )
+        if not order:
+            return None, ()
+
+        payment = max(order.payments, key=lambda p: p.id, default=None)
+        shipment = max(order.shipments, key=lambda s: s.id, default=None)
+        rows = [("orders", order.id)]
+        rows += [("payments", p.id) for p in order.payments]
+        rows += [("shipments", s.id) for s in order.shipments]
+        summary = LatestOrderStatusResponse(
+            order_id=order.id,
+            status=order.status,
+            total_amount=order.total_amount,
+            created_at=order.created_at,
+            payment_status=payment.status if payment else None,
+            payment_method=payment.payment_method if payment else None,
+            shipment_status=shipment.status if shipment else None,
+            tracking_number=shipment.tracking_number if shipment else None,
+            shipped_at=shipment.shipped_at if shipment else None,
+            delivered_at=shipment.delivered_at if shipment else None,
+        )
+        return summary, rows
+
+    def get_latest_order_status(
+        self, user_id: int
+    ) -> Optional[LatestOrderStatusResponse]:
+        """Served from ``latest_order_cache``; hits the DB only on a miss."""
+        return latest_order_cache.get_or_load(
+            user_id, lambda: self._load_latest_order_status(user_id)
+        )
@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from app.config.change_bus import ChangeSet, change_bus
+from app.config.settings import settings
+from app.models.base import Order, Payment, Shipment
+from app.schema.order_schema import LatestOrderStatusResponse
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+ORDER_TABLES = ("orders", "payments", "shipments")
+
+Row = Tuple[str, int]  # (table, primary key)
+Loaded = Tuple[Optional[LatestOrderStatusResponse], Iterable[Row]]
+
+
+class LatestOrderCache:
+    """Per-user "latest order status" summaries kept in process memory.
+
+    Entries are filled on first read and dropped after any committed write to
+    an ``Order``, ``Payment`` or ``Shipment`` row they were built from:
+    written in this process (session events), or in another one (the change
+    bus, fed by the change outbox when it is on). Entries also expire after
+    ``ttl`` seconds, which bounds staleness from writes no event maps to a
+    cached row, such as another worker placing a user's next order.
+
+    A per-user generation counter stops a read that raced with a write from
+    storing its stale result; writes whose owner isn't known (not cached)
+    bump ``_epoch`` instead, which any read in progress checks too.
+    """
+
+    def __init__(
+        self, max_entries: int = 10_000, ttl: float = settings.order_status_cache_ttl
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # user id -> (summary, expires at, rows it was built from)
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._row_owner: Dict[Row, int] = {}
+        self._generations: Dict[int, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def get_or_load(self, user_id: int, loader: Callable[[], Loaded]):
+        """``loader`` returns the summary and the ``(table, id)`` rows it
+        read."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                if entry[1] > time.monotonic():
+                    self._entries.move_to_end(user_id)
+                    return entry[0]
+                self._remove(user_id)
+            generation = self._generations.get(user_id, 0), self._epoch
+
+        summary, rows = loader()
+
+        with self._lock:
+            if (self._generations.get(user_id, 0), self._epoch) == generation:
+                self._store(user_id, summary, tuple(rows))
+        return summary
+
+    def _store(
+        self,
+        user_id: int,
+        summary: Optional[LatestOrderStatusResponse],
+        rows: Tuple[Row, ...],
+    ):
+        self._remove(user_id)
+        self._entries[user_id] = (summary, time.monotonic() + self.ttl, rows)
+        for row in rows:
+            self._row_owner[row] = user_id
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, user_id: int):
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            for row in entry[2]:
+                self._row_owner.pop(row, None)
+
+    def owner_of(self, order_id: int) -> Optional[int]:
+        return self._row_owner.get(("orders", order_id))
+
+    def invalidate(self, user_ids: Iterable[int], unknown: bool = False):
+        """Drop ``user_ids``; ``unknown`` when some write's owner wasn't
+        known, so no read in progress may store its result."""
+        with self._lock:
+            if unknown:
+                self._epoch += 1
+            for user_id in user_ids:
+                self._generations[user_id] = self._generations.get(user_id, 0) + 1
+                self._remove(user_id)
+
+    def invalidate_rows(self, rows: Iterable[Row]):
+        """Drop the owners of ``(table, id)`` rows that were written."""
+        with self._lock:
+            for row in rows:
+                owner = self._row_owner.get(row)
+                if owner is None:
+                    self._epoch += 1
+                    continue
+                self._generations[owner] = self._generations.get(owner, 0) + 1
+                self._remove(owner)
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._row_owner.clear()
+
+
+latest_order_cache = LatestOrderCache()
+
+
+def _affected_users(session: Session) -> Tuple[Set[int], bool]:
+    """Users whose cached summary a flush can change, and whether some
+    write's owner isn't known."""
+    user_ids, unknown = set(), False
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Order):
+            if obj.user_id is not None:
+                user_ids.add(obj.user_id)
+        elif isinstance(obj, (Payment, Shipment)):
+            order_id = obj.order_id
+            if order_id is None and obj.__dict__.get("order") is not None:
+                order_id = obj.order.id
+            owner = latest_order_cache.owner_of(order_id)
+            if owner is not None:
+                user_ids.add(owner)
+            else:
+                unknown = True
+    return user_ids, unknown
+
+
+def _collect(session: Session, user_ids: Set[int], unknown: bool):
+    if user_ids:
+        session.info.setdefault("latest_order_writes", set()).update(user_ids)
+    if unknown:
+        session.info["latest_order_unknown_write"] = True
+
+
+def mark_orders_written(session: Session, order_ids: Iterable[int]):
+    """Invalidate cached owners of ``order_ids`` when ``session`` commits.
+
+    For bulk ``UPDATE`` statements, which bypass the flush events below.
+    """
+    owners = [latest_order_cache.owner_of(order_id) for order_id in order_ids]
+    user_ids = {owner for owner in owners if owner is not None}
+    _collect(session, user_ids, unknown=len(user_ids) < len(owners))
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_order_writes(session, flush_context, instances):
+    _collect(session, *_affected_users(session))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_order_writes(session):
+    user_ids = session.info.pop("latest_order_writes", None)
+    unknown = session.info.pop("latest_order_unknown_write", False)
+    if user_ids or unknown:
+        latest_order_cache.invalidate(user_ids or (), unknown=unknown)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_order_writes(session):
+    session.info.pop("latest_order_writes", None)
+    session.info.pop("latest_order_unknown_write", None)
+
+
+def _invalidate_changed_orders(changes: ChangeSet):
+    # This process's own writes were handled by the session events; this
+    # catches other processes' (through the outbox)
+    latest_order_cache.invalidate_rows(
+        (table, key)
+        for table in ORDER_TABLES
+        for key in changes.changed(table) | changes.removed(table)
+    )
+
+
+change_bus.subscribe(_invalidate_changed_orders, tables=set(ORDER_TABLES))
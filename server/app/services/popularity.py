@@ -0,0 +1,283 @@
+"""Product popularity for ranking, held in memory as arrays indexed by id.
+
+``product_popularity`` keeps each product's units sold, decayed with
+``popularity_half_life_days`` and folded in incrementally from new order
+items by one process (``update_popularity``). Every process loads it with
+the catalog's stock into two arrays, so ranking costs one lookup per
+candidate instead of a join per query: ``demand`` (log-scaled to 0..1) and
+``factor`` (1, ``popularity_sold_out_factor`` when out of stock, 0 for ids
+that aren't products). Stock changes arrive through the change bus and are
+applied between reloads.
+"""
+
+import logging
+import math
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+from app.config.change_bus import ChangeSet, change_bus
+from app.config.database import SessionLocal
+from app.config.scheduler import scheduler
+from app.config.settings import settings
+from app.models.base import Order, OrderItem, Product, ProductPopularity
+from sqlalchemy import func
+
+logger = logging.getLogger(__name__)
+
+ORDER_ITEM_BATCH = 5000
+
+
+def decay(seconds: float, half_life_days: float = settings.popularity_half_life_days):
+    """Weight left after ``seconds``: halves every ``half_life_days``."""
+    return 0.5 ** (max(seconds, 0.0) / (half_life_days * 86400.0))
+
+
+class PopularityIndex:
+    """Per-process popularity arrays. Readers take the current arrays in
+    one attribute read; loads and stock updates build new ones and swap
+    them in, so a re-rank never sees a half-applied change."""
+
+    def __init__(self, sold_out_factor: float = settings.popularity_sold_out_factor):
+        self.sold_out_factor = sold_out_factor
+        empty = np.zeros(0, dtype=np.float32)
+        # (demand, factor, product ids by popularity)
+        self._arrays = (empty, empty, np.zeros(0, dtype=np.int64))
+        self._stock_changes: Set[int] = set()
+        self._lock = threading.Lock()
+        self.loaded_at: Optional[datetime] = None
+        # Bumped on every swap: keys responses built from the ranking
+        self.version = 0
+
+    def load(self, db):
+        now = datetime.utcnow()
+        rows = (
+            db.query(
+                Product.id,
+                Product.stock,
+                ProductPopularity.score,
+                ProductPopularity.updated_at,
+            )
+            .outerjoin(ProductPopularity, ProductPopularity.product_id == Product.id)
+            .all()
+        )
+        size = max((row[0] for row in rows), default=-1) + 1
+        demand = np.zeros(size, dtype=np.float32)
+        factor = np.zeros(size, dtype=np.float32)
+        for product_id, stock, score, updated_at in rows:
+            if score:
+                age = (now - updated_at).total_seconds() if updated_at else 0.0
+                demand[product_id] = math.log1p(score * decay(age))
+            factor[product_id] = self._factor(stock)
+        peak = demand.max() if size else 0.0
+        if peak > 0:
+            demand /= peak
+        with self._lock:
+            self._arrays = (demand, factor, _ranking(demand, factor))
+            self.version += 1
+            self.loaded_at = now
+        logger.info("Loaded popularity for %d products", len(rows))
+
+    def _factor(self, stock: Optional[int]) -> float:
+        return 1.0 if stock is None or stock > 0 else self.sold_out_factor
+
+    def rerank(
+        self,
+        candidates: List[Tuple[int, float]],
+        weight: float = settings.popularity_weight,
+    ) -> List[Tuple[int, float]]:
+        """``(product_id, similarity)`` pairs re-scored as
+        ``((1 - weight) * similarity + weight * demand) * factor``, best
+        first. Ids the arrays don't know yet (newer than the last load) are
+        scored on similarity alone."""
+        if not candidates:
+            return []
+        demand, factor, _ = self._arrays
+        ids = np.fromiter((pid for pid, _ in candidates), np.int64, len(candidates))
+        similarity = np.fromiter(
+            (score for _, score in candidates), np.float32, len(candidates)
+        )
+        known = ids < len(demand)
+        at = np.where(known, ids, 0)
+        scores = (1.0 - weight) * similarity
+        if len(demand):
+            scores += weight * np.where(known, demand[at], 0.0)
+            scores *= np.where(known, factor[at], 1.0)
+        order = np.argsort(-scores, kind="stable")
+        return [(int(ids[i]), float(scores[i])) for i in order]
+
+    def ranking(self, offset: int, limit: int) -> Tuple[List[int], int, int]:
+        """A page of product ids by popularity (availability included), most
+        first, with the ranking's length and how many ids the arrays cover:
+        products from that id on (added since the last load, or all of them
+        before the first) aren't ranked yet."""
+        demand, _, ranking = self._arrays
+        return ranking[offset : offset + limit].tolist(), len(ranking), len(demand)
+
+    def queue_stock_changes(self, changes: ChangeSet):
+        if not scheduler.running:
+            return
+        updated = changes.updated.get("products", {})
+        changed = changes.inserted.get("products", set()) | {
+            product_id for product_id, columns in updated.items() if "stock" in columns
+        }
+        changed |= changes.removed("products")
+        if changed:
+            with self._lock:
+                self._stock_changes |= changed
+            scheduler.submit("popularity_stock")
+
+    def apply_stock_changes(self):
+        """Re-read stock for the queued products; deleted ones drop out."""
+        with self._lock:
+            product_ids, self._stock_changes = self._stock_changes, set()
+        if not product_ids:
+            return
+        db = SessionLocal()
+        try:
+            stock = dict(
+                db.query(Product.id, Product.stock).filter(Product.id.in_(product_ids))
+            )
+        except Exception:
+            with self._lock:
+                self._stock_changes |= product_ids
+            raise
+        finally:
+            db.close()
+        with self._lock:
+            demand, factor, _ = self._arrays
+            size = max(len(factor), max(product_ids) + 1)
+            demand = _grown(demand, size)
+            factor = _grown(factor, size)
+            for product_id in product_ids:
+                factor[product_id] = (
+                    self._factor(stock[product_id]) if product_id in stock else 0.0
+                )
+            self._arrays = (demand, factor, _ranking(demand, factor))
+            self.version += 1
+
+    def stats(self) -> dict:
+        demand, factor, ranking = self._arrays
+        return {
+            "products": len(ranking),
+            "sold_out": int(np.count_nonzero((factor > 0) & (factor < 1))),
+            "age_seconds": (
+                (datetime.utcnow() - self.loaded_at).total_seconds()
+                if self.loaded_at
+                else None
+            ),
+        }
+
+
+def _grown(values: np.ndarray, size: int) -> np.ndarray:
+    grown = np.zeros(size, dtype=values.dtype)
+    grown[: len(values)] = values
+    return grown
+
+
+def _ranking(demand: np.ndarray, factor: np.ndarray) -> np.ndarray:
+    products = np.flatnonzero(factor > 0)
+    # Most popular first; ties (e.g. never ordered) by id
+    order = np.argsort(-(demand[products] * factor[products]), kind="stable")
+    return products[order]
+
+
+popularity_index = PopularityIndex()
+change_bus.subscribe(popularity_index.queue_stock_changes, tables={"products"})
+
+
+def refresh_popularity():
+    db = SessionLocal()
+    try:
+        popularity_index.load(db)
+    finally:
+        db.close()
+
+
+def update_popularity():
+    """Fold order items added since the last run into ``product_popularity``.
+
+    The high-water mark is the largest ``last_order_item_id`` stored, so a
+    batch is counted exactly once: its scores and the new mark commit
+    together. Each item counts its quantity decayed from its order's time.
+    An item committed after a higher id was already counted is missed;
+    for a ranking signal that is an acceptable loss.
+
+    A batch that sold nothing (every product since deleted) still moves
+    the mark, on the row already holding it; before any product has a
+    row there is nowhere to keep it, and the next run reads it again.
+    """
+    db = SessionLocal()
+    try:
+        mark = db.query(func.max(ProductPopularity.last_order_item_id)).scalar()
+        mark = mark or 0
+        while True:
+            items = (
+                db.query(
+                    OrderItem.id,
+                    OrderItem.product_id,
+                    OrderItem.quantity,
+                    Order.created_at,
+                )
+                .join(Order, OrderItem.order_id == Order.id)
+                .filter(OrderItem.id > mark)
+                .order_by(OrderItem.id)
+                .limit(ORDER_ITEM_BATCH)
+                .all()
+            )
+            if not items:
+                break
+            now = datetime.utcnow()
+            sold = defaultdict(float)
+            last_item = {}
+            for item_id, product_id, quantity, ordered_at in items:
+                if product_id is None:
+                    continue
+                age = (now - ordered_at).total_seconds() if ordered_at else 0.0
+                sold[product_id] += (quantity or 0) * decay(age)
+                last_item[product_id] = item_id
+            end = items[-1].id
+            if sold:
+                # The mark is the largest id stored: any sold row can carry it
+                last_item[next(iter(last_item))] = end
+                _add_sold(db, sold, last_item, now)
+            else:
+                db.query(ProductPopularity).filter(
+                    ProductPopularity.last_order_item_id == mark
+                ).update({"last_order_item_id": end}, synchronize_session=False)
+            db.commit()
+            mark = end
+            if len(items) < ORDER_ITEM_BATCH:
+                break
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _add_sold(db, sold: dict, last_item: dict, now: datetime):
+    rows = {
+        row.product_id: row
+        for row in db.query(ProductPopularity).filter(
+            ProductPopularity.product_id.in_(sold)
+        )
+    }
+    for product_id, units in sold.items():
+        row = rows.get(product_id)
+        if row is None:
+            db.add(
+                ProductPopularity(
+                    product_id=product_id,
+                    score=units,
+                    last_order_item_id=last_item[product_id],
+                    updated_at=now,
+                )
+            )
+            continue
+        age = (now - row.updated_at).total_seconds()
+        row.score = row.score * decay(age) + units
+        row.last_order_item_id = max(row.last_order_item_id, last_item[product_id])
+        row.updated_at = now
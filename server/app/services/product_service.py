@@ -0,0 +1,131 @@
+from typing import List, Optional
+
+from app.config.settings import settings
+from app.models.base import Cart, Product
+from app.rag.retriever import get_product_retriever, reciprocal_rank_fusion
+from app.schema.product_schema import (
+    CartResponse,
+    ProductListResponse,
+    ProductResponse,
+)
+from app.services.co_purchase import co_purchase_index
+from app.services.popularity import popularity_index
+from fastapi import HTTPException
+from sqlalchemy.orm import joinedload
+
+MAX_PRODUCT_PAGE_SIZE = 100
+
+
+class ProductService:
+    def __init__(self, db):
+        self.db = db
+
+    def list_products(
+        self, limit: int = 20, cursor: Optional[int] = None, sort: str = "id"
+    ) -> ProductListResponse:
+        limit = max(1, min(limit, MAX_PRODUCT_PAGE_SIZE))
+        if sort == "popular":
+            return self._list_popular(limit, cursor or 0)
+        query = self.db.query(Product).order_by(Product.id)
+        if cursor:
+            query = query.filter(Product.id > cursor)
+
+        products = query.limit(limit + 1).all()
+        next_cursor = products[limit - 1].id if len(products) > limit else None
+        return ProductListResponse(
+            products=[ProductResponse.model_validate(p) for p in products[:limit]],
+            next_cursor=next_cursor,
+        )
+
+    def _list_popular(self, limit: int, offset: int) -> ProductListResponse:
+        """A page of the in-memory popularity ranking, followed by the
+        products it doesn't rank yet in id order (the whole catalog until
+        the first load); the cursor is a position in that order, so pages
+        shift when the ranking is reloaded."""
+        product_ids, ranked, known = popularity_index.ranking(offset, limit + 1)
+        if len(product_ids) <= limit:
+            product_ids += [
+                product_id
+                for (product_id,) in self.db.query(Product.id)
+                .filter(Product.id >= known)
+                .order_by(Product.id)
+                .offset(max(0, offset - ranked))
+                .limit(limit + 1 - len(product_ids))
+            ]
+        products = self._by_id(product_ids[:limit])
+        return ProductListResponse(
+            products=products,
+            next_cursor=offset + limit if len(product_ids) > limit else None,
+        )
+
+    def get_product(self, product_id: int) -> ProductResponse:
+        product = self.db.get(Product, product_id)
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        return ProductResponse.model_validate(product)
+
+    def search(self, query: str, k: int = 5) -> List[ProductResponse]:
+        retriever = get_product_retriever()
+        retriever.ensure_indexed(self.db)
+        # Over-fetch, so popular, in-stock products can move up into the top k
+        candidates = retriever.search(
+            query, k=k * max(1, settings.popularity_candidates_factor)
+        )
+        product_ids = [pid for pid, _ in popularity_index.rerank(candidates)[:k]]
+        return self._by_id(product_ids)
+
+    def search_many(self, queries: List[str], k: int = 5) -> List[ProductResponse]:
+        """One request's sub-queries (rewrites, facets) searched as a batch:
+        each query's candidates are re-ranked like ``search`` and the lists
+        fused, so products several queries agree on come first."""
+        queries = list(dict.fromkeys(query.strip() for query in queries))
+        queries = [query for query in queries if query]
+        if not queries:
+            return []
+        retriever = get_product_retriever()
+        retriever.ensure_indexed(self.db)
+        rankings = retriever.search_batch(
+            queries, k=k * max(1, settings.popularity_candidates_factor)
+        )
+        fused = reciprocal_rank_fusion(
+            [popularity_index.rerank(candidates) for candidates in rankings]
+        )
+        return self._by_id([pid for pid, _ in fused[:k]])
+
+    def bought_together(self, product_id: int, k: int = 5) -> List[ProductResponse]:
+        """Products most often ordered with ``product_id``, from memory."""
+        product_ids = [pid for pid, _ in co_purchase_index.neighbours(product_id, k)]
+        if not product_ids and not self.db.get(Product, product_id):
+            raise HTTPException(status_code=404, detail="Product not found")
+        return self._by_id(product_ids)
+
+    def _by_id(self, product_ids: List[int]) -> List[ProductResponse]:
+        """Products for ``product_ids``, in that order."""
+        if not product_ids:
+            return []
+
+        products = {
+            p.id: p
+            for p in self.db.query(Product).filter(Product.id.in_(product_ids)).all()
+        }
+        return [
+            ProductResponse.model_validate(products[product_id])
+            for product_id in product_ids
+            if product_id in products
+        ]
+
+
+class CartService:
+    def __init__(self, db):
+        self.db = db
+
+    def get_cart(self, user_id: int) -> CartResponse:
+        items = (
+            self.db.query(Cart)
+            .filter(Cart.user_id == user_id)
+            .options(joinedload(Cart.product))
+            .order_by(Cart.id)
+            .all()
+        )
+        total = sum((item.product.price or 0) * (item.quantity or 0) for item in items)
+        return CartResponse(items=items, total_amount=total)
@@ -0,0 +1,286 @@
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from app.config.change_bus import record_changes
+from app.config.database import SessionLocal
+from app.config.scheduler import scheduler
+from app.config.settings import settings
+from app.models.base import Payment, Shipment, StatusEvent
+from app.services.order_status_cache import mark_orders_written
+from fastapi import HTTPException
+from sqlalchemy import and_, case, insert, or_, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+# Bounds the number of bind parameters per statement
+CHUNK_SIZE = 500
+MAX_FLUSH_ATTEMPTS = 3
+
+# kind -> (model, column holding the external reference)
+STATUS_TARGETS = {
+    "payment": (Payment, Payment.transaction_id),
+    "shipment": (Shipment, Shipment.tracking_number),
+}
+
+# kind -> status -> how far along it is. A status only ever replaces a
+# less advanced one, or a different in-flight one at the same rank;
+# terminal statuses are final. Unknown statuses count as in flight.
+STATUS_RANKS = {
+    "payment": {
+        "pending": 0,
+        "authorized": 1,
+        "success": 2,
+        "succeeded": 2,
+        "failed": 2,
+    },
+    "shipment": {"pending": 0, "shipped": 1, "delivered": 2},
+}
+IN_FLIGHT_RANK = 1
+TERMINAL_RANK = 2
+
+EventKey = Tuple[str, str, str]  # (kind, reference, status)
+
+
+def _chunks(items: List, size: int = CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+class StatusUpdateQueue:
+    """In-memory queue of payment/shipment status callbacks.
+
+    Callbacks are deduped on ``(kind, reference, status)`` while queued and
+    applied in batches: one transaction per flush, with grouped
+    ``UPDATE ... SET status = CASE reference ...`` statements. Applied keys
+    are recorded in ``status_events`` so redelivered callbacks are no-ops.
+    Callbacks arrive out of order, so each reference takes the most
+    advanced status (the newest on a tie, see ``STATUS_RANKS``) and a row
+    never moves back.
+
+    The route has already answered 202, so the provider won't resend: a
+    callback that beats its payment/shipment row, or a batch whose flush
+    failed, waits and is retried by ``retry`` (a scheduled job) until it
+    applies or is ``unmatched_ttl`` seconds old.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        max_pending: int = 100_000,
+        unmatched_ttl: float = settings.status_event_unmatched_ttl_seconds,
+    ):
+        self.session_factory = session_factory
+        self.max_pending = max_pending
+        self.unmatched_ttl = unmatched_ttl
+        # key -> when first received (monotonic); insertion-ordered
+        self._pending: Dict[EventKey, float] = {}
+        self._waiting: Dict[EventKey, float] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._pending) + len(self._waiting)
+
+    def enqueue(self, events: Iterable[EventKey]) -> Tuple[int, int]:
+        """Queue events, returning ``(accepted, duplicates)``."""
+        accepted = duplicates = 0
+        now = time.monotonic()
+        with self._lock:
+            for key in events:
+                if key in self._pending or key in self._waiting:
+                    duplicates += 1
+                    continue
+                if len(self._pending) + len(self._waiting) >= self.max_pending:
+                    raise HTTPException(
+                        status_code=503, detail="Status event queue is full"
+                    )
+                self._pending[key] = now
+                accepted += 1
+        return accepted, duplicates
+
+    def flush(self):
+        """Drain the queue. Concurrent callers return at once and leave the
+        work to the flush already in progress."""
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            if not scheduler.running:
+                self._requeue_waiting()  # no retry job: retry on each flush
+            while True:
+                with self._lock:
+                    batch, self._pending = self._pending, {}
+                if not batch:
+                    return
+                self._apply_with_retry(batch)
+        finally:
+            self._flush_lock.release()
+
+    def retry(self):
+        """Re-apply waiting callbacks, dropping those past the TTL."""
+        if self._requeue_waiting():
+            self.flush()
+
+    def _requeue_waiting(self) -> int:
+        cutoff = time.monotonic() - self.unmatched_ttl
+        with self._lock:
+            waiting, self._waiting = self._waiting, {}
+            expired = [key for key, since in waiting.items() if since < cutoff]
+            for key, since in waiting.items():
+                if since >= cutoff:
+                    self._pending.setdefault(key, since)
+        if expired:
+            logger.warning(
+                "Dropped %d status events never matched within %.0f s: %s",
+                len(expired),
+                self.unmatched_ttl,
+                expired[:20],
+            )
+        return len(waiting) - len(expired)
+
+    def _wait(self, batch: Dict[EventKey, float], keys: Iterable[EventKey]):
+        with self._lock:
+            for key in keys:
+                self._waiting.setdefault(key, batch[key])
+
+    def _apply_with_retry(self, batch: Dict[EventKey, float]):
+        keys = list(batch)
+        for attempt in range(1, MAX_FLUSH_ATTEMPTS + 1):
+            db = self.session_factory()
+            try:
+                applied, unmatched = self._apply(db, batch)
+                db.commit()
+                logger.info(
+                    "Applied %d status events (%d duplicate, %d unmatched)",
+                    applied,
+                    len(keys) - applied - len(unmatched),
+                    len(unmatched),
+                )
+                self._wait(batch, unmatched)
+                return
+            except IntegrityError:
+                # Another worker recorded some of these keys first; the
+                # retry filters them out as already processed.
+                db.rollback()
+                logger.warning("Status event flush conflicted, attempt %d", attempt)
+            except Exception:
+                db.rollback()
+                logger.exception("Status event flush failed")
+                break
+            finally:
+                db.close()
+
+        # Retried by the next scheduled retry
+        self._wait(batch, keys)
+
+    def _apply(
+        self, db, batch: Dict[EventKey, float]
+    ) -> Tuple[int, List[EventKey]]:
+        """Apply ``batch`` (key -> when received); returns how many applied
+        and the keys whose payment/shipment row doesn't exist (yet)."""
+        processed = set()
+        for chunk in _chunks(list(batch)):
+            processed.update(
+                db.execute(
+                    select(
+                        StatusEvent.kind, StatusEvent.reference, StatusEvent.status
+                    ).where(
+                        tuple_(
+                            StatusEvent.kind, StatusEvent.reference, StatusEvent.status
+                        ).in_(chunk)
+                    )
+                ).all()
+            )
+        fresh = [key for key in batch if key not in processed]
+
+        applied_keys, unmatched = [], []
+        touched_orders = set()
+        for kind, (model, reference_column) in STATUS_TARGETS.items():
+            ranks = STATUS_RANKS[kind]
+            latest = _most_advanced(
+                (key, batch[key]) for key in fresh if key[0] == kind
+            )
+            if not latest:
+                continue
+
+            known, row_ids = {}, {}
+            for chunk in _chunks(list(latest)):
+                for reference, order_id, row_id in db.execute(
+                    select(reference_column, model.order_id, model.id).where(
+                        reference_column.in_(chunk)
+                    )
+                ):
+                    known[reference] = order_id
+                    row_ids.setdefault(reference, []).append(row_id)
+            # Callbacks can beat the row they refer to; those stay unrecorded
+            # and wait for a retry
+            for key in fresh:
+                if key[0] == kind:
+                    (applied_keys if key[1] in known else unmatched).append(key)
+            touched_orders.update(known.values())
+
+            current_rank = case(
+                (model.status.is_(None), -1),
+                else_=case(ranks, value=model.status, else_=IN_FLIGHT_RANK),
+            )
+            references = [ref for ref in latest if ref in known]
+            for chunk in _chunks(references):
+                new_rank = case(
+                    {ref: _rank(kind, latest[ref]) for ref in chunk},
+                    value=reference_column,
+                )
+                db.execute(
+                    update(model)
+                    .where(
+                        reference_column.in_(chunk),
+                        or_(
+                            current_rank < new_rank,
+                            and_(
+                                current_rank == new_rank,
+                                new_rank < TERMINAL_RANK,
+                            ),
+                        ),
+                    )
+                    .values(
+                        status=case(
+                            {ref: latest[ref] for ref in chunk}, value=reference_column
+                        )
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+            record_changes(
+                db,
+                model,
+                [row_id for ref in references for row_id in row_ids[ref]],
+                columns=("status",),
+            )
+
+        if applied_keys:
+            db.execute(
+                insert(StatusEvent),
+                [
+                    {"kind": kind, "reference": reference, "status": status}
+                    for kind, reference, status in applied_keys
+                ],
+            )
+        mark_orders_written(db, touched_orders)
+        return len(applied_keys), unmatched
+
+
+def _rank(kind: str, status: str) -> int:
+    return STATUS_RANKS[kind].get(status, IN_FLIGHT_RANK)
+
+
+def _most_advanced(events: Iterable[Tuple[EventKey, float]]) -> Dict[str, str]:
+    """reference -> its most advanced status, the newest received on a tie."""
+    best: Dict[str, Tuple[int, float, str]] = {}
+    for (kind, reference, status), received in events:
+        candidate = (_rank(kind, status), received, status)
+        if reference not in best or candidate[:2] >= best[reference][:2]:
+            best[reference] = candidate
+    return {reference: status for reference, (_, _, status) in best.items()}
+
+
+status_update_queue = StatusUpdateQueue()
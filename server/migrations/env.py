@@ -1,7 +1,7 @@
 from logging.config import fileConfig
 
 from alembic import context
-from app.config.database import DATABASE_URL
+from app.config.database import DATABASE_URL, apply_sqlite_pragmas
 from app.models.base import Base
 from sqlalchemy import engine_from_config, pool
 
@@ -45,6 +45,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        render_as_batch=url.startswith("sqlite"),
     )
 
     with context.begin_transaction():
@@ -63,9 +64,18 @@ def run_migrations_online() -> None:
         prefix="sqlalchemy.",
         poolclass=pool.NullPool,
     )
+    if connectable.dialect.name == "sqlite":
+        # Foreign keys off: batch operations drop and re-create tables
+        apply_sqlite_pragmas(connectable, foreign_keys=False)
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        # SQLite can't ALTER most things: autogenerate batch operations, which
+        # copy the table there (and are plain ALTERs on MySQL)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
 
         with context.begin_transaction():
             context.run_migrations()
@@ -21,7 +21,8 @@ depends_on: Union[str, Sequence[str], None] = None
 def upgrade() -> None:
     """Upgrade schema."""
     # ### commands auto generated by Alembic - please adjust! ###
-    op.alter_column('refresh_tokens', 'expried_at',
+    with op.batch_alter_table('refresh_tokens', schema=None) as batch_op:
+        batch_op.alter_column('expried_at',
                existing_type=mysql.DATETIME(),
                nullable=False)
     # ### end Alembic commands ###
@@ -30,7 +31,8 @@ def upgrade() -> None:
 def downgrade() -> None:
     """Downgrade schema."""
     # ### commands auto generated by Alembic - please adjust! ###
-    op.alter_column('refresh_tokens', 'expried_at',
+    with op.batch_alter_table('refresh_tokens', schema=None) as batch_op:
+        batch_op.alter_column('expried_at',
                existing_type=mysql.DATETIME(),
                nullable=True)
     # ### end Alembic commands ###
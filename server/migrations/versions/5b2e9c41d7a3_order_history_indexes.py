@@ -0,0 +1,48 @@
+"""order history indexes
+
+Revision ID: 5b2e9c41d7a3
+Revises: 3634dd824f82
+Create Date: 2026-10-19 10:12:41.508316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2e9c41d7a3'
+down_revision: Union[str, Sequence[str], None] = '3634dd824f82'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset pagination and its cursor need created_at. Rows without one get
+    # a date older than any real order, so they stay last as they sorted before
+    op.execute(
+        "UPDATE orders SET created_at = '1970-01-02 00:00:00' "
+        "WHERE created_at IS NULL"
+    )
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.alter_column('created_at',
+               existing_type=sa.TIMESTAMP(),
+               nullable=False)
+    op.create_index('ix_orders_user_id_created_at', 'orders', ['user_id', 'created_at'], unique=False)
+    op.create_index(op.f('ix_order_items_order_id'), 'order_items', ['order_id'], unique=False)
+    op.create_index(op.f('ix_payments_order_id'), 'payments', ['order_id'], unique=False)
+    op.create_index(op.f('ix_shipments_order_id'), 'shipments', ['order_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_shipments_order_id'), table_name='shipments')
+    op.drop_index(op.f('ix_payments_order_id'), table_name='payments')
+    op.drop_index(op.f('ix_order_items_order_id'), table_name='order_items')
+    op.drop_index('ix_orders_user_id_created_at', table_name='orders')
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.alter_column('created_at',
+               existing_type=sa.TIMESTAMP(),
+               nullable=True)
@@ -0,0 +1,42 @@
+"""status events table
+
+Revision ID: a41f7d03c2e8
+Revises: 5b2e9c41d7a3
+Create Date: 2026-10-19 14:37:05.219844
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41f7d03c2e8'
+down_revision: Union[str, Sequence[str], None] = '5b2e9c41d7a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('status_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('reference', sa.String(length=255), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('kind', 'reference', 'status', name='uq_status_events_key')
+    )
+    op.create_index(op.f('ix_status_events_id'), 'status_events', ['id'], unique=False)
+    op.create_index(op.f('ix_payments_transaction_id'), 'payments', ['transaction_id'], unique=False)
+    op.create_index(op.f('ix_shipments_tracking_number'), 'shipments', ['tracking_number'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_shipments_tracking_number'), table_name='shipments')
+    op.drop_index(op.f('ix_payments_transaction_id'), table_name='payments')
+    op.drop_index(op.f('ix_status_events_id'), table_name='status_events')
+    op.drop_table('status_events')
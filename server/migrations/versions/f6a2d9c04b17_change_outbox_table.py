@@ -0,0 +1,36 @@
+"""change outbox table
+
+Revision ID: f6a2d9c04b17
+Revises: e3b8c1f45a92
+Create Date: 2026-10-19 18:05:37.618204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6a2d9c04b17'
+down_revision: Union[str, Sequence[str], None] = 'e3b8c1f45a92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('change_outbox',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('origin', sa.String(length=255), nullable=False),
+    sa.Column('changes', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_change_outbox_created_at'), 'change_outbox', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_change_outbox_created_at'), table_name='change_outbox')
+    op.drop_table('change_outbox')
@@ -0,0 +1,123 @@
+"""Measure bytes on the wire and CPU per request for product listings.
+
+Runs in-process (no network, no real database) against one listing page
+served three ways: serialized per request and sent uncompressed (before),
+serialized and compressed per request by ``CompressionMiddleware``, and
+from ``PrecompressedCache``::
+
+    python scripts/bench_compression.py --requests 2000 --page-size 100
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import httpx  # noqa: E402
+from app.config.compression import (  # noqa: E402
+    ENCODERS,
+    CompressionMiddleware,
+    PrecompressedCache,
+)
+from app.schema.product_schema import (  # noqa: E402
+    ProductListResponse,
+    ProductResponse,
+)
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.responses import Response  # noqa: E402
+
+WORDS = (
+    "organic cotton slim fit shirt denim jacket leather wallet running shoes "
+    "wireless earbuds stainless steel bottle ceramic mug yoga mat backpack"
+).split()
+
+
+def listing(size: int) -> ProductListResponse:
+    rng = random.Random(7)
+    products = [
+        ProductResponse(
+            id=product_id,
+            name=" ".join(rng.choices(WORDS, k=3)).title(),
+            description=" ".join(rng.choices(WORDS, k=30)),
+            price=Decimal(rng.randint(199, 99999)) / 100,
+            stock=rng.randint(0, 500),
+            created_at=datetime(2024, 1, 1, rng.randint(0, 23)),
+        )
+        for product_id in range(1, size + 1)
+    ]
+    return ProductListResponse(products=products, next_cursor=size)
+
+
+def bench_app(page: ProductListResponse, compress: bool) -> FastAPI:
+    app = FastAPI()
+    cache = PrecompressedCache()
+
+    @app.get("/dynamic")
+    def dynamic():
+        return Response(page.model_dump_json(), media_type="application/json")
+
+    @app.get("/cached")
+    def cached(request: Request):
+        return cache.respond(request, "page", lambda: page)
+
+    if compress:
+        app.add_middleware(CompressionMiddleware)
+    return app
+
+
+async def measure(app, path: str, encoding: str, requests: int):
+    """(wire bytes, CPU microseconds) per request."""
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Accept-Encoding": encoding}
+    client = httpx.AsyncClient(transport=transport, base_url="http://bench")
+    async with client:
+        for _ in range(50):  # warm up (and fill the cache)
+            await client.get(path, headers=headers)
+        wire = 0
+        started = time.process_time()
+        for _ in range(requests):
+            response = await client.get(path, headers=headers)
+            wire += int(response.headers["content-length"])
+        elapsed = time.process_time() - started
+    return wire / requests, elapsed / requests * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    page = listing(args.page_size)
+    plain_app = bench_app(page, compress=False)
+    compressed_app = bench_app(page, compress=True)
+    encodings = [encoding for encoding in ("br", "gzip") if encoding in ENCODERS]
+
+    cases = [("before (identity)", plain_app, "/dynamic", "identity")]
+    for encoding in encodings:
+        cases.append((f"on the fly ({encoding})", compressed_app, "/dynamic", encoding))
+    for encoding in encodings:
+        cases.append(
+            (f"precompressed ({encoding})", compressed_app, "/cached", encoding)
+        )
+
+    # Best of a few rounds, so GC pauses don't land on one case only
+    for label, app, path, encoding in cases:
+        wire, cpu = min(
+            asyncio.run(measure(app, path, encoding, args.requests))
+            for _ in range(args.rounds)
+        )
+        print(f"{label:<26} {wire:>9.0f} bytes {cpu:>9.1f} us CPU per request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Measure what the metrics instrumentation costs.
+
+Runs in-process (no network, no real database) so the numbers isolate the
+instrumentation itself: middleware per request, SQL event hooks per
+statement and ``timed()`` per stage::
+
+    python scripts/bench_metrics.py --requests 5000 --queries 20000
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import httpx  # noqa: E402
+from app.config.metrics import (  # noqa: E402
+    RequestTimings,
+    current_timings,
+    instrument_engine,
+    render_metrics,
+    timed,
+)
+from app.config.settings import settings  # noqa: E402
+from sqlalchemy import create_engine, text  # noqa: E402
+
+
+async def per_request_us(app, requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(200):  # warm up
+            await client.get("/health")
+        started = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/health")
+        return (time.perf_counter() - started) / requests * 1e6
+
+
+def per_query_us(queries: int, instrumented: bool) -> float:
+    engine = create_engine("sqlite://")
+    if instrumented:
+        instrument_engine(engine)
+    token = current_timings.set(RequestTimings() if instrumented else None)
+    try:
+        with engine.connect() as conn:
+            statement = text("SELECT 1")
+            started = time.perf_counter()
+            for _ in range(queries):
+                conn.execute(statement)
+            return (time.perf_counter() - started) / queries * 1e6
+    finally:
+        current_timings.reset(token)
+
+
+def per_stage_us(calls: int) -> float:
+    token = current_timings.set(RequestTimings())
+    try:
+        started = time.perf_counter()
+        for _ in range(calls):
+            with timed("bench"):
+                pass
+        return (time.perf_counter() - started) / calls * 1e6
+    finally:
+        current_timings.reset(token)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    from app.main import create_app
+
+    settings.metrics_enabled = False
+    plain_app = create_app()
+    settings.metrics_enabled = True
+    instrumented_app = create_app()
+
+    # Alternate rounds and keep each side's best, so drift and GC pauses
+    # don't land on one side only
+    plain, instrumented = float("inf"), float("inf")
+    for _ in range(args.rounds):
+        plain = min(plain, asyncio.run(per_request_us(plain_app, args.requests)))
+        instrumented = min(
+            instrumented, asyncio.run(per_request_us(instrumented_app, args.requests))
+        )
+    print(
+        f"request: {plain:.1f} us plain, {instrumented:.1f} us instrumented "
+        f"(+{instrumented - plain:.1f} us)"
+    )
+
+    plain = min(per_query_us(args.queries, False) for _ in range(args.rounds))
+    instrumented = min(per_query_us(args.queries, True) for _ in range(args.rounds))
+    print(
+        f"SQL statement: {plain:.1f} us plain, {instrumented:.1f} us instrumented "
+        f"(+{instrumented - plain:.1f} us)"
+    )
+
+    print(f"timed() stage: {per_stage_us(args.queries):.2f} us")
+
+    started = time.perf_counter()
+    body = render_metrics()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"/metrics render: {elapsed_ms:.2f} ms for {len(body)} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Local OpenAI-compatible chat completions server for offline load tests.
+
+Point the app at it instead of a real provider, e.g.::
+
+    python scripts/fake_llm_server.py --port 8001 --latency lognormal \\
+        --latency-ms 400 --tokens-per-second 60 --error-rate 0.02
+    OPENROUTER_API_BASE=http://localhost:8001/v1 OPENROUTER_MODELS=fake \\
+        OPENROUTER_API_KEYS=fake uvicorn app.main:app
+
+Replies are canned text. When the request offers tools, the first model
+step calls one of them (with probability ``--tool-call-rate``) so the agent
+loop is exercised end to end.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = (
+    "Here are a few options that match what you are looking for . Each one is "
+    "in stock and ships within two days , and I can add any of them to your "
+    "cart or compare them side by side if that helps ."
+).split()
+
+
+class Behaviour:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+
+    def first_token_delay(self) -> float:
+        """Seconds before the first token, drawn from ``--latency``."""
+        mean = self.args.latency_ms / 1000
+        jitter = self.args.jitter_ms / 1000
+        switcher = {
+            "fixed": lambda: mean,
+            "uniform": lambda: self.rng.uniform(mean - jitter, mean + jitter),
+            "normal": lambda: self.rng.gauss(mean, jitter),
+            # Heavy right tail, like real provider latency
+            "lognormal": lambda: mean * self.rng.lognormvariate(0, 0.5),
+        }
+        return max(0.0, switcher[self.args.latency]())
+
+    def token_delay(self) -> float:
+        rate = self.args.tokens_per_second
+        return 1 / rate if rate > 0 else 0.0
+
+    def reply_tokens(self) -> List[str]:
+        count = self.rng.randint(self.args.min_tokens, self.args.max_tokens)
+        return [WORDS[i % len(WORDS)] + " " for i in range(count)]
+
+    def injected_error(self) -> Optional[int]:
+        if self.rng.random() < self.args.error_rate:
+            return self.rng.choice(self.args.error_status)
+        return None
+
+    def tool_call(self, body: dict) -> Optional[dict]:
+        """A call to one of the offered tools on the agent's first step."""
+        tools = body.get("tools") or []
+        messages = body.get("messages") or []
+        if not tools or any(m.get("role") == "tool" for m in messages):
+            return None
+        if self.rng.random() >= self.args.tool_call_rate:
+            return None
+
+        function = self.rng.choice(tools)["function"]
+        question = next(
+            (m["content"] for m in reversed(messages) if m.get("role") == "user"),
+            "",
+        )
+        parameters = function.get("parameters", {})
+        args = {
+            name: question
+            for name, schema in parameters.get("properties", {}).items()
+            if name in parameters.get("required", [])
+            and schema.get("type") == "string"
+        }
+        return {
+            "id": f"call_{uuid.uuid4().hex[:12]}",
+            "type": "function",
+            "function": {"name": function["name"], "arguments": json.dumps(args)},
+        }
+
+
+def _completion(model: str, message: dict, finish_reason: str, tokens: int) -> dict:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+        "usage": {
+            "prompt_tokens": 0,
+            "completion_tokens": tokens,
+            "total_tokens": tokens,
+        },
+    }
+
+
+def _chunk(completion_id: str, model: str, delta: dict, finish_reason=None) -> str:
+    chunk = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(chunk)}\n\n"
+
+
+def create_app(behaviour: Behaviour) -> FastAPI:
+    app = FastAPI(title="Fake LLM")
+    stats = {"requests": 0, "streamed": 0, "tool_calls": 0, "errors": 0}
+
+    @app.get("/v1/models")
+    @app.get("/models")
+    def models():
+        return {"object": "list", "data": [{"id": "fake", "object": "model"}]}
+
+    @app.get("/stats")
+    def get_stats():
+        return stats
+
+    @app.post("/v1/chat/completions")
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model") or "fake"
+        stats["requests"] += 1
+
+        await asyncio.sleep(behaviour.first_token_delay())
+        status = behaviour.injected_error()
+        if status is not None:
+            stats["errors"] += 1
+            return JSONResponse(
+                status_code=status,
+                content={"error": {"message": "Injected failure", "code": status}},
+            )
+
+        call = behaviour.tool_call(body)
+        tokens = [] if call else behaviour.reply_tokens()
+        stats["tool_calls"] += bool(call)
+
+        if not body.get("stream"):
+            await asyncio.sleep(behaviour.token_delay() * len(tokens))
+            message = {"role": "assistant", "content": "".join(tokens)}
+            if call:
+                message["tool_calls"] = [call]
+            finish_reason = "tool_calls" if call else "stop"
+            return _completion(model, message, finish_reason, len(tokens))
+
+        stats["streamed"] += 1
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+        async def events():
+            yield _chunk(completion_id, model, {"role": "assistant", "content": ""})
+            if call:
+                yield _chunk(
+                    completion_id, model, {"tool_calls": [{"index": 0, **call}]}
+                )
+            for token in tokens:
+                await asyncio.sleep(behaviour.token_delay())
+                yield _chunk(completion_id, model, {"content": token})
+            finish_reason = "tool_calls" if call else "stop"
+            yield _chunk(completion_id, model, {}, finish_reason)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument(
+        "--latency",
+        choices=["fixed", "uniform", "normal", "lognormal"],
+        default="lognormal",
+        help="distribution of time to first token",
+    )
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument(
+        "--jitter-ms", type=float, default=100.0, help="spread for uniform/normal"
+    )
+    parser.add_argument(
+        "--tokens-per-second",
+        type=float,
+        default=50.0,
+        help="generation speed after the first token (0 = instant)",
+    )
+    parser.add_argument("--min-tokens", type=int, default=20)
+    parser.add_argument("--max-tokens", type=int, default=80)
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="share of requests that fail"
+    )
+    parser.add_argument(
+        "--error-status",
+        type=int,
+        nargs="+",
+        default=[429, 500, 503],
+        help="status codes injected failures pick from",
+    )
+    parser.add_argument("--tool-call-rate", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    uvicorn.run(create_app(Behaviour(args)), host=args.host, port=args.port)
@@ -0,0 +1,240 @@
+"""Open-loop load generator for the auth, product and chat routes.
+
+Requests start on a fixed schedule at ``--rps`` whether or not earlier ones
+have finished, so a slow server shows up as latency and errors rather than
+as a quietly lower request rate. Run it against an app whose LLM points at
+``scripts/fake_llm_server.py`` to test without provider quota. Responses
+shed by admission control (429/503) count as errors and also show as
+``shed``; past capacity, ``ok/s`` is the goodput to compare::
+
+    python scripts/load_test.py --base-url http://localhost:4000 --rps 20 \\
+        --duration 60 --users 20 --mix products=4,search=2,chat=2,login=1
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+API = "/api/v1"
+
+# Turned away by admission control: load shed on purpose, not failures
+SHED_STATUSES = ("429", "503")
+
+QUERIES = [
+    "wireless headphones under 2000",
+    "red cotton t-shirt",
+    "do you have iphone 15 cases",
+    "running shoes for flat feet",
+    "laptop with 16GB RAM",
+]
+
+CHAT_MESSAGES = QUERIES + [
+    "what is in my cart",
+    "where is my latest order",
+    "what is your return policy",
+]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted ``samples``."""
+    if not samples:
+        return 0.0
+    rank = max(0, min(len(samples) - 1, round(pct / 100 * len(samples)) - 1))
+    return samples[rank]
+
+
+class LoadTest:
+    SCENARIOS = ("login", "products", "search", "chat", "chat_stream")
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.users: List[dict] = []
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.scenarios = {
+            "login": self.login,
+            "products": self.list_products,
+            "search": self.search_products,
+            "chat": self.chat,
+            "chat_stream": self.chat_stream,
+        }
+
+    async def setup(self, client: httpx.AsyncClient):
+        """Register (or log in) the virtual users and keep their tokens."""
+        for i in range(self.args.users):
+            credentials = {
+                "email": f"loadtest{i}@example.com",
+                "password": "loadtest-password",
+            }
+            response = await client.post(
+                f"{API}/auth/register",
+                json={**credentials, "full_name": f"Load Test {i}"},
+            )
+            if response.status_code == 400:
+                response = await client.post(f"{API}/auth/login", json=credentials)
+            response.raise_for_status()
+            token = response.json()["access_token"]
+            self.users.append(
+                {**credentials, "headers": {"Authorization": f"Bearer {token}"}}
+            )
+
+    async def login(self, client, user):
+        credentials = {"email": user["email"], "password": user["password"]}
+        return await client.post(f"{API}/auth/login", json=credentials)
+
+    async def list_products(self, client, user):
+        return await client.get(f"{API}/products", params={"limit": 20})
+
+    async def search_products(self, client, user):
+        params = {"q": self.rng.choice(QUERIES)}
+        return await client.get(f"{API}/products/search", params=params)
+
+    async def chat(self, client, user):
+        body = {"message": self.rng.choice(CHAT_MESSAGES)}
+        return await client.post(f"{API}/chat", json=body, headers=user["headers"])
+
+    async def chat_stream(self, client, user):
+        body = {"message": self.rng.choice(CHAT_MESSAGES)}
+        async with client.stream(
+            "POST", f"{API}/chat/stream", json=body, headers=user["headers"]
+        ) as response:
+            async for _ in response.aiter_bytes():
+                pass
+        return response
+
+    async def fire(self, client: httpx.AsyncClient, name: str):
+        user = self.rng.choice(self.users)
+        started = time.perf_counter()
+        try:
+            response = await self.scenarios[name](client, user)
+            outcome = None if response.status_code < 400 else str(response.status_code)
+        except httpx.HTTPError as error:
+            outcome = type(error).__name__
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if outcome is None:
+            self.latencies[name].append(elapsed_ms)
+        else:
+            self.errors[name][outcome] += 1
+
+    async def run(self) -> dict:
+        names, weights = zip(*self.args.mix.items())
+        limits = httpx.Limits(max_connections=self.args.max_connections)
+        async with httpx.AsyncClient(
+            base_url=self.args.base_url, timeout=self.args.timeout, limits=limits
+        ) as client:
+            await self.setup(client)
+
+            total = int(self.args.rps * self.args.duration)
+            pending = []
+            started = time.perf_counter()
+            for i in range(total):
+                delay = started + i / self.args.rps - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                name = self.rng.choices(names, weights)[0]
+                pending.append(asyncio.create_task(self.fire(client, name)))
+            await asyncio.gather(*pending)
+            wall = time.perf_counter() - started
+        return self.report(wall)
+
+    def report(self, wall: float) -> dict:
+        routes = {}
+        for name in self.args.mix:
+            samples = sorted(self.latencies.get(name, []))
+            errors = self.errors.get(name, {})
+            failed = sum(errors.values())
+            shed = sum(errors.get(status, 0) for status in SHED_STATUSES)
+            sent = len(samples) + failed
+            if not sent:
+                continue
+            routes[name] = {
+                "requests": sent,
+                "throughput_rps": round(len(samples) / wall, 2),
+                "p50_ms": round(percentile(samples, 50), 1),
+                "p95_ms": round(percentile(samples, 95), 1),
+                "p99_ms": round(percentile(samples, 99), 1),
+                "error_rate": round(failed / sent, 4),
+                "shed_rate": round(shed / sent, 4),
+                "errors": dict(errors),
+            }
+        sent = sum(route["requests"] for route in routes.values())
+        succeeded = sum(len(samples) for samples in self.latencies.values())
+        shed = sum(
+            errors.get(status, 0)
+            for errors in self.errors.values()
+            for status in SHED_STATUSES
+        )
+        return {
+            "target_rps": self.args.rps,
+            "duration_s": round(wall, 1),
+            "requests": sent,
+            "throughput_rps": round(succeeded / wall, 2),
+            "error_rate": round((sent - succeeded) / sent, 4) if sent else 0.0,
+            "shed_rate": round(shed / sent, 4) if sent else 0.0,
+            "routes": routes,
+        }
+
+
+def print_report(report: dict):
+    print(
+        f"{report['requests']} requests in {report['duration_s']}s "
+        f"(target {report['target_rps']} rps): "
+        f"{report['throughput_rps']} ok/s, error rate {report['error_rate']:.2%} "
+        f"(shed {report['shed_rate']:.2%})"
+    )
+    header = f"{'route':<12}{'reqs':>7}{'ok/s':>8}{'p50':>9}{'p95':>9}{'p99':>9}"
+    print(header + f"{'errors':>9}{'shed':>9}")
+    for name, route in report["routes"].items():
+        print(
+            f"{name:<12}{route['requests']:>7}{route['throughput_rps']:>8}"
+            f"{route['p50_ms']:>9}{route['p95_ms']:>9}{route['p99_ms']:>9}"
+            f"{route['error_rate']:>9.2%}{route['shed_rate']:>9.2%}"
+            + (f"  {route['errors']}" if route["errors"] else "")
+        )
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:4000")
+    parser.add_argument("--rps", type=float, default=10.0, help="target request rate")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--users", type=int, default=10, help="virtual users")
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=parse_mix("login=1,products=4,search=2,chat=2,chat_stream=1"),
+        help="scenario weights: login, products, search, chat, chat_stream",
+    )
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--max-connections", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="print raw JSON")
+    args = parser.parse_args(argv)
+    unknown = set(args.mix) - set(LoadTest.SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios in --mix: {', '.join(sorted(unknown))}")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(LoadTest(args).run())
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
@@ -0,0 +1,191 @@
+"""Production launcher: prefork uvicorn workers sharing preloaded state.
+
+    python serve.py --workers 4 --host 0.0.0.0 --port 4000
+
+The master process imports the app and builds the heavy state (embedding
+model, intent centroids, in-memory catalog index) once, then forks the
+workers, so they start warm and share those pages copy-on-write. It
+restarts workers that die and, on SIGTERM or SIGINT, drains them: each
+worker's /ready turns 503 for SHUTDOWN_DRAIN_SECONDS while it keeps
+serving, then stops accepting connections, gives in-flight requests
+SHUTDOWN_GRACE_SECONDS and background jobs JOB_SHUTDOWN_SECONDS to finish.
+A second signal stops immediately.
+
+``run.py`` stays the development entry point (single process, reload).
+"""
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.resolve()
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# OpenMP and tokenizer thread pools started in the master don't survive a
+# fork (children deadlock or lose parallelism); workers are the parallelism
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+import uvicorn  # noqa: E402
+from app.config.lifecycle import after_fork, preload, readiness  # noqa: E402
+from app.config.logging_config import stop_logging  # noqa: E402
+from app.config.settings import settings  # noqa: E402
+from app.main import app  # noqa: E402
+
+logger = logging.getLogger("serve")
+
+# A worker that dies sooner than this after starting is crash-looping;
+# respawns are then delayed so the master doesn't fork in a tight loop
+MIN_WORKER_LIFETIME = 5.0
+
+
+class DrainingServer(uvicorn.Server):
+    """Uvicorn server whose first exit signal starts a drain period."""
+
+    def handle_exit(self, sig, frame):
+        if readiness.draining:
+            return super().handle_exit(sig, frame)
+        readiness.begin_draining()
+        logger.info(
+            "Worker %d draining for %.1f s", os.getpid(), settings.shutdown_drain_seconds
+        )
+        timer = threading.Timer(
+            settings.shutdown_drain_seconds, super().handle_exit, (sig, frame)
+        )
+        timer.daemon = True
+        timer.start()
+
+
+class Master:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.workers = {}  # pid -> start time
+        self.stopping = False
+        self.deadline = None
+        self.config = uvicorn.Config(
+            app,
+            host=args.host,
+            port=args.port,
+            log_config=None,  # keep the app's queued JSON logging
+            timeout_graceful_shutdown=int(settings.shutdown_grace_seconds),
+        )
+        self.socket = None
+
+    def spawn(self):
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = time.monotonic()
+            return
+
+        # Worker: own process group, so a terminal's Ctrl-C reaches only
+        # the master, which then drains every worker the same way. Uvicorn
+        # handles signals while serving and re-raises them once done;
+        # ignoring them outside that lets the worker flush its logs.
+        os.setpgid(0, 0)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        code = 0
+        try:
+            after_fork()
+            DrainingServer(self.config).run(sockets=[self.socket])
+        except BaseException:
+            logger.exception("Worker %d crashed", os.getpid())
+            code = 1
+        finally:
+            # os._exit skips atexit; flush the queued records first
+            stop_logging()
+            os._exit(code)
+
+    def stop(self, sig, frame):
+        if self.stopping:
+            # Second signal: no more draining
+            self.kill(signal.SIGKILL)
+            return
+        self.stopping = True
+        self.deadline = (
+            time.monotonic()
+            + settings.shutdown_drain_seconds
+            + settings.shutdown_grace_seconds
+            + settings.job_shutdown_seconds
+            + 5.0
+        )
+        logger.info("Draining %d workers", len(self.workers))
+        self.kill(signal.SIGTERM)
+
+    def kill(self, sig):
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                self.workers.pop(pid, None)
+
+    def reap(self):
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.workers.clear()
+                return
+            if pid == 0:
+                return
+            started = self.workers.pop(pid, time.monotonic())
+            if self.stopping:
+                continue
+            logger.warning(
+                "Worker %d exited with status %d, restarting",
+                pid,
+                os.waitstatus_to_exitcode(status),
+            )
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                time.sleep(1.0)
+            self.spawn()
+
+    def run(self):
+        preload()
+        self.socket = self.config.bind_socket()
+        self.socket.set_inheritable(True)
+
+        # Move everything built so far out of the collector's generations:
+        # collections in the workers then don't write to (and so un-share)
+        # the master's pages
+        gc.collect()
+        gc.freeze()
+
+        workers = self.args.workers or settings.server_workers or os.cpu_count() or 1
+        for _ in range(workers):
+            self.spawn()
+        logger.info(
+            "Serving on %s:%d with %d workers", self.args.host, self.args.port, workers
+        )
+
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        while self.workers:
+            self.reap()
+            if self.stopping and time.monotonic() > self.deadline:
+                logger.warning("Workers still running at deadline, killing them")
+                self.kill(signal.SIGKILL)
+            time.sleep(0.2)
+        self.socket.close()
+        logger.info("All workers stopped")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument(
+        "--workers", type=int, default=0, help="defaults to SERVER_WORKERS or CPUs"
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    Master(parse_args()).run()
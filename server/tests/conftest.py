@@ -0,0 +1,80 @@
+import os
+import tempfile
+
+# Before anything imports app.config.settings: a throwaway SQLite database,
+# read through a "replica" engine on the same file so tests see the SQL
+# get_read_db sends there, and no background jobs or LLM
+_db_path = os.path.join(tempfile.mkdtemp(prefix="shop-tests-"), "test.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_path}")
+os.environ.setdefault("DB_REPLICA_URLS", f"sqlite:///{_db_path}")
+os.environ.setdefault("DB_READ_YOUR_WRITES_SECONDS", "0")
+os.environ.setdefault("JOBS_ENABLED", "false")
+os.environ.setdefault("ADMISSION_ENABLED", "false")
+os.environ.setdefault("OPENAI_MODEL", "unused")
+
+import pytest  # noqa: E402
+from app.config.authentication import create_access_token  # noqa: E402
+from app.config.compression import catalog_responses  # noqa: E402
+from app.config.database import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.base import User  # noqa: E402
+from app.services.order_status_cache import latest_order_cache  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from tests.query_budget import assert_query_budget  # noqa: E402
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "query_budget(n): fail if the test runs more than n SQL statements"
+    )
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker("query_budget")
+    if marker is None:
+        return (yield)
+    with assert_query_budget(marker.args[0]):
+        return (yield)
+
+
+@pytest.fixture
+def query_budget():
+    """``with query_budget(n): ...`` fails the test past ``n`` statements."""
+    return assert_query_budget
+
+
+@pytest.fixture
+def db():
+    """A session on a fresh schema, for seeding."""
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    catalog_responses.invalidate()
+    latest_order_cache.clear()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client(db):
+    # Not entered as a context manager: the lifespan's warm-up loads the
+    # embedding model, which these tests don't need
+    return TestClient(app)
+
+
+@pytest.fixture
+def user(db):
+    user = User(username="shopper", email="shopper@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def auth_headers(user):
+    token = create_access_token(data={"sub": user.email, "user_id": user.id})
+    return {"Authorization": f"Bearer {token}"}
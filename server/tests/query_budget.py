@@ -0,0 +1,74 @@
+"""Fail a test when it runs more SQL than it declared.
+
+Loaded by ``tests/conftest.py``: either mark a whole test::
+
+    @pytest.mark.query_budget(4)
+    def test_order_history(client, auth_headers):
+        client.get("/api/v1/orders/history", headers=auth_headers)
+
+or budget just one block with the fixture::
+
+    def test_products(client, query_budget):
+        with query_budget(2):
+            client.get("/api/v1/products")
+
+Queries are counted on the primary and every read replica, the engines
+``get_read_db`` picks from, so statements run from the threadpool behind
+sync routes are included wherever they were routed. The failure lists every
+statement with repeated shapes first, which is usually the N+1.
+"""
+
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterable, List, Optional
+
+import pytest
+from app.config.database import engine, replica_engines
+from app.config.sql_profiler import statement_shape
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryLog:
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def report(self) -> str:
+        shapes = Counter(statement_shape(s) for s in self.statements)
+        return "\n".join(f"{n} x {shape}" for shape, n in shapes.most_common())
+
+
+@contextmanager
+def count_queries(targets: Optional[Iterable[Engine]] = None):
+    """Log statements run on ``targets``, by default every engine."""
+    targets = list(targets) if targets is not None else [engine, *replica_engines]
+    log = QueryLog()
+
+    def _record(conn, cursor, statement, params, context, many):
+        log.statements.append(statement)
+
+    for target in targets:
+        event.listen(target, "after_cursor_execute", _record)
+    try:
+        yield log
+    finally:
+        for target in targets:
+            event.remove(target, "after_cursor_execute", _record)
+
+
+@contextmanager
+def assert_query_budget(
+    max_queries: int, targets: Optional[Iterable[Engine]] = None
+):
+    with count_queries(targets) as log:
+        yield log
+    if log.count > max_queries:
+        pytest.fail(
+            f"Ran {log.count} SQL statements, budget is {max_queries}:\n"
+            + log.report(),
+            pytrace=False,
+        )
@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+from app.config import admission as admission_module
+from app.config.admission import AdaptiveLimit, AdmissionController, AdmissionMiddleware
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(admission_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def controller(*limits: AdaptiveLimit) -> AdmissionController:
+    controller = AdmissionController()
+    for limit in limits:
+        controller.add(limit, ("GET", f"/{limit.name}"))
+    return controller
+
+
+def test_limit_grows_additively_and_backs_off_once_per_period(clock):
+    limit = AdaptiveLimit("chat", max_limit=8, target_seconds=0.5, backoff=0.5)
+    limit.limit = 2.0
+    admission = controller(limit)
+
+    limit.in_flight = 1
+    admission.record(limit, latency=0.1)
+    assert limit.limit == 2.0  # not saturated: the limit isn't the bottleneck
+    limit.in_flight = 2
+    admission.record(limit, latency=0.1)
+    assert limit.limit == 2.5
+    admission.record(limit, latency=0.1)
+    assert limit.limit == pytest.approx(2.9)
+
+    admission.record(limit, latency=2.0)
+    assert limit.limit == pytest.approx(1.45)
+    admission.record(limit, latency=2.0, failed=True)
+    assert limit.limit == pytest.approx(1.45)  # same burst
+    clock[0] += 1
+    admission.record(limit, latency=0.1, failed=True)
+    assert limit.limit == 1  # never below min_limit
+
+
+def test_cheaper_routes_are_shed_last(clock):
+    chat = AdaptiveLimit("chat", max_limit=8, target_seconds=1.0, backoff=0.5)
+    catalog = AdaptiveLimit(
+        "catalog", max_limit=8, target_seconds=0.1, priority=2, backoff=0.5
+    )
+    admission = controller(chat, catalog)
+    chat.in_flight = 1
+
+    admission.record(catalog, latency=1.0)
+    assert (chat.limit, catalog.limit) == (4, 8)
+    admission.record(catalog, latency=1.0)
+    assert (chat.limit, catalog.limit) == (4, 4)
+
+
+def test_queue_is_served_round_robin_by_user():
+    async def scenario():
+        limit = AdaptiveLimit("chat", max_limit=3, target_seconds=1.0)
+        holders = ("x", "y", "z")
+        for key in holders:
+            assert await limit.acquire(key) is None
+        admitted = []
+
+        async def request(key):
+            assert await limit.acquire(key) is None
+            admitted.append(key)
+
+        waiting = [asyncio.create_task(request(key)) for key in ("a", "a", "b")]
+        await asyncio.sleep(0)
+        for key in holders:
+            limit.release(key)
+            await asyncio.sleep(0)
+        await asyncio.gather(*waiting)
+        return admitted
+
+    # The second "a" waits for "b", who queued after it
+    assert asyncio.run(scenario()) == ["a", "b", "a"]
+
+
+class BlockingApp:
+    def __init__(self):
+        self.gate = asyncio.Event()
+
+    async def __call__(self, scope, receive, send):
+        await self.gate.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def call(middleware, client: str) -> dict:
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/chat",
+        "headers": [],
+        "client": (client, 1234),
+    }
+    await middleware(scope, None, send)
+    start = sent[0]
+    return {"status": start["status"], "headers": dict(start["headers"])}
+
+
+def test_rejections_carry_retry_after():
+    async def scenario():
+        limit = AdaptiveLimit(
+            "chat", max_limit=1, target_seconds=2.5, per_key=1, queue_seconds=0.01
+        )
+        app = BlockingApp()
+        middleware = AdmissionMiddleware(app, controller(limit))
+        running = asyncio.create_task(call(middleware, "10.0.0.1"))
+        await asyncio.sleep(0)
+        same_user = await call(middleware, "10.0.0.1")
+        other_user = await call(middleware, "10.0.0.2")
+        app.gate.set()
+        return same_user, other_user, await running
+
+    same_user, other_user, admitted = asyncio.run(scenario())
+    assert same_user["status"] == 429
+    assert other_user["status"] == 503  # waited its queue time, then shed
+    assert same_user["headers"][b"retry-after"] == b"3"
+    assert other_user["headers"][b"retry-after"] == b"3"
+    assert admitted["status"] == 200
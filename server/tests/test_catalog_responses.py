@@ -0,0 +1,87 @@
+import gzip
+from decimal import Decimal
+
+import pytest
+from app.config.compression import negotiate
+from app.config.database import replica_engines
+from app.models.base import Product
+
+from tests.query_budget import count_queries
+
+
+def add_product(db, name: str):
+    db.add(Product(name=name, price=Decimal("5.00"), stock=10))
+    db.commit()
+
+
+def listed_names(client) -> list:
+    response = client.get("/api/v1/products")
+    assert response.status_code == 200
+    return [product["name"] for product in response.json()["products"]]
+
+
+def test_writes_invalidate_the_cached_catalog(client, db):
+    add_product(db, "Kettle")
+    assert listed_names(client) == ["Kettle"]
+    with count_queries() as log:
+        assert listed_names(client) == ["Kettle"]
+    assert log.count == 0  # served from the cache
+
+    add_product(db, "Teapot")
+    # Rebuilt from the primary: a lagging replica can't be cached
+    with count_queries(replica_engines) as replica_log:
+        assert listed_names(client) == ["Kettle", "Teapot"]
+    assert replica_log.count == 0
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        ("gzip, deflate, br", "br"),
+        ("gzip", "gzip"),
+        ("br;q=0.5, gzip;q=0.8", "gzip"),
+        ("br;q=0, gzip;q=0", None),
+        ("*", "br"),
+        ("*;q=0.3, gzip", "gzip"),
+        ("identity", None),
+        ("", None),
+    ],
+)
+def test_negotiate_prefers_brotli_within_the_accepted(accept, expected):
+    assert negotiate(accept, {"br", "gzip"}) == expected
+
+
+def test_negotiate_offers_only_what_was_built():
+    assert negotiate("br, gzip", {"gzip"}) == "gzip"
+    assert negotiate("br", {"gzip"}) is None
+
+
+def test_catalog_is_served_gzipped_with_an_etag(client, db):
+    for n in range(20):
+        add_product(db, f"Stainless steel kettle {n}")
+    plain = client.get("/api/v1/products", headers={"Accept-Encoding": "identity"})
+    with client.stream(
+        "GET", "/api/v1/products", headers={"Accept-Encoding": "gzip"}
+    ) as packed:
+        raw = b"".join(packed.iter_raw())
+    assert "content-encoding" not in plain.headers
+    assert packed.headers["content-encoding"] == "gzip"
+    assert packed.headers["vary"] == "Accept-Encoding"
+    assert len(raw) < len(plain.content)
+    assert gzip.decompress(raw) == plain.content
+    assert packed.headers["etag"] == plain.headers["etag"]
+
+
+def test_matching_etag_gets_not_modified_until_a_write(client, db):
+    add_product(db, "Kettle")
+    etag = client.get("/api/v1/products").headers["etag"]
+
+    cached = client.get("/api/v1/products", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    add_product(db, "Teapot")
+    changed = client.get("/api/v1/products", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
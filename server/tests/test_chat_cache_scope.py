@@ -0,0 +1,83 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from app.rag.agent_executor import AgentExecutor
+from app.rag.semantic_cache import SemanticCache, semantic_cache
+from app.services.chat_service import ChatService
+from langchain_core.tools import tool
+
+
+class FakeLLM:
+    def bind_tools(self, tools):
+        return self
+
+
+@tool
+def order_status() -> dict:
+    """The signed-in user's latest order."""
+    raise RuntimeError("database is down")
+
+
+@pytest.fixture
+def cache():
+    semantic_cache.clear()
+    yield semantic_cache
+    semantic_cache.clear()
+
+
+def finish(agent, intent: str, vector: np.ndarray, user_id: int = 1):
+    prompt = SimpleNamespace(report=lambda: {})
+    context = SimpleNamespace(messages=[])
+    ChatService(db=None)._finish_agent(
+        agent, prompt, user_id, context, intent, vector, "a reply"
+    )
+
+
+def unit(seed: int) -> np.ndarray:
+    vector = np.random.default_rng(seed).normal(size=16).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_failed_personal_tool_is_recorded_and_not_cached(cache):
+    agent = AgentExecutor(FakeLLM(), [order_status])
+    call = {"name": "order_status", "args": {}, "id": "call-1"}
+    asyncio.run(agent._run_tool(call, share=1))
+    assert agent.called_tools == {"order_status"}
+    assert agent.failed_tools == {"order_status"}
+
+    vector = unit(0)
+    finish(agent, "chat", vector)
+    assert cache.lookup(vector, "chat", user_id=1) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_personal_intent_is_user_scoped_without_tool_calls(cache):
+    agent = AgentExecutor(FakeLLM(), [])  # answered without calling a tool
+    vector = unit(1)
+    finish(agent, "order_status", vector, user_id=1)
+    assert cache.lookup(vector, "order_status", user_id=1) == "a reply"
+    assert cache.lookup(vector, "order_status", user_id=2) is None
+
+
+def test_catalog_answers_are_shared(cache):
+    vector = unit(2)
+    finish(AgentExecutor(FakeLLM(), []), "chat", vector, user_id=1)
+    assert cache.lookup(vector, "chat", user_id=2) == "a reply"
+
+
+def test_expired_best_match_does_not_hide_a_live_one(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("app.rag.semantic_cache.time.monotonic", lambda: clock[0])
+    cache = SemanticCache(threshold=0.5, ttl=60)
+    query = unit(3)
+    nearby = query + 0.1 * unit(4)
+    cache.store(query, "product_search", None, "stale")
+    clock[0] += 30
+    cache.store(nearby / np.linalg.norm(nearby), "product_search", 1, "live")
+    clock[0] += 45  # only the shared entry has expired
+
+    assert cache.lookup(query, "product_search", 1) == "live"
+    assert cache.lookup(query, "product_search", 2) is None
+    assert cache.purge_expired() == 1
@@ -0,0 +1,54 @@
+import random
+from decimal import Decimal
+
+import numpy as np
+from app.models.base import Order, OrderItem, Product
+from app.services.co_purchase import CoPurchaseIndex
+
+PRODUCTS = 12
+
+
+def seed_products(db):
+    db.add_all(
+        Product(name=f"Product {n}", price=Decimal("5.00"), stock=10)
+        for n in range(PRODUCTS)
+    )
+    db.commit()
+
+
+def item(product_id: int) -> OrderItem:
+    return OrderItem(product_id=product_id, quantity=1, price=Decimal("5.00"))
+
+
+def place(db, user_id: int, rng: random.Random, orders: list):
+    for _ in range(rng.randint(1, 4)):
+        basket = rng.sample(range(1, PRODUCTS + 1), rng.randint(1, 5))
+        order = Order(user_id=user_id, total_amount=Decimal("5.00"), status="placed")
+        order.items = [item(product_id) for product_id in basket]
+        db.add(order)
+        orders.append(order)
+    # Items added to an earlier order pair with the ones already counted
+    earlier = rng.choice(orders)
+    earlier.items.append(item(rng.randint(1, PRODUCTS)))
+    db.commit()
+
+
+def test_incremental_updates_match_a_full_build(db, user):
+    seed_products(db)
+    rng = random.Random(7)
+    index = CoPurchaseIndex(top_k=3, max_basket=50)
+    orders = []
+    for _ in range(15):
+        place(db, user.id, rng, orders)
+        index.update(db)
+        for incremental, built in zip(index._top, index._build_top()):
+            assert np.array_equal(incremental, built)
+
+    fresh = CoPurchaseIndex(top_k=3, max_basket=50)
+    fresh.update(db)
+    assert np.array_equal(index._keys, fresh._keys)
+    assert np.array_equal(index._counts, fresh._counts)
+    assert all(
+        index.neighbours(product_id) == fresh.neighbours(product_id)
+        for product_id in range(PRODUCTS + 2)
+    )
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from app.models.base import Order, OrderItem, Payment, Product, Shipment
+
+# Orders, items, products, payments and shipments: one query each, per page
+HISTORY_QUERIES = 5
+
+
+def place_orders(db, user_id: int, count: int):
+    products = [
+        Product(name=f"Product {n}", price=Decimal("5.00"), stock=10)
+        for n in range(3)
+    ]
+    placed = datetime(2026, 1, 1)
+    for n in range(count):
+        order = Order(
+            user_id=user_id,
+            total_amount=Decimal("15.00"),
+            status="placed",
+            created_at=placed + timedelta(hours=n),
+        )
+        order.items = [
+            OrderItem(product=product, quantity=1, price=product.price)
+            for product in products
+        ]
+        order.payments = [Payment(amount=order.total_amount, status="success")]
+        order.shipments = [Shipment(status="shipped", tracking_number=f"T{n}")]
+        db.add(order)
+    db.commit()
+
+
+@pytest.mark.parametrize("count", [1, 10])
+def test_history_queries_dont_grow_with_orders(
+    client, db, user, auth_headers, query_budget, count
+):
+    place_orders(db, user.id, count)
+    with query_budget(HISTORY_QUERIES):
+        response = client.get("/api/v1/orders/history", headers=auth_headers)
+    assert response.status_code == 200
+    orders = response.json()["orders"]
+    assert len(orders) == count
+    assert all(len(order["items"]) == 3 for order in orders)
+
+
+def test_history_pages_follow_the_cursor(client, db, user, auth_headers, query_budget):
+    place_orders(db, user.id, 5)
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        with query_budget(HISTORY_QUERIES):
+            page = client.get(
+                "/api/v1/orders/history", params=params, headers=auth_headers
+            ).json()
+        seen += [order["id"] for order in page["orders"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [5, 4, 3, 2, 1]  # newest first, each order once
@@ -0,0 +1,74 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from app.models.base import Order, OrderItem, Product, ProductPopularity
+from app.services import popularity, product_service
+from app.services.popularity import PopularityIndex
+from app.services.product_service import ProductService
+
+
+@pytest.fixture
+def index(monkeypatch):
+    index = PopularityIndex()
+    monkeypatch.setattr(product_service, "popularity_index", index)
+    return index
+
+
+def add_products(db, count: int):
+    db.add_all(
+        Product(name=f"Product {n}", price=Decimal("5.00"), stock=10)
+        for n in range(count)
+    )
+    db.commit()
+
+
+def listed(db, limit: int):
+    ids, cursor = [], None
+    while True:
+        page = ProductService(db).list_products(
+            limit=limit, cursor=cursor, sort="popular"
+        )
+        ids += [product.id for product in page.products]
+        cursor = page.next_cursor
+        if cursor is None:
+            return ids
+
+
+def test_lists_by_id_before_the_ranking_loads(db, index):
+    add_products(db, 5)
+    assert listed(db, limit=2) == [1, 2, 3, 4, 5]
+
+
+def test_appends_products_added_since_the_load(db, index):
+    add_products(db, 3)
+    db.add(ProductPopularity(product_id=3, score=10.0, updated_at=datetime.utcnow()))
+    db.commit()
+    index.load(db)
+    add_products(db, 2)
+    assert listed(db, limit=2) == [3, 1, 2, 4, 5]
+
+
+def order(db, user_id: int, product_ids: list):
+    placed = Order(user_id=user_id, total_amount=Decimal("5.00"), status="placed")
+    placed.items = [
+        OrderItem(product_id=product_id, quantity=1, price=Decimal("5.00"))
+        for product_id in product_ids
+    ]
+    db.add(placed)
+    db.commit()
+
+
+def test_batches_of_deleted_products_move_the_mark(db, user, monkeypatch):
+    monkeypatch.setattr(popularity, "ORDER_ITEM_BATCH", 2)
+    add_products(db, 2)
+    order(db, user.id, [1])
+    popularity.update_popularity()
+    order(db, user.id, [None, None, None, None])  # products since deleted
+    order(db, user.id, [2])
+    popularity.update_popularity()
+
+    db.expire_all()
+    rows = db.query(ProductPopularity).all()
+    assert {row.product_id for row in rows} == {1, 2}  # past the unsold batches
+    assert max(row.last_order_item_id for row in rows) == 6
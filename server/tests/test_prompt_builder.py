@@ -0,0 +1,42 @@
+import json
+
+import pytest
+from app.rag.prompt_builder import PromptBuilder, count_tokens
+
+PRODUCTS = [
+    {
+        "id": n,
+        "name": f"Kettle model {n}",
+        "price": "19.99",
+        "stock": 3,
+        "description": f"Boils water quickly. Whistle variant {n * 7}.",
+    }
+    for n in range(10)
+]
+
+
+def builder(products: int = 1000, tools: int = 1000) -> PromptBuilder:
+    return PromptBuilder(
+        {"system": 100, "memory": 100, "products": products, "tools": tools}
+    )
+
+
+@pytest.mark.parametrize("budget", [40, 80, 200])
+def test_products_stay_within_their_budget(budget):
+    content = builder(products=budget).tool_content(
+        "product_search", {"query": "kettle"}, PRODUCTS
+    )
+    assert count_tokens(content) <= budget
+    assert 0 < len(json.loads(content)) < len(PRODUCTS)
+
+
+def test_oversized_tool_results_stay_valid_json():
+    orders = [{"id": n, "status": "delivered", "total": "42.00"} for n in range(50)]
+    content = builder(tools=60).tool_content("order_history", {}, orders)
+    trimmed = json.loads(content)
+    assert trimmed["truncated"] and trimmed["total"] == 50
+    assert trimmed["items"] == orders[: len(trimmed["items"])]
+    assert count_tokens(content) <= 60
+
+    spent = builder(tools=0).tool_content("order_status", {}, {"id": 1})
+    assert json.loads(spent) == {"truncated": True, "items": 1}
@@ -0,0 +1,41 @@
+from decimal import Decimal
+
+import pytest
+from app.config.database import replica_engines
+from app.models.base import Product
+
+from tests.query_budget import count_queries
+
+
+@pytest.fixture
+def product_id(db):
+    product = Product(name="Mug", description="Ceramic", price=Decimal("9.50"), stock=3)
+    db.add(product)
+    db.commit()
+    return product.id  # read here: after the commit it reloads with a SELECT
+
+
+def test_counts_statements_routed_to_replicas(client, product_id):
+    assert replica_engines, "conftest points DB_REPLICA_URLS at the test database"
+    with count_queries(replica_engines) as log:
+        response = client.get(f"/api/v1/products/{product_id}")
+    assert response.status_code == 200
+    assert log.count >= 1
+
+
+def test_within_budget(client, product_id, query_budget):
+    with query_budget(1):
+        response = client.get(f"/api/v1/products/{product_id}")
+    assert response.json()["name"] == "Mug"
+
+
+def test_over_budget_fails(client, product_id, query_budget):
+    with pytest.raises(pytest.fail.Exception, match="budget is 0"):
+        with query_budget(0):
+            client.get(f"/api/v1/products/{product_id}")
+
+
+@pytest.mark.query_budget(1)
+def test_marker(client, product_id):
+    # Seeding ran in the fixture, outside the budgeted call
+    assert client.get(f"/api/v1/products/{product_id}").status_code == 200
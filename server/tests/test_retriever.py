@@ -0,0 +1,93 @@
+import uuid
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from app.rag import retriever as retriever_module
+from app.rag.retriever import ProductRetriever, reciprocal_rank_fusion
+from langchain_chroma import Chroma
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.vectorstores import InMemoryVectorStore
+
+EMBEDDINGS = DeterministicFakeEmbedding(size=32)
+NAMES = ["kettle", "teapot", "mug", "toaster", "blender", "whisk", "ladle", "pan"]
+QUERIES = ["kettle", "pan", "something to boil water"]
+
+
+@pytest.fixture(autouse=True)
+def fake_embedder(monkeypatch):
+    def embed_queries(texts):
+        matrix = np.asarray(EMBEDDINGS.embed_documents(list(texts)), np.float32)
+        return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+    monkeypatch.setattr(retriever_module, "embed_queries", embed_queries)
+
+
+def products():
+    return [
+        SimpleNamespace(id=n, name=name, description=None)
+        for n, name in enumerate(NAMES, start=1)
+    ]
+
+
+def memory_retriever() -> ProductRetriever:
+    retriever = ProductRetriever(InMemoryVectorStore(EMBEDDINGS))
+    retriever.index_products(products())
+    return retriever
+
+
+def chroma_retriever() -> ProductRetriever:
+    store = Chroma(
+        collection_name=f"test-{uuid.uuid4().hex}",
+        embedding_function=EMBEDDINGS,
+        collection_metadata={"hnsw:space": "cosine"},
+    )
+    retriever = ProductRetriever(store, distance_scores=True)
+    retriever.index_products(products())
+    return retriever
+
+
+def test_rrf_favours_products_several_rankings_agree_on():
+    fused = reciprocal_rank_fusion(
+        [[(1, 0.9), (2, 0.8), (3, 0.7)], [(4, 0.99), (2, 0.5), (3, 0.1)]], k=60
+    )
+    assert [product_id for product_id, _ in fused] == [2, 3, 1, 4]
+    assert fused[0][1] == pytest.approx(2 / 62)
+    assert fused[2][1] == pytest.approx(1 / 61)
+
+
+def test_rrf_ignores_the_scale_of_scores():
+    fused = reciprocal_rank_fusion([[(1, 1000.0)], [(2, 0.001), (1, 0.0)]])
+    assert [product_id for product_id, _ in fused] == [1, 2]
+
+
+@pytest.mark.parametrize("make", [memory_retriever, chroma_retriever])
+def test_search_batch_matches_one_search_per_query(make):
+    retriever = make()
+    batched = retriever.search_batch(QUERIES, k=3)
+    assert len(batched) == len(QUERIES)
+    for query, results in zip(QUERIES, batched):
+        single = retriever._search(query, k=3)
+        assert [product_id for product_id, _ in results] == [
+            product_id for product_id, _ in single
+        ]
+        assert [score for _, score in results] == pytest.approx(
+            [score for _, score in single], abs=1e-5
+        )
+    assert batched[0][0] == (1, pytest.approx(1.0, abs=1e-5))  # exact match
+
+
+def test_search_batch_caps_k_at_the_catalog_size():
+    results = memory_retriever().search_batch(["kettle"], k=50)
+    assert sorted(product_id for product_id, _ in results[0]) == list(
+        range(1, len(NAMES) + 1)
+    )
+    assert ProductRetriever(InMemoryVectorStore(EMBEDDINGS)).search_batch(
+        ["kettle"]
+    ) == [[]]
+
+
+def test_search_many_fuses_each_query_once():
+    retriever = memory_retriever()
+    fused = retriever.search_many(["kettle", "pan", "kettle"], k=3)
+    assert fused == reciprocal_rank_fusion(retriever.search_batch(["kettle", "pan"], 3))
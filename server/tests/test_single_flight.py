@@ -0,0 +1,78 @@
+import asyncio
+
+from app.rag.agent_executor import AgentExecutor
+from app.rag.single_flight import SingleFlight
+from langchain_core.messages import AIMessageChunk, HumanMessage
+
+
+class GatedLLM:
+    """Streams one chunk, then waits for ``gate`` before the rest."""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+
+    async def astream(self, messages):
+        yield AIMessageChunk(content="Hello")
+        await self.gate.wait()
+        yield AIMessageChunk(content=" there")
+
+
+async def collect(stream, into: list):
+    async for chunk in stream:
+        into.append(chunk)
+
+
+def test_followers_get_a_plain_answer_while_it_streams():
+    async def scenario():
+        flights = SingleFlight("test-stream")
+        llm = GatedLLM()
+
+        def producer(flight):
+            agent = AgentExecutor(llm, [], flight=flight)
+            return agent.stream([HumanMessage(content="hi")])
+
+        leader, follower = [], []
+        leading = asyncio.create_task(collect(flights.stream("k", producer), leader))
+        await asyncio.sleep(0)
+        following = asyncio.create_task(
+            collect(flights.stream("k", producer), follower)
+        )
+        for _ in range(20):
+            await asyncio.sleep(0)
+        seen_early = list(follower)
+        llm.gate.set()
+        await asyncio.gather(leading, following)
+        return seen_early, leader, follower, flights.counters
+
+    seen_early, leader, follower, counters = asyncio.run(scenario())
+    assert seen_early == ["Hello"]  # before the flight is done
+    assert leader == follower == ["Hello", " there"]
+    assert counters["coalesced"] == 1
+
+
+def test_cancelled_producer_lets_followers_compute_their_own():
+    async def scenario():
+        flights = SingleFlight("test-cancel")
+        joined = asyncio.Event()
+
+        async def cancelled(flight):
+            yield "partial"
+            await joined.wait()
+            raise asyncio.CancelledError()
+
+        async def own(flight):
+            yield "own answer"
+
+        follower = []
+        leading = asyncio.create_task(collect(flights.stream("k", cancelled), []))
+        await asyncio.sleep(0)
+        following = asyncio.create_task(collect(flights.stream("k", own), follower))
+        await asyncio.sleep(0)
+        joined.set()
+        await asyncio.wait_for(following, timeout=1)
+        await asyncio.gather(leading, return_exceptions=True)
+        return follower, flights.counters
+
+    follower, counters = asyncio.run(scenario())
+    assert follower == ["own answer"]
+    assert counters["fallbacks"] == 1
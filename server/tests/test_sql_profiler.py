@@ -0,0 +1,21 @@
+import logging
+
+from app.config.sql_profiler import param_types, profile_engine
+from sqlalchemy import create_engine, text
+
+
+def test_slow_query_log_leaves_out_parameter_values(caplog):
+    target = create_engine("sqlite://")
+    profile_engine(target, slow_ms=0)
+    with caplog.at_level(logging.WARNING, "app.config.sql_profiler"):
+        with target.connect() as conn:
+            conn.execute(
+                text("SELECT :token, :user_id"), {"token": "s3cret", "user_id": 7}
+            )
+    assert "Slow query" in caplog.text
+    assert "s3cret" not in caplog.text
+    assert "(str, int)" in caplog.text
+
+
+def test_param_types_summarizes_executemany():
+    assert param_types([{"a": 1}, {"a": 2}], many=True) == "{a: int} x 2"
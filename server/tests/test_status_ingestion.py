@@ -0,0 +1,89 @@
+from decimal import Decimal
+
+import pytest
+from app.models.base import Order, Payment, Shipment, StatusEvent
+from app.services.status_ingestion_service import StatusUpdateQueue
+
+
+@pytest.fixture
+def queue(db):
+    return StatusUpdateQueue()
+
+
+def add_payment(db, user_id: int, transaction_id: str, status=None):
+    order = Order(user_id=user_id, total_amount=Decimal("10.00"), status="placed")
+    order.payments = [
+        Payment(amount=order.total_amount, status=status, transaction_id=transaction_id)
+    ]
+    order.shipments = [
+        Shipment(status="pending", tracking_number=f"S-{transaction_id}")
+    ]
+    db.add(order)
+    db.commit()
+
+
+def payment_status(db, transaction_id: str) -> str:
+    db.expire_all()
+    return db.query(Payment.status).filter_by(transaction_id=transaction_id).scalar()
+
+
+def test_duplicates_are_dropped_while_queued_and_after_applying(db, user, queue):
+    add_payment(db, user.id, "TX1")
+    key = ("payment", "TX1", "succeeded")
+    assert queue.enqueue([key, key]) == (1, 1)
+    queue.flush()
+    assert queue.enqueue([key]) == (1, 0)
+    queue.flush()
+
+    assert payment_status(db, "TX1") == "succeeded"
+    assert db.query(StatusEvent).count() == 1
+    assert len(queue) == 0
+
+
+def test_most_advanced_status_in_a_batch_wins(db, user, queue):
+    add_payment(db, user.id, "TX1")
+    queue.enqueue([("payment", "TX1", "succeeded"), ("payment", "TX1", "pending")])
+    queue.enqueue([("shipment", "S-TX1", "shipped")])
+    queue.flush()
+
+    assert payment_status(db, "TX1") == "succeeded"
+    db.expire_all()
+    assert db.query(Shipment.status).scalar() == "shipped"
+
+
+def test_late_callbacks_never_move_a_status_back(db, user, queue):
+    add_payment(db, user.id, "TX1")
+    queue.enqueue([("payment", "TX1", "authorized")])
+    queue.flush()
+    queue.enqueue([("payment", "TX1", "pending")])
+    queue.flush()
+    assert payment_status(db, "TX1") == "authorized"
+
+    queue.enqueue([("payment", "TX1", "failed")])
+    queue.flush()
+    queue.enqueue([("payment", "TX1", "succeeded")])
+    queue.flush()
+    assert payment_status(db, "TX1") == "failed"  # terminal statuses are final
+
+
+def test_waiting_callback_applies_once_its_row_exists(db, user, queue):
+    queue.enqueue([("payment", "TX1", "pending")])
+    queue.flush()
+    assert len(queue) == 1  # no payment row yet
+
+    add_payment(db, user.id, "TX1")
+    # The older waiting status is requeued behind this one, and must not win
+    queue.enqueue([("payment", "TX1", "succeeded")])
+    queue.flush()
+
+    assert payment_status(db, "TX1") == "succeeded"
+    assert len(queue) == 0
+
+
+def test_unmatched_callbacks_are_dropped_after_the_ttl(db, queue):
+    queue.unmatched_ttl = 0
+    queue.enqueue([("payment", "missing", "succeeded")])
+    queue.flush()
+    assert len(queue) == 1
+    queue.retry()
+    assert len(queue) == 0